@@ -1,21 +1,37 @@
-from typing import Set, FrozenSet, Tuple, Union, List, cast
+import math
+from typing import Set, FrozenSet, Tuple, Union, List, Optional, cast
 try:
     from typing import Literal # Since Python 3.8
 except ImportError:
     from typing_extensions import Literal # Before Python 3.8
 import numpy as np
-from graph_functions import bronKerbosch1, greedy_single_maximal_clique
+from graph_functions import (bronKerbosch1, bronKerbosch_bounded, degree_clique_bound, get_neighbors,
+                             greedy_coloring_number, greedy_single_maximal_clique, read_labeled_graph_from_file,
+                             write_graph_to_file)
 
 
 class MultiDiGraph:
 
-    def __init__(self, matrix: np.array, remove_isolated_vertices: bool = True):
+    def __init__(self, matrix: np.array, remove_isolated_vertices: bool = True,
+                 vertex_labels: Optional[np.array] = None, edge_labels: Optional[np.array] = None):
+        """Keyword arguments:
+        matrix -- adjacency matrix (count of edges from the row vertex to the column vertex)
+        remove_isolated_vertices -- whether vertices without any edges are removed (with their labels)
+        vertex_labels -- optional array with the label of every vertex
+        edge_labels -- optional matrix with the label of the edges from the row vertex to the column vertex
+        """
         if not MultiDiGraph.is_valid_multidigraph_matrix(matrix):
             _, msg = cast(Tuple[bool, str],
                           (MultiDiGraph.is_valid_multidigraph_matrix(input)))
             raise ValueError(f'Invalid matrix for directed multigraph: {msg}')
+        if vertex_labels is not None and np.shape(vertex_labels) != (len(matrix),):
+            raise ValueError('Vertex labels do not match the vertices of the multigraph.')
+        if edge_labels is not None and np.shape(edge_labels) != np.shape(matrix):
+            raise ValueError('Edge labels do not match the adjacency matrix of the multigraph.')
 
         self.adjacency_matrix = matrix.astype(int)
+        self.vertex_labels = None if vertex_labels is None else np.asarray(vertex_labels)
+        self.edge_labels = None if edge_labels is None else np.asarray(edge_labels)
         # Removing isolated vertices in MultiDiGraph
         if remove_isolated_vertices:
             indecies = np.intersect1d(np.where(~self.adjacency_matrix.any(axis=0)), np.where(~self.adjacency_matrix.any(axis=1)))
@@ -23,14 +39,37 @@ class MultiDiGraph:
                 print(f'Removing isolated vertices ({len(indecies)}) from multigraph')
             self.adjacency_matrix = np.delete(self.adjacency_matrix, indecies, axis=0)
             self.adjacency_matrix = np.delete(self.adjacency_matrix, indecies, axis=1)
+            if self.vertex_labels is not None:
+                self.vertex_labels = np.delete(self.vertex_labels, indecies)
+            if self.edge_labels is not None:
+                self.edge_labels = np.delete(np.delete(self.edge_labels, indecies, axis=0), indecies, axis=1)
         self._size = (len(self.adjacency_matrix),
                       MultiDiGraph.count_edges(self.adjacency_matrix))
         # self._size = Tuple(len(matrix), MultiDiGraph.edgeCount()))
 
 
+    @classmethod
+    def from_file(cls, filename: str) -> 'MultiDiGraph':
+        """Returns the multigraph (with its labels) read from the file (see read_labeled_graph_from_file)."""
+        matrix, vertex_labels, edge_labels = read_labeled_graph_from_file(filename)
+        return cls(matrix, vertex_labels=vertex_labels, edge_labels=edge_labels)
+
+    def get_induced_subgraph(self, vertices: np.array) -> 'MultiDiGraph':
+        """Returns the multigraph induced by given vertices (in their order), with their labels."""
+        return MultiDiGraph(
+            self.adjacency_matrix[np.ix_(vertices, vertices)], remove_isolated_vertices=False,
+            vertex_labels=None if self.vertex_labels is None else self.vertex_labels[vertices],
+            edge_labels=None if self.edge_labels is None else self.edge_labels[np.ix_(vertices, vertices)])
+
+    def write_to_file(self, filename: str) -> None:
+        """Writes the multigraph (with its labels) to the file (see write_graph_to_file)."""
+        write_graph_to_file(filename, self.adjacency_matrix, self.vertex_labels, self.edge_labels)
+
     def print(self):
         print('Size = ' + str(self.size))
         print(self.adjacency_matrix)
+        if self.vertex_labels is not None:
+            print(f'Vertex labels: {self.vertex_labels.tolist()}')
         # [print(row) for row in self.adjacency_matrix] # that is for a list of lists
 
 
@@ -122,8 +161,21 @@ class MultiDiGraph:
         
         return cliques
 
-    def approx_maximum_cliques(self) -> Set[FrozenSet[int]]:
-        """Returns the approximation of maximum clique."""
+    def maximum_clique_upper_bound(self) -> int:
+        """Returns an upper bound on the node count of maximum clique.
+
+        The bound is the lower of greedy coloring number and degree bound of the embedded undirected graph.
+        """
+        undir_g = MultiDiGraph.get_undirected_graph_from_directed_graph(
+                MultiDiGraph.get_graph_from_multigraph(self.adjacency_matrix))
+        return min(greedy_coloring_number(undir_g), degree_clique_bound(undir_g))
+
+    def approx_maximum_cliques(self, stats: Optional[dict] = None) -> Set[FrozenSet[int]]:
+        """Returns the approximation of maximum clique.
+
+        If stats dictionary is given, it is filled with the 'upper_bound' on the node count of maximum clique
+        and the 'gap' between it and the node count of the approximation (0 means the approximation is exact).
+        """
         cliques = set()
         nodes, _ = self._size
 
@@ -154,18 +206,30 @@ class MultiDiGraph:
             elif edge_count == max_edge_count:
                 max_candidates.add(clique)
 
+        if stats is not None:
+            stats['upper_bound'] = self.maximum_clique_upper_bound()
+            stats['gap'] = stats['upper_bound'] - max_c_size
+
         return max_candidates
 
 
-    def maximum_cliques(self) -> Set[FrozenSet[int]]:
+    def maximum_cliques(self, warm_start: bool = False, stats: Optional[dict] = None) -> Set[FrozenSet[int]]:
         """Returns the maximum cliques based on node count first, edge count second.
 
         Algorithm:
         1. Find the maximal clique(s) in the embedded graph (using bron-Kerbosch V.1).
+           With warm_start, the approximation is run first and branches that cannot reach
+           the size of the approximated clique are skipped.
         2. Filter for maximum cliques in the embedded graph.
         3. Filter for the ones that give the highest number of edges.
+
+        If stats dictionary is given, it is filled with the search statistics
+        ('warm_start_bound', 'explored_branches', 'pruned_branches').
         """
-        cliques = self.maximal_cliques()
+        if warm_start:
+            cliques = self.warm_started_maximal_cliques(stats if stats is not None else {})
+        else:
+            cliques = self.maximal_cliques()
 
         # Extract maximum clique(s)
         max_c_size = max(map(lambda set: len(set), cliques))
@@ -209,3 +273,22 @@ class MultiDiGraph:
         cliques = bronKerbosch1(set(), set(range(len(undir_g))), set(), undir_g)
         return cliques
 
+    def warm_started_maximal_cliques(self, stats: dict) -> Set[FrozenSet[int]]:
+        """Returns maximal cliques that can compete with the approximation of maximum clique.
+
+        The (nodes, edges) score of the approximated maximum clique is used as the initial
+        lower bound, so every branch of the search which cannot reach as many nodes is pruned.
+        """
+        approx_clique = next(iter(self.approx_maximum_cliques()))
+        c_matrix = self.adjacency_matrix[np.ix_(list(approx_clique), list(approx_clique))]
+        lower_bound = (len(approx_clique), MultiDiGraph.count_edges(c_matrix))
+        stats['warm_start_bound'] = lower_bound
+
+        # Extract the embedded undirected graph
+        undir_g = MultiDiGraph.get_undirected_graph_from_directed_graph(
+                MultiDiGraph.get_graph_from_multigraph(self.adjacency_matrix))
+        neighbors = [get_neighbors(vertex, undir_g) for vertex in range(len(undir_g))]
+
+        # Edge count of a clique is unknown until it is found, so only node count is bounded
+        return bronKerbosch_bounded(set(), set(range(len(undir_g))), set(), neighbors.__getitem__,
+                                    lambda vertices: (len(vertices), math.inf), lower_bound, stats)
@@ -0,0 +1,299 @@
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+import numpy as np
+from greedy_expansion import greedy_expansion_vertex_maps
+
+
+# Successors and predecessors of every vertex (self-loops left out) with the multiplicities of their edges
+WeightedAdjacency = Tuple[List[Dict[int, int]], List[Dict[int, int]]]
+
+
+def get_weighted_adjacency(multi_di_graph: np.array) -> WeightedAdjacency:
+    """Returns the successors and predecessors of every vertex with the multiplicities of their edges (self-loops
+    left out)."""
+    successors = [{} for _ in range(len(multi_di_graph))]
+    predecessors = [{} for _ in range(len(multi_di_graph))]
+    starts, ends = np.nonzero(multi_di_graph)
+    for start, end, multiplicity in zip(starts.tolist(), ends.tolist(), multi_di_graph[starts, ends].tolist()):
+        if start != end:
+            successors[start][end] = multiplicity
+            predecessors[end][start] = multiplicity
+    return successors, predecessors
+
+
+def get_vertex_colors(multi_di_graphs: List[np.array], rounds: int = 2) -> List[np.array]:
+    """Returns the color of every vertex of the multigraphs after rounds of color refinement, starting from the
+    self-loop multiplicity and degrees, each round adding the multisets of (multiplicity, color) of the successors
+    and predecessors. Colors are ranks of the signatures of all the multigraphs together, so they do not depend
+    on the order of vertices and equal colors of two multigraphs mean equal signatures."""
+    adjacencies = [get_weighted_adjacency(multi_di_graph) for multi_di_graph in multi_di_graphs]
+    signatures = [[(loop, len(successors[vertex]), len(predecessors[vertex]))
+                   for vertex, loop in enumerate(np.diagonal(multi_di_graph).tolist())]
+                  for multi_di_graph, (successors, predecessors) in zip(multi_di_graphs, adjacencies)]
+    for round_number in range(rounds + 1):
+        ranks = dict((signature, rank) for rank, signature in
+                     enumerate(sorted(set(signature for graph_signatures in signatures
+                                          for signature in graph_signatures))))
+        colors = [[ranks[signature] for signature in graph_signatures] for graph_signatures in signatures]
+        if round_number < rounds:
+            signatures = [[(graph_colors[vertex],
+                            tuple(sorted((multiplicity, graph_colors[end])
+                                         for end, multiplicity in successors[vertex].items())),
+                            tuple(sorted((multiplicity, graph_colors[start])
+                                         for start, multiplicity in predecessors[vertex].items())))
+                           for vertex in range(len(graph_colors))]
+                          for graph_colors, (successors, predecessors) in zip(colors, adjacencies)]
+    return [np.array(graph_colors, dtype=int) for graph_colors in colors]
+
+
+def get_heavy_edge_coarse_vertices(multi_di_graph: np.array) -> np.array:
+    """Returns the coarse vertex of every vertex after merging the pairs of a heavy edge matching.
+
+    Edges are visited from the one with the most multiedges (both directions summed, self-loops left out), ties
+    broken by the colors of their vertices (see get_vertex_colors) so two isomorphic multigraphs are mostly
+    coarsened the same way, and each one joining two unmatched vertices matches them. Every vertex left unmatched
+    joins the pair of its neighbor with the most multiedges (all its neighbors are matched), the vertices without
+    neighbors are merged together, so there are at most about half as many coarse vertices.
+    """
+    colors, = get_vertex_colors([multi_di_graph])
+    weights = multi_di_graph + multi_di_graph.T
+    np.fill_diagonal(weights, 0)
+    starts, ends = np.nonzero(np.triu(weights))
+    order = np.lexsort((ends, starts, np.maximum(colors[starts], colors[ends]),
+                        np.minimum(colors[starts], colors[ends]), -weights[starts, ends]))
+    leaders = np.arange(len(multi_di_graph))
+    matched = np.zeros(len(multi_di_graph), dtype=bool)
+    for start, end in zip(starts[order].tolist(), ends[order].tolist()):
+        if not matched[start] and not matched[end]:
+            leaders[end] = start
+            matched[start] = matched[end] = True
+    isolated_leader = None
+    for vertex in np.flatnonzero(~matched).tolist():
+        if weights[vertex].any():
+            neighbors = np.flatnonzero(weights[vertex] == weights[vertex].max())
+            leaders[vertex] = leaders[neighbors[np.argmin(colors[neighbors])]]
+        else:
+            isolated_leader = vertex if isolated_leader is None else isolated_leader
+            leaders[vertex] = isolated_leader
+    return np.unique(leaders, return_inverse=True)[1].reshape(len(multi_di_graph))
+
+
+def coarsen(multi_di_graph: np.array, coarse_vertices: np.array) -> np.array:
+    """Returns the multigraph of coarse vertices, multiplicities of the edges between their vertices summed (the
+    edges within a coarse vertex become its self-loops)."""
+    coarse_graph = np.zeros(shape=(coarse_vertices.max() + 1,) * 2, dtype=multi_di_graph.dtype)
+    starts, ends = np.nonzero(multi_di_graph)
+    np.add.at(coarse_graph, (coarse_vertices[starts], coarse_vertices[ends]), multi_di_graph[starts, ends])
+    return coarse_graph
+
+
+def get_coarsening_levels(multi_di_graph: np.array, coarsest_size: int) -> List[Tuple[np.array, np.array]]:
+    """Returns the levels of the multigraph from the finest one: (multigraph, coarse vertex of each of its
+    vertices in the next level), the coarsest one with None.
+
+    Multigraphs are coarsened by heavy edge matchings (see get_heavy_edge_coarse_vertices) until they have at
+    most coarsest_size vertices or a matching merges less than a tenth of them.
+    """
+    levels = []
+    while len(multi_di_graph) > coarsest_size:
+        coarse_vertices = get_heavy_edge_coarse_vertices(multi_di_graph)
+        if coarse_vertices.max() + 1 > 0.9 * len(multi_di_graph):
+            break
+        levels.append((multi_di_graph, coarse_vertices))
+        multi_di_graph = coarsen(multi_di_graph, coarse_vertices)
+    levels.append((multi_di_graph, None))
+    return levels
+
+
+class VertexMapRefinement:
+    """Vertex map of g1 to g2 improved by local moves, each increasing the number of multiedges common to g1 and g2
+    between the mapped vertices.
+
+    For every g1 vertex a few g2 vertices adjacent to the images of its mapped neighbors are tried (see
+    get_candidates): an unmapped one is taken, a mapped one is swapped with it (or taken from the other g1 vertex
+    if the vertex is not mapped). Only the multiedges of the moved vertices are counted, so a pass costs about
+    the sum of degrees.
+    """
+
+    def __init__(self, multi_di_graph1: np.array, multi_di_graph2: np.array, vertex_map: Dict[int, int]):
+        """Keyword arguments:
+        multi_di_graph1 -- adjacency matrix of g1
+        multi_di_graph2 -- adjacency matrix of g2
+        vertex_map -- initial map of g1 vertices to g2 vertices (changed in place)
+        """
+        self.g1_adjacency = get_weighted_adjacency(multi_di_graph1)
+        self.g2_adjacency = get_weighted_adjacency(multi_di_graph2)
+        self.g1_loops = np.diagonal(multi_di_graph1).tolist()
+        self.g2_loops = np.diagonal(multi_di_graph2).tolist()
+        self.vertex_map = vertex_map
+        self.inverse_map = dict((g2_vertex, g1_vertex) for g1_vertex, g2_vertex in vertex_map.items())
+
+    def get_common_edges(self, g1_vertex: int, g2_vertex: int, excluded: Optional[int] = None) -> int:
+        """Returns the number of multiedges common to g1 and g2 between g1_vertex (mapped to g2_vertex) and the
+        other mapped vertices (but excluded) or itself."""
+        common_edges = min(self.g1_loops[g1_vertex], self.g2_loops[g2_vertex])
+        for g1_neighbors, g2_neighbors in zip(self.g1_adjacency, self.g2_adjacency):
+            g2_vertex_neighbors = g2_neighbors[g2_vertex]
+            for other_vertex, multiplicity in g1_neighbors[g1_vertex].items():
+                if other_vertex != excluded and other_vertex in self.vertex_map:
+                    common_edges += min(multiplicity, g2_vertex_neighbors.get(self.vertex_map[other_vertex], 0))
+        return common_edges
+
+    def get_pair_common_edges(self, g1_vertex: int, other_g1_vertex: int, g2_vertex: int, other_g2_vertex: int) -> int:
+        """Returns the number of multiedges common to g1 and g2 between two g1 vertices mapped to two g2 vertices."""
+        return sum(min(g1_neighbors[g1_vertex].get(other_g1_vertex, 0), g2_neighbors[g2_vertex].get(other_g2_vertex, 0))
+                   for g1_neighbors, g2_neighbors in zip(self.g1_adjacency, self.g2_adjacency))
+
+    def get_gain(self, g1_vertex: int, g2_vertex: int) -> int:
+        """Returns the change of the number of common multiedges when g1_vertex is moved to g2_vertex."""
+        image = self.vertex_map.get(g1_vertex)
+        other_g1_vertex = self.inverse_map.get(g2_vertex)
+        if other_g1_vertex is None:
+            return self.get_common_edges(g1_vertex, g2_vertex) - \
+                (self.get_common_edges(g1_vertex, image) if image is not None else 0)
+        if image is None:
+            # g2_vertex is taken from other_g1_vertex
+            return self.get_common_edges(g1_vertex, g2_vertex, other_g1_vertex) - \
+                self.get_common_edges(other_g1_vertex, g2_vertex)
+        # images of g1_vertex and other_g1_vertex are swapped
+        return self.get_common_edges(g1_vertex, g2_vertex, other_g1_vertex) + \
+            self.get_common_edges(other_g1_vertex, image, g1_vertex) + \
+            self.get_pair_common_edges(g1_vertex, other_g1_vertex, g2_vertex, image) - \
+            self.get_common_edges(g1_vertex, image, other_g1_vertex) - \
+            self.get_common_edges(other_g1_vertex, g2_vertex, g1_vertex) - \
+            self.get_pair_common_edges(g1_vertex, other_g1_vertex, image, g2_vertex)
+
+    def move(self, g1_vertex: int, g2_vertex: int):
+        """Moves g1_vertex to g2_vertex (swapping images or taking g2_vertex like in get_gain)."""
+        image = self.vertex_map.get(g1_vertex)
+        other_g1_vertex = self.inverse_map.get(g2_vertex)
+        if image is not None:
+            del self.inverse_map[image]
+        if other_g1_vertex is not None:
+            del self.vertex_map[other_g1_vertex]
+            if image is not None:
+                self.vertex_map[other_g1_vertex] = image
+                self.inverse_map[image] = other_g1_vertex
+        self.vertex_map[g1_vertex] = g2_vertex
+        self.inverse_map[g2_vertex] = g1_vertex
+
+    def get_candidates(self, g1_vertex: int, count: int) -> List[int]:
+        """Returns up to count g2 vertices (but the image of g1_vertex) adjacent in the same direction to the
+        images of the most mapped neighbors of g1_vertex."""
+        g1_successors, g1_predecessors = self.g1_adjacency
+        g2_successors, g2_predecessors = self.g2_adjacency
+        marks = {}
+        # a successor of g1_vertex has to be mapped to a successor of the candidate and the other way round
+        for g1_neighbors, g2_neighbors in ((g1_successors, g2_predecessors), (g1_predecessors, g2_successors)):
+            for other_vertex in g1_neighbors[g1_vertex]:
+                if other_vertex in self.vertex_map:
+                    for candidate in g2_neighbors[self.vertex_map[other_vertex]]:
+                        marks[candidate] = marks.get(candidate, 0) + 1
+        marks.pop(self.vertex_map.get(g1_vertex), None)
+        return sorted(marks, key=lambda candidate: (-marks[candidate], candidate))[:count]
+
+    def refine(self, passes: int, candidates: int = 8) -> Dict[int, int]:
+        """Returns the vertex map after up to that many passes over all g1 vertices (the highest degree first),
+        each vertex moved to the one of its candidates (see get_candidates) with the largest positive gain."""
+        successors, predecessors = self.g1_adjacency
+        order = sorted(range(len(successors)), key=lambda vertex: -len(successors[vertex]) - len(predecessors[vertex]))
+        for _ in range(passes):
+            improved = False
+            for g1_vertex in order:
+                best_gain, best_vertex = 0, None
+                for g2_vertex in self.get_candidates(g1_vertex, candidates):
+                    gain = self.get_gain(g1_vertex, g2_vertex)
+                    if gain > best_gain:
+                        best_gain, best_vertex = gain, g2_vertex
+                if best_vertex is not None:
+                    self.move(g1_vertex, best_vertex)
+                    improved = True
+            if not improved:
+                break
+        return self.vertex_map
+
+
+def project_vertex_map(vertex_map: Dict[int, int], multi_di_graph1: np.array, multi_di_graph2: np.array,
+                       coarse_vertices1: np.array, coarse_vertices2: np.array) -> Dict[int, int]:
+    """Returns the vertex map of the finer level of g1 and g2 given by the map of their coarse vertices.
+
+    The vertices of two mapped coarse vertices are paired by color (see get_vertex_colors), in the order (or
+    either of them reversed) giving the most common multiedges between them; the vertices left over are not
+    mapped.
+    """
+    colors1, colors2 = get_vertex_colors([multi_di_graph1, multi_di_graph2])
+    members1 = [[] for _ in range(coarse_vertices1.max() + 1)]
+    members2 = [[] for _ in range(coarse_vertices2.max() + 1)]
+    for vertex in np.argsort(colors1, kind='stable').tolist():
+        members1[coarse_vertices1[vertex]].append(vertex)
+    for vertex in np.argsort(colors2, kind='stable').tolist():
+        members2[coarse_vertices2[vertex]].append(vertex)
+
+    def get_common_edges(pairs: List[Tuple[int, int]]) -> int:
+        g1_vertices, g2_vertices = [vertex for vertex, _ in pairs], [vertex for _, vertex in pairs]
+        return int(np.minimum(multi_di_graph1[np.ix_(g1_vertices, g1_vertices)],
+                              multi_di_graph2[np.ix_(g2_vertices, g2_vertices)]).sum())
+
+    fine_vertex_map = {}
+    for coarse_vertex1, coarse_vertex2 in vertex_map.items():
+        vertices1, vertices2 = members1[coarse_vertex1], members2[coarse_vertex2]
+        pairings = [list(zip(vertices1, vertices2)), list(zip(vertices1, vertices2[::-1])),
+                    list(zip(vertices1[::-1], vertices2))]
+        fine_vertex_map.update(max(pairings, key=get_common_edges))
+    return fine_vertex_map
+
+
+def multilevel_vertex_maps(multi_di_graph1: np.array, multi_di_graph2: np.array,
+                           get_score: Callable[[np.array, np.array], Callable[[FrozenSet[int]], Optional[tuple]]],
+                           coarsest_size: int = 8, maps: int = 4, passes: int = 4,
+                           stats: Optional[dict] = None) -> Set[FrozenSet[int]]:
+    """Returns the vertex maps of approximate maximum common subgraphs of two multigraphs found by multilevel
+    coarsening.
+
+    Both multigraphs are coarsened level by level (see get_coarsening_levels), common subgraphs of the coarsest
+    ones are grown from seed pairs of edges (see greedy_expansion_vertex_maps), then each of their best vertex
+    maps is projected to the finer levels (see project_vertex_map) and refined at every level (see
+    VertexMapRefinement). If none of the refined vertex maps keeps any common edge, the vertex maps grown on g1
+    and g2 themselves are returned, so there is a common subgraph whenever g1 and g2 have a common edge. No
+    product graph is built, so the time is close to linear in the number of edges. Vertex maps are returned as
+    the cliques of modular product of g1 and g2 (u * (g2 vertex count) + x), so they are scored like them (f.e.
+    by VertexMapScorer).
+
+    Keyword arguments:
+    multi_di_graph1 -- adjacency matrix of g1
+    multi_di_graph2 -- adjacency matrix of g2
+    get_score -- function returning the score of vertex maps of two multigraphs (f.e. VertexMapScorer), used
+                 to choose the best vertex maps of the coarsest ones and to check the refined ones
+    coarsest_size -- number of vertices below which the multigraphs are not coarsened
+    maps -- number of vertex maps of the coarsest multigraphs projected
+    passes -- maximal number of refinement passes at every level
+    stats -- dictionary filled with the number of 'levels'
+    """
+    levels1 = get_coarsening_levels(multi_di_graph1, coarsest_size)
+    levels2 = get_coarsening_levels(multi_di_graph2, coarsest_size)
+    # the multigraph with fewer levels is not coarsened in the last ones
+    levels_count = max(len(levels1), len(levels2))
+    for levels in (levels1, levels2):
+        coarsest, _ = levels.pop()
+        levels.extend([(coarsest, np.arange(len(coarsest)))] * (levels_count - 1 - len(levels)))
+        levels.append((coarsest, None))
+    if stats is not None:
+        stats['levels'] = levels_count
+
+    coarsest1, coarsest2 = levels1[-1][0], levels2[-1][0]
+    coarsest_score = get_score(coarsest1, coarsest2)
+    coarsest_maps = sorted(greedy_expansion_vertex_maps(coarsest1, coarsest2), key=sorted)
+    coarsest_maps.sort(key=lambda coarsest_map: coarsest_score(coarsest_map) or (0, 0), reverse=True)
+    vertex_maps = set()
+    for coarsest_map in coarsest_maps[:maps]:
+        vertex_map = dict(divmod(vertex, len(coarsest2)) for vertex in coarsest_map)
+        vertex_map = VertexMapRefinement(coarsest1, coarsest2, vertex_map).refine(passes)
+        for (graph1, coarse_vertices1), (graph2, coarse_vertices2) in zip(levels1[-2::-1], levels2[-2::-1]):
+            vertex_map = project_vertex_map(vertex_map, graph1, graph2, coarse_vertices1, coarse_vertices2)
+            vertex_map = VertexMapRefinement(graph1, graph2, vertex_map).refine(passes)
+        vertex_maps.add(frozenset(g1_vertex * len(multi_di_graph2) + g2_vertex
+                                  for g1_vertex, g2_vertex in vertex_map.items()))
+    # the common edges of coarse vertex maps can be lost by the projection (f.e. merged into self-loops)
+    score = get_score(multi_di_graph1, multi_di_graph2)
+    if all(score(vertex_map) is None for vertex_map in vertex_maps):
+        return greedy_expansion_vertex_maps(multi_di_graph1, multi_di_graph2)
+    return vertex_maps
@@ -1,20 +1,26 @@
 import math
 from time import perf_counter
+from typing import Dict, Optional
 
 import MultiDiGraph
 from maximum_subgraph import find_maximum_subgraphs
+from product_cache import ProductGraphCache
 
 
-def distance_l1(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
+def distance_l1(g1: MultiDiGraph, g2: MultiDiGraph, connected: bool = False,
+                vertex_map: Optional[Dict[int, int]] = None,
+                product_cache: Optional[ProductGraphCache] = None) -> (float, float):
     # Finding maximum subgraph
     t1 = perf_counter()
-    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2)
+    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, maximum_only=True, connected=connected,
+                                                  symmetry_breaking=True, vertex_map=vertex_map,
+                                                  product_cache=product_cache)
     t2 = perf_counter()
     maximum_subgraph_finding_time = t2 - t1
 
-    # Calculating the L1 norm of subgraph's size
-    subgraph_size_norm = (maximum_subgraphs[0]['multi_di_subgraph'].size[0] +
-                          maximum_subgraphs[0]['multi_di_subgraph'].size[1])
+    # Calculating the L1 norm of subgraph's size (no subgraphs when the graphs have no common edge)
+    subgraph_size = maximum_subgraphs[0].size if maximum_subgraphs else (0, 0)
+    subgraph_size_norm = subgraph_size[0] + subgraph_size[1]
 
     # Calculating the L1 norm of G1's size
     g1_size_norm = g1.size[0] + g1.size[1]
@@ -26,16 +32,32 @@ def distance_l1(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
     return distance, maximum_subgraph_finding_time
 
 
-def approx_distance_l1(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
+def approx_distance_l1(g1: MultiDiGraph, g2: MultiDiGraph, stats: Optional[dict] = None,
+                       connected: bool = False, vertex_map: Optional[Dict[int, int]] = None,
+                       product_cache: Optional[ProductGraphCache] = None,
+                       engine: str = 'edge_product') -> (float, float):
+    """Returns the approximation of L1 distance and the maximum subgraph finding time.
+
+    The approximation never underestimates the distance. If stats dictionary is given, it is filled with
+    the 'distance_interval' (lower bound, approximation) containing the exact distance and its width 'gap'
+    (0 means the approximation is exact). With connected, the maximum connected common subgraph is used, with
+    vertex_map the maximum one extending that partial vertex map (see find_maximum_subgraphs), with product_cache
+    the product is loaded from (or stored in) that on-disk cache. The subgraph is found by given engine of
+    find_maximum_subgraphs, f.e. 'multilevel' gives the approximation of large graphs in time close to linear in
+    the number of edges.
+    """
     # Finding maximum subgraph
+    maximum_subgraph_stats = {} if stats is not None else None
     t1 = perf_counter()
-    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, approximate=True)
+    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, approximate=True, stats=maximum_subgraph_stats,
+                                                  connected=connected, vertex_map=vertex_map,
+                                                  product_cache=product_cache, engine=engine)
     t2 = perf_counter()
     maximum_subgraph_finding_time = t2 - t1
 
-    # Calculating the L1 norm of subgraph's size
-    subgraph_size_norm = (maximum_subgraphs[0]['multi_di_subgraph'].size[0] +
-                          maximum_subgraphs[0]['multi_di_subgraph'].size[1])
+    # Calculating the L1 norm of subgraph's size (no subgraphs when the graphs have no common edge)
+    subgraph_size = maximum_subgraphs[0].size if maximum_subgraphs else (0, 0)
+    subgraph_size_norm = subgraph_size[0] + subgraph_size[1]
 
     # Calculating the L1 norm of G1's size
     g1_size_norm = g1.size[0] + g1.size[1]
@@ -44,20 +66,30 @@ def approx_distance_l1(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
 
     # Calculating the distance between G1 and G2
     distance = 1 - subgraph_size_norm / max(g1_size_norm, g2_size_norm)
+
+    if stats is not None:
+        # Calculating the distance for the upper bound on maximum subgraph's size
+        upper_bound = maximum_subgraph_stats['subgraph_size_upper_bound']
+        lower_bound_distance = 1 - (upper_bound[0] + upper_bound[1]) / max(g1_size_norm, g2_size_norm)
+        stats['distance_interval'] = (lower_bound_distance, distance)
+        stats['gap'] = distance - lower_bound_distance
     return distance, maximum_subgraph_finding_time
 
 
-def distance_l2(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
+def distance_l2(g1: MultiDiGraph, g2: MultiDiGraph, connected: bool = False,
+                vertex_map: Optional[Dict[int, int]] = None,
+                product_cache: Optional[ProductGraphCache] = None) -> (float, float):
     # Finding maximum subgraph
     t1 = perf_counter()
-    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2)
+    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, maximum_only=True, connected=connected,
+                                                  symmetry_breaking=True, vertex_map=vertex_map,
+                                                  product_cache=product_cache)
     t2 = perf_counter()
     maximum_subgraph_finding_time = t2 - t1
 
-    # Calculating the L2 norm of subgraph's size
-    subgraph_size_norm = math.sqrt(
-        maximum_subgraphs[0]['multi_di_subgraph'].size[0] * maximum_subgraphs[0]['multi_di_subgraph'].size[0] +
-        maximum_subgraphs[0]['multi_di_subgraph'].size[1] * maximum_subgraphs[0]['multi_di_subgraph'].size[1])
+    # Calculating the L2 norm of subgraph's size (no subgraphs when the graphs have no common edge)
+    subgraph_size = maximum_subgraphs[0].size if maximum_subgraphs else (0, 0)
+    subgraph_size_norm = math.sqrt(subgraph_size[0] * subgraph_size[0] + subgraph_size[1] * subgraph_size[1])
 
     # Calculating the L2 norm of G1's size
     g1_size_norm = math.sqrt(g1.size[0] * g1.size[0] + g1.size[1] * g1.size[1])
@@ -69,17 +101,32 @@ def distance_l2(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
     return distance, maximum_subgraph_finding_time
 
 
-def approx_distance_l2(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
+def approx_distance_l2(g1: MultiDiGraph, g2: MultiDiGraph, stats: Optional[dict] = None,
+                       connected: bool = False, vertex_map: Optional[Dict[int, int]] = None,
+                       product_cache: Optional[ProductGraphCache] = None,
+                       engine: str = 'edge_product') -> (float, float):
+    """Returns the approximation of L2 distance and the maximum subgraph finding time.
+
+    The approximation never underestimates the distance. If stats dictionary is given, it is filled with
+    the 'distance_interval' (lower bound, approximation) containing the exact distance and its width 'gap'
+    (0 means the approximation is exact). With connected, the maximum connected common subgraph is used, with
+    vertex_map the maximum one extending that partial vertex map (see find_maximum_subgraphs), with product_cache
+    the product is loaded from (or stored in) that on-disk cache. The subgraph is found by given engine of
+    find_maximum_subgraphs, f.e. 'multilevel' gives the approximation of large graphs in time close to linear in
+    the number of edges.
+    """
     # Finding maximum subgraph
+    maximum_subgraph_stats = {} if stats is not None else None
     t1 = perf_counter()
-    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, approximate=True)
+    _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, approximate=True, stats=maximum_subgraph_stats,
+                                                  connected=connected, vertex_map=vertex_map,
+                                                  product_cache=product_cache, engine=engine)
     t2 = perf_counter()
     maximum_subgraph_finding_time = t2 - t1
 
-    # Calculating the L2 norm of subgraph's size
-    subgraph_size_norm = math.sqrt(
-        maximum_subgraphs[0]['multi_di_subgraph'].size[0] * maximum_subgraphs[0]['multi_di_subgraph'].size[0] +
-        maximum_subgraphs[0]['multi_di_subgraph'].size[1] * maximum_subgraphs[0]['multi_di_subgraph'].size[1])
+    # Calculating the L2 norm of subgraph's size (no subgraphs when the graphs have no common edge)
+    subgraph_size = maximum_subgraphs[0].size if maximum_subgraphs else (0, 0)
+    subgraph_size_norm = math.sqrt(subgraph_size[0] * subgraph_size[0] + subgraph_size[1] * subgraph_size[1])
 
     # Calculating the L2 norm of G1's size
     g1_size_norm = math.sqrt(g1.size[0] * g1.size[0] + g1.size[1] * g1.size[1])
@@ -88,4 +135,12 @@ def approx_distance_l2(g1: MultiDiGraph, g2: MultiDiGraph) -> (float, float):
 
     # Calculating the distance between G1 and G2
     distance = 1 - subgraph_size_norm / max(g1_size_norm, g2_size_norm)
+
+    if stats is not None:
+        # Calculating the distance for the upper bound on maximum subgraph's size
+        upper_bound = maximum_subgraph_stats['subgraph_size_upper_bound']
+        lower_bound_distance = 1 - math.sqrt(upper_bound[0] * upper_bound[0] + upper_bound[1] * upper_bound[1]) / \
+            max(g1_size_norm, g2_size_norm)
+        stats['distance_interval'] = (lower_bound_distance, distance)
+        stats['gap'] = distance - lower_bound_distance
     return distance, maximum_subgraph_finding_time
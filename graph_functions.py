@@ -1,7 +1,16 @@
 import random
 import numpy as np
 from sys import exit
-from typing import FrozenSet, Set
+from typing import Callable, FrozenSet, List, Optional, Set, Tuple
+
+
+# Relations between edges e = (a, b) and f = (c, d) of a directed graph, encoded as bit flags
+EDGES_DISJOINT = 1  # e and f have no common vertices
+EDGES_REVERSED = 2  # a == d and b == c
+EDGES_SHARED_HEAD = 4  # b == d and a != c
+EDGES_SHARED_TAIL = 8  # a == c and b != d
+EDGES_HEAD_TO_TAIL = 16  # b == c and a != d
+EDGES_TAIL_TO_HEAD = 32  # a == d and b != c
 
 
 def print_submat(matrix: np.array, subset: FrozenSet[int]) -> None:
@@ -45,12 +54,107 @@ def read_graph_from_file(filename: str) -> np.array:
     return np.array(matrix)
 
 
+def read_labeled_graph_from_file(filename: str) -> Tuple[np.array, Optional[np.array], Optional[np.array]]:
+    """Returns the adjacency matrix, vertex labels and edge labels of the graph in the file (labels are None
+    if the file has no such section).
+
+    The matrix is followed by optional sections: a line 'vertex_labels' with the next line holding the label
+    of every vertex, and a line 'edge_labels' with the next n lines holding the matrix of labels of the edges
+    (compared only where the adjacency matrix has edges). Labels are any words without whitespace.
+    """
+    with open(filename, 'r') as f:
+        lines = [line.strip() for line in f.readlines()]
+
+    matrix = read_graph_from_file(filename)
+    vertex_labels = None
+    edge_labels = None
+    line_index = len(matrix) + 2
+    while line_index < len(lines):
+        if lines[line_index] == 'vertex_labels':
+            vertex_labels = np.array(lines[line_index + 1].split())
+            line_index += 2
+        elif lines[line_index] == 'edge_labels':
+            edge_labels = np.array([row.split() for row in lines[line_index + 1:line_index + 1 + len(matrix)]])
+            line_index += 1 + len(matrix)
+        else:
+            line_index += 1
+    return matrix, vertex_labels, edge_labels
+
+
+def write_graph_to_file(filename: str, matrix: np.array, vertex_labels: Optional[np.array] = None,
+                        edge_labels: Optional[np.array] = None) -> None:
+    """Writes the graph (with the labels given) in the format read by read_labeled_graph_from_file."""
+    lines = ['1', str(len(matrix))] + [' '.join(str(cell) for cell in row) for row in np.asarray(matrix).tolist()]
+    if vertex_labels is not None:
+        lines += ['vertex_labels', ' '.join(str(label) for label in np.asarray(vertex_labels).tolist())]
+    if edge_labels is not None:
+        lines += ['edge_labels'] + [' '.join(str(label) for label in row)
+                                    for row in np.asarray(edge_labels).tolist()]
+    with open(filename, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
 def is_symmetric(matrix: np.array) -> bool:
     """Check if given matrix is symmetric."""
     return (matrix.shape[0] == matrix.shape[1] and 
             np.all(np.abs(matrix - np.transpose(matrix)) == 0))
 
 
+def get_relation_codes(tails1: np.array, heads1: np.array, tails2: np.array, heads2: np.array) -> np.array:
+    """Returns relation codes (bitwise or of EDGES_* flags) of edges (tails1, heads1) and (tails2, heads2).
+
+    Arguments are broadcast against each other like in any NumPy operation.
+    """
+    tails_equal = tails1 == tails2
+    tail_equals_head = tails1 == heads2
+    head_equals_tail = heads1 == tails2
+    heads_equal = heads1 == heads2
+
+    codes = np.zeros(shape=np.broadcast(tails1, tails2).shape, dtype=np.uint8)
+    codes[~(tails_equal | tail_equals_head | head_equals_tail | heads_equal)] |= EDGES_DISJOINT
+    codes[tail_equals_head & head_equals_tail] |= EDGES_REVERSED
+    codes[heads_equal & ~tails_equal] |= EDGES_SHARED_HEAD
+    codes[tails_equal & ~heads_equal] |= EDGES_SHARED_TAIL
+    codes[head_equals_tail & ~tail_equals_head] |= EDGES_HEAD_TO_TAIL
+    codes[tail_equals_head & ~head_equals_tail] |= EDGES_TAIL_TO_HEAD
+    return codes
+
+
+def get_edge_pair_relation_codes(edges: np.array) -> np.array:
+    """Returns the matrix of relation codes for all pairs of edges of a directed graph.
+
+    Code at [i, j] is the bitwise or of EDGES_* flags satisfied by the edges i and j (only self-loops
+    can satisfy more than one), codes on the diagonal are 0. Pairs of edges (e1, f1) and (e2, f2) are
+    isomorphic exactly when their codes have a common flag.
+
+    Keyword arguments:
+    edges -- array of shape (edge count, 2) with the start and the end vertex of each edge
+    """
+    codes = get_relation_codes(edges[:, 0][:, None], edges[:, 1][:, None], edges[:, 0][None, :],
+                               edges[:, 1][None, :])
+    np.fill_diagonal(codes, 0)
+    return codes
+
+
+def get_edge_relation_codes(edges: np.array, edge: int) -> np.array:
+    """Returns the row of get_edge_pair_relation_codes matrix for given edge, without building the matrix."""
+    codes = get_relation_codes(edges[edge, 0], edges[edge, 1], edges[:, 0], edges[:, 1])
+    codes[edge] = 0
+    return codes
+
+
+def get_edge_endpoint_equalities(edges: np.array, edge: int) -> np.array:
+    """Returns which end vertices of given edge are equal to the end vertices of each edge.
+
+    Bits of the result are set when tails are equal (1), tail of the edge is the head of the other (2),
+    head of the edge is the tail of the other (4) and heads are equal (8). Two pairs of corresponding
+    edges map vertices one to one exactly when their equalities are the same.
+    """
+    tail, head = edges[edge]
+    return ((edges[:, 0] == tail) * 1 | (edges[:, 1] == tail) * 2 |
+            (edges[:, 0] == head) * 4 | (edges[:, 1] == head) * 8).astype(np.uint8)
+
+
 def get_neighbors(node: int, matrix: np.array) -> Set[int]:
     """Return set of neighbors for given node in graph defined by given matrix.
 
@@ -101,6 +205,191 @@ def bronKerbosch1(
     return cliques
 
 
+def bronKerbosch_pivot(
+        R: Set[int], P: Set[int], X: Set[int], neighbors: Callable[[int], Set[int]]) -> Set[FrozenSet[int]]:
+    """Recursive algorithm with pivoting for finding all maximal cliques in undirected graphs.
+
+    Only vertices which are not neighbors of the pivot (the vertex of P | X with the most neighbors
+    in P) are expanded, every maximal clique is still found exactly once.
+
+    Keyword arguments:
+        R -- required for recursive calls
+        P -- required for recursive calls (first call with set of all vertices of the
+                                           graph)
+        X -- required for recursive calls
+        neighbors -- function returning the set of neighbors of given vertex in the undirected graph
+    """
+    cliques = set()
+
+    if len(P) == 0 and len(X) == 0:
+        cliques.add(frozenset(R))
+        return cliques
+
+    pivot = max(P | X, key=lambda vertex: len(P & neighbors(vertex)))
+    for vertex in P - neighbors(pivot):
+        cliques = cliques | bronKerbosch_pivot(
+                R | set([vertex]), P & neighbors(vertex), X & neighbors(vertex), neighbors)
+        P = P - set([vertex])
+        X = X | set([vertex])
+
+    return cliques
+
+
+def bronKerbosch_bounded(
+        R: Set[int], P: Set[int], X: Set[int], neighbors: Callable[[int], Set[int]],
+        upper_bound: Callable[[Set[int]], tuple], lower_bound: tuple, stats: dict) -> Set[FrozenSet[int]]:
+    """Recursive Bron-Kerbosch variant skipping branches that cannot reach the lower bound.
+
+    Every maximal clique whose score is at least lower_bound is returned (some maximal cliques
+    with lower scores may be returned as well), so the bound can be taken from any clique
+    known in advance, f.e. found by an approximation.
+
+    Keyword arguments:
+        R -- required for recursive calls
+        P -- required for recursive calls (first call with set of all vertices of the
+                                           graph)
+        X -- required for recursive calls
+        neighbors -- function returning the set of neighbors of given vertex
+        upper_bound -- function returning an upper bound on the score of any clique within
+                       given set of vertices (scores are compared as tuples)
+        lower_bound -- score of already known clique
+        stats -- dictionary updated with the number of 'explored_branches' and
+                 'pruned_branches'
+    """
+    stats['explored_branches'] = stats.get('explored_branches', 0) + 1
+    stats.setdefault('pruned_branches', 0)
+
+    cliques = set()
+
+    if len(P) == 0 and len(X) == 0:
+        cliques.add(frozenset(R))
+
+    for vertex in P:
+        new_R = R | set([vertex])
+        new_P = P & neighbors(vertex)
+        if upper_bound(new_R | new_P) < lower_bound:
+            stats['pruned_branches'] += 1
+        else:
+            cliques = cliques | bronKerbosch_bounded(
+                    new_R, new_P, X & neighbors(vertex), neighbors, upper_bound, lower_bound, stats)
+        P = P - set([vertex])
+        X = X | set([vertex])
+
+    return cliques
+
+
+def bronKerbosch_maximum(
+        R: Set[int], P: Set[int], X: Set[int], neighbors: Callable[[int], Set[int]],
+        score: Callable[[FrozenSet[int]], Optional[tuple]], upper_bound: Callable[[Set[int]], tuple],
+        best: dict, stats: dict) -> None:
+    """Recursive Bron-Kerbosch variant (with pivoting) searching for the maximal cliques with the highest score.
+
+    The score of the best clique found so far is used as the lower bound, so the pruning gets stronger
+    as the search goes. Only branches which cannot reach it are pruned, all cliques tied for the best
+    score are kept.
+
+    Keyword arguments:
+        R -- required for recursive calls
+        P -- required for recursive calls (first call with set of all vertices of the
+                                           graph)
+        X -- required for recursive calls
+        neighbors -- function returning the set of neighbors of given vertex
+        score -- function returning the score of a maximal clique (None if the clique is not valid)
+        upper_bound -- function returning an upper bound on the score of any clique within
+                       given set of vertices (scores are compared as tuples)
+        best -- dictionary with the best 'score' so far (initially any known lower bound) and the
+                set of 'cliques' reaching it, updated in place
+        stats -- dictionary updated with the number of 'explored_branches' and
+                 'pruned_branches'
+    """
+    stats['explored_branches'] = stats.get('explored_branches', 0) + 1
+    stats.setdefault('pruned_branches', 0)
+
+    if len(P) == 0 and len(X) == 0:
+        clique = frozenset(R)
+        clique_score = score(clique)
+        if clique_score is None or clique_score < best['score']:
+            return
+        if clique_score > best['score']:
+            best['score'] = clique_score
+            best['cliques'] = set()
+        best['cliques'].add(clique)
+        return
+
+    pivot = max(P | X, key=lambda vertex: len(P & neighbors(vertex)))
+    for vertex in P - neighbors(pivot):
+        new_R = R | set([vertex])
+        new_P = P & neighbors(vertex)
+        if upper_bound(new_R | new_P) < best['score']:
+            stats['pruned_branches'] += 1
+        else:
+            bronKerbosch_maximum(new_R, new_P, X & neighbors(vertex), neighbors, score, upper_bound, best, stats)
+        P = P - set([vertex])
+        X = X | set([vertex])
+
+
+def bronKerbosch_connected(
+        R: Set[int], P: Set[int], D: Set[int], X: Set[int], Y: Set[int], neighbors: Callable[[int], Set[int]],
+        c_neighbors: Callable[[int], Set[int]]) -> Set[FrozenSet[int]]:
+    """Recursive Bron-Kerbosch variant finding maximal c-cliques (Koch), i.e. cliques whose vertices are
+    connected by c-edges (a subset of edges of the graph) within the clique.
+
+    The clique is only extended by the vertices joined to it by a c-edge, the other common neighbors wait
+    in D (and Y) until a c-neighbor of theirs joins the clique.
+
+    Keyword arguments:
+        R -- required for recursive calls
+        P -- required for recursive calls (common neighbors of R joined to R by a c-edge)
+        D -- required for recursive calls (common neighbors of R joined to R by no c-edge)
+        X -- required for recursive calls (excluded vertices which would be in P)
+        Y -- required for recursive calls (excluded vertices which would be in D)
+        neighbors -- function returning the set of neighbors of given vertex
+        c_neighbors -- function returning the set of neighbors of given vertex joined to it by a c-edge
+    """
+    cliques = set()
+
+    if len(P) == 0 and len(X) == 0:
+        cliques.add(frozenset(R))
+
+    for vertex in P:
+        vertex_neighbors = neighbors(vertex)
+        vertex_c_neighbors = c_neighbors(vertex)
+        new_D = D & vertex_neighbors
+        new_Y = Y & vertex_neighbors
+        cliques = cliques | bronKerbosch_connected(
+                R | set([vertex]), (P & vertex_neighbors) | (new_D & vertex_c_neighbors),
+                new_D - vertex_c_neighbors, (X & vertex_neighbors) | (new_Y & vertex_c_neighbors),
+                new_Y - vertex_c_neighbors, neighbors, c_neighbors)
+        P = P - set([vertex])
+        X = X | set([vertex])
+
+    return cliques
+
+
+def maximal_connected_cliques(vertices: Set[int], neighbors: Callable[[int], Set[int]],
+                              c_neighbors: Callable[[int], Set[int]]) -> Set[FrozenSet[int]]:
+    """Returns all maximal c-cliques of the graph (see bronKerbosch_connected).
+
+    Every c-clique is searched for from its first vertex, the vertices already used as the first one
+    are excluded.
+
+    Keyword arguments:
+        vertices -- set of vertices of the graph
+        neighbors -- function returning the set of neighbors of given vertex
+        c_neighbors -- function returning the set of neighbors of given vertex joined to it by a c-edge
+    """
+    cliques = set()
+    used = vertices - vertices
+    for vertex in vertices:
+        vertex_neighbors = neighbors(vertex)
+        vertex_c_neighbors = c_neighbors(vertex)
+        cliques = cliques | bronKerbosch_connected(
+                set([vertex]), vertex_c_neighbors - used, (vertex_neighbors - vertex_c_neighbors) - used,
+                vertex_c_neighbors & used, (vertex_neighbors - vertex_c_neighbors) & used, neighbors, c_neighbors)
+        used = used | set([vertex])
+    return cliques
+
+
 """
 def bronKerbosch2(matrix: np.array) -> None: #List[np.array]:
     if not is_symmetric(matrix):
@@ -174,6 +463,185 @@ def greedy_single_maximal_clique(adjacency_matrix: np.array, starting_node: int)
     return frozenset(clique)
 
 
+def greedy_coloring_number(adjacency_matrix: np.array) -> int:
+    """Returns the number of colors used by greedy coloring of an undirected graph.
+
+    Nodes are colored in the order of decreasing degree, each with the lowest color not used
+    by its neighbors. The result is an upper bound on the size of any clique in the graph.
+    """
+    adjacency = adjacency_matrix != 0
+    return greedy_coloring_number_from_neighbors(lambda node: np.flatnonzero(adjacency[node]),
+                                                 adjacency.sum(axis=1))
+
+
+def greedy_coloring_number_from_neighbors(neighbors: Callable[[int], np.array], degrees: np.array) -> int:
+    """Returns the number of colors used by greedy coloring of an undirected graph given by neighbors.
+
+    Keyword arguments:
+    neighbors -- function returning the array of neighbors of given node
+    degrees -- array with the number of neighbors of each node
+    """
+    colors = np.full(len(degrees), -1)
+    for node in np.argsort(-np.asarray(degrees), kind='stable'):
+        used_colors = set(colors[neighbors(node)].tolist())
+        color = 0
+        while color in used_colors:
+            color += 1
+        colors[node] = color
+    return int(colors.max()) + 1 if len(colors) > 0 else 0
+
+
+def greedy_coloring_weight_bound(nodes: Set[int], neighbors: Callable[[int], Set[int]], weights: np.array) -> int:
+    """Returns an upper bound on the weight of any clique within given nodes, from their greedy coloring.
+
+    Nodes are colored in the order of decreasing weight, each with the lowest color not used by its
+    neighbors. A clique has at most one node of each color, so the sum of the largest weight of every color
+    bounds its weight.
+
+    Keyword arguments:
+    nodes -- set of nodes
+    neighbors -- function returning the set of neighbors of given node
+    weights -- array with the weight of each node
+    """
+    color_classes = []
+    bound = 0
+    for node in sorted(nodes, key=lambda node: -weights[node]):
+        node_neighbors = neighbors(node)
+        for color_class in color_classes:
+            if not any(other_node in node_neighbors for other_node in color_class):
+                color_class.append(node)
+                break
+        else:
+            # the first node of a color has its largest weight
+            color_classes.append([node])
+            bound += int(weights[node])
+    return bound
+
+
+def degree_clique_bound(adjacency_matrix: np.array) -> int:
+    """Returns the largest k such that k nodes of an undirected graph have at least k - 1 neighbors.
+
+    Every node of a clique of size k has at least k - 1 neighbors, thus it is an upper bound on the
+    size of any clique in the graph.
+    """
+    return degree_clique_bound_from_degrees((adjacency_matrix != 0).sum(axis=1))
+
+
+def degree_clique_bound_from_degrees(degrees: np.array) -> int:
+    """Returns the degree bound on clique size (see degree_clique_bound) for given node degrees."""
+    degrees = np.sort(np.asarray(degrees))[::-1]
+    return int(np.sum(degrees >= np.arange(len(degrees))))
+
+
+def greedy_single_maximal_clique_from_neighbors(
+        neighbors: Callable[[int], Set[int]], nodes_count: int, starting_node: int) -> FrozenSet[int]:
+    """Returns a maximal clique containing the starting_node in the graph given by neighbors.
+
+    Works like greedy_single_maximal_clique, but without the adjacency matrix.
+    """
+    clique = set([starting_node])
+    candidates = set(neighbors(starting_node))
+    nodes = list(range(nodes_count))
+    random.shuffle(nodes)
+    for node in nodes:
+        if node in candidates:
+            clique.add(node)
+            candidates = candidates & neighbors(node)
+    return frozenset(clique)
+
+
+def greedy_single_maximal_connected_clique_from_neighbors(
+        neighbors: Callable[[int], Set[int]], c_neighbors: Callable[[int], Set[int]], nodes_count: int,
+        starting_node: int) -> FrozenSet[int]:
+    """Returns a maximal c-clique (see bronKerbosch_connected) containing the starting_node.
+
+    Works like greedy_single_maximal_clique_from_neighbors, but only adds the nodes joined to the clique
+    by a c-edge (passing over the nodes as long as any of them is added).
+    """
+    clique = set([starting_node])
+    candidates = set(neighbors(starting_node))
+    c_candidates = candidates & set(c_neighbors(starting_node))
+    nodes = list(range(nodes_count))
+    random.shuffle(nodes)
+    while c_candidates:
+        for node in nodes:
+            if node in c_candidates:
+                clique.add(node)
+                candidates = candidates & neighbors(node)
+                c_candidates = (c_candidates | c_neighbors(node)) & candidates
+    return frozenset(clique)
+
+
+def get_weakly_connected_components(adjacency_matrix: np.array) -> List[np.array]:
+    """Returns the sorted vertex arrays of weakly connected components of a (multi)graph having any edges
+    (isolated vertices without self-loops are left out)."""
+    adjacent = (adjacency_matrix != 0) | (adjacency_matrix.T != 0)
+    component_of = np.full(len(adjacency_matrix), -1)
+    components = []
+    for vertex in range(len(adjacency_matrix)):
+        if component_of[vertex] >= 0 or not adjacent[vertex].any():
+            continue
+        component_of[vertex] = len(components)
+        stack = [vertex]
+        while stack:
+            for neighbor in np.flatnonzero(adjacent[stack.pop()] & (component_of < 0)).tolist():
+                component_of[neighbor] = len(components)
+                stack.append(neighbor)
+        components.append(np.flatnonzero(component_of == len(components)))
+    return components
+
+
+def maximum_weight_assignment(weights: np.array) -> List[Tuple[int, int]]:
+    """Returns the (row, column) pairs of an assignment of rows to distinct columns with the largest total weight
+    (Hungarian algorithm, O(n^2 m) for n rows and m >= n columns, rows and columns are swapped otherwise).
+
+    Weights are handled as python integers, so they can be arbitrarily large. Every row is assigned, the pairs
+    of weight 0 can be dropped by the caller if they mean no match.
+    """
+    weights = np.asarray(weights)
+    if weights.shape[0] > weights.shape[1]:
+        return [(row, column) for column, row in maximum_weight_assignment(weights.T)]
+    rows_count, columns_count = weights.shape
+    costs = [[-int(weight) for weight in row] for row in weights.tolist()]
+    # potentials of rows (u) and columns (v), assigned row of each column (1-based, column 0 is a sentinel)
+    u = [0] * (rows_count + 1)
+    v = [0] * (columns_count + 1)
+    assigned_rows = [0] * (columns_count + 1)
+    previous_columns = [0] * (columns_count + 1)
+    for row in range(1, rows_count + 1):
+        assigned_rows[0] = row
+        column = 0
+        min_reduced_costs = [None] * (columns_count + 1)
+        used = [False] * (columns_count + 1)
+        while assigned_rows[column] != 0:
+            used[column] = True
+            current_row = assigned_rows[column]
+            delta, next_column = None, 0
+            for other_column in range(1, columns_count + 1):
+                if used[other_column]:
+                    continue
+                reduced_cost = costs[current_row - 1][other_column - 1] - u[current_row] - v[other_column]
+                if min_reduced_costs[other_column] is None or reduced_cost < min_reduced_costs[other_column]:
+                    min_reduced_costs[other_column] = reduced_cost
+                    previous_columns[other_column] = column
+                if delta is None or min_reduced_costs[other_column] < delta:
+                    delta, next_column = min_reduced_costs[other_column], other_column
+            for other_column in range(columns_count + 1):
+                if used[other_column]:
+                    u[assigned_rows[other_column]] += delta
+                    v[other_column] -= delta
+                else:
+                    min_reduced_costs[other_column] -= delta
+            column = next_column
+        # augment along the alternating path ending in the free column
+        while column != 0:
+            previous_column = previous_columns[column]
+            assigned_rows[column] = assigned_rows[previous_column]
+            column = previous_column
+    return sorted((assigned_rows[column] - 1, column - 1) for column in range(1, columns_count + 1)
+                  if assigned_rows[column] != 0)
+
+
 def print_clique_and_matrix(graph_matrix: np.array, clique: FrozenSet[int]) -> None:
     print(f"Vertex indices from original graph: {tuple(clique)}")
     print()
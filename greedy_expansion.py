@@ -0,0 +1,130 @@
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import numpy as np
+
+
+def get_adjacency_lists(multi_di_graph: np.array) -> Tuple[List[List[int]], List[List[int]]]:
+    """Returns the lists of successors and predecessors of every vertex (self-loops left out)."""
+    successors = [[] for _ in range(len(multi_di_graph))]
+    predecessors = [[] for _ in range(len(multi_di_graph))]
+    for start, end in zip(*np.nonzero(multi_di_graph)):
+        if start != end:
+            successors[start].append(int(end))
+            predecessors[end].append(int(start))
+    return successors, predecessors
+
+
+def get_edge_signatures(multi_di_graph: np.array, edges: np.array) -> np.array:
+    """Returns the signature of every edge: out and in degrees of its start and end vertex, its multiplicity
+    and whether it is a self-loop."""
+    out_degrees = np.count_nonzero(multi_di_graph, axis=1)
+    in_degrees = np.count_nonzero(multi_di_graph, axis=0)
+    starts, ends = edges[:, 0], edges[:, 1]
+    return np.column_stack([out_degrees[starts], in_degrees[starts], out_degrees[ends], in_degrees[ends],
+                            multi_di_graph[starts, ends], starts == ends])
+
+
+def get_seed_edge_pairs(multi_di_graph1: np.array, multi_di_graph2: np.array, seeds: int) \
+        -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Returns up to seeds anchor pairs of edges (g1 edge, g2 edge) to grow common subgraphs from.
+
+    The g1 edges with the highest degrees are taken, each with the g2 edge of the most similar signature
+    (see get_edge_signatures), so only seeds * (g2 edge count) signatures are compared. Self-loops are only
+    paired with self-loops, so the end vertices of every seed pair are mapped one to one.
+    """
+    edges1 = np.argwhere(multi_di_graph1)
+    edges2 = np.argwhere(multi_di_graph2)
+    if not len(edges1) or not len(edges2):
+        return []
+    signatures1 = get_edge_signatures(multi_di_graph1, edges1)
+    signatures2 = get_edge_signatures(multi_di_graph2, edges2)
+    # only the g1 edges of the kinds (self-loop or not) present in g2 can be seeds
+    candidate_edges = np.flatnonzero(np.isin(signatures1[:, 5], signatures2[:, 5]))
+    seed_edges = candidate_edges[np.argsort(-signatures1[candidate_edges, :4].sum(axis=1), kind='stable')[:seeds]]
+    seed_pairs = []
+    for g1_edge in seed_edges:
+        same_kind_edges = np.flatnonzero(signatures2[:, 5] == signatures1[g1_edge, 5])
+        distances = np.abs(signatures2[same_kind_edges] - signatures1[g1_edge]).sum(axis=1)
+        g2_edge = int(same_kind_edges[np.argmin(distances)])
+        seed_pairs.append((tuple(edges1[g1_edge].tolist()), tuple(edges2[g2_edge].tolist())))
+    return seed_pairs
+
+
+def get_common_edges_gain(g1_vertex: int, g2_vertex: int, vertex_map: Dict[int, int], multi_di_graph1: np.array,
+                          multi_di_graph2: np.array, g1_adjacency: Tuple[List[List[int]], List[List[int]]]) -> int:
+    """Returns the number of multiedges common to g1 and g2 between g1_vertex (mapped to g2_vertex) and
+    the mapped vertices."""
+    successors, predecessors = g1_adjacency
+    gain = 0
+    for other_vertex in successors[g1_vertex]:
+        if other_vertex in vertex_map:
+            gain += min(multi_di_graph1[g1_vertex, other_vertex], multi_di_graph2[g2_vertex, vertex_map[other_vertex]])
+    for other_vertex in predecessors[g1_vertex]:
+        if other_vertex in vertex_map:
+            gain += min(multi_di_graph1[other_vertex, g1_vertex], multi_di_graph2[vertex_map[other_vertex], g2_vertex])
+    return int(gain)
+
+
+def grow_vertex_map(seed_pair: Tuple[Tuple[int, int], Tuple[int, int]], multi_di_graph1: np.array,
+                    multi_di_graph2: np.array, g1_adjacency: Tuple[List[List[int]], List[List[int]]],
+                    g2_adjacency: Tuple[List[List[int]], List[List[int]]]) -> Dict[int, int]:
+    """Returns the vertex map grown outward from the seed pair of edges.
+
+    Vertices are visited breadth first, every unmapped neighbor of a mapped g1 vertex is mapped to the unmapped
+    neighbor (in the same direction) of its image giving the most common multiedges with the mapped vertices,
+    ties broken by the closest degree.
+    """
+    (g1_start, g1_end), (g2_start, g2_end) = seed_pair
+    vertex_map = {g1_start: g2_start, g1_end: g2_end}
+    mapped_g2_vertices = set(vertex_map.values())
+    g1_degrees = np.count_nonzero(multi_di_graph1, axis=0) + np.count_nonzero(multi_di_graph1, axis=1)
+    g2_degrees = np.count_nonzero(multi_di_graph2, axis=0) + np.count_nonzero(multi_di_graph2, axis=1)
+
+    queue = deque(vertex_map)
+    while queue:
+        g1_vertex = queue.popleft()
+        g2_vertex = vertex_map[g1_vertex]
+        for g1_neighbors, g2_neighbors in zip(g1_adjacency, g2_adjacency):
+            for g1_neighbor in g1_neighbors[g1_vertex]:
+                if g1_neighbor in vertex_map:
+                    continue
+                candidates = [g2_neighbor for g2_neighbor in g2_neighbors[g2_vertex]
+                              if g2_neighbor not in mapped_g2_vertices]
+                if not candidates:
+                    continue
+                g2_neighbor = max(candidates, key=lambda candidate: (
+                    get_common_edges_gain(g1_neighbor, candidate, vertex_map, multi_di_graph1, multi_di_graph2,
+                                          g1_adjacency),
+                    -abs(int(g1_degrees[g1_neighbor]) - int(g2_degrees[candidate]))))
+                vertex_map[g1_neighbor] = g2_neighbor
+                mapped_g2_vertices.add(g2_neighbor)
+                queue.append(g1_neighbor)
+    return vertex_map
+
+
+def greedy_expansion_vertex_maps(multi_di_graph1: np.array, multi_di_graph2: np.array, seeds: int = 8,
+                                 stats: Optional[dict] = None) -> Set[FrozenSet[int]]:
+    """Returns the vertex maps of approximate maximum common subgraphs of two multigraphs grown from seeds.
+
+    No product graph is built: every seed pair of edges (see get_seed_edge_pairs) is grown along the edges of
+    both graphs (see grow_vertex_map). Vertex maps are returned as the cliques of modular product of g1 and
+    g2 (u * (g2 vertex count) + x), so they are scored like them (f.e. by VertexMapScorer, with all the
+    edges common to both graphs between the mapped vertices).
+
+    Keyword arguments:
+    multi_di_graph1 -- adjacency matrix of g1
+    multi_di_graph2 -- adjacency matrix of g2
+    seeds -- number of seed pairs of edges
+    stats -- dictionary filled with the number of 'seeds' grown
+    """
+    g1_adjacency = get_adjacency_lists(multi_di_graph1)
+    g2_adjacency = get_adjacency_lists(multi_di_graph2)
+    vertex_maps = set()
+    seed_pairs = get_seed_edge_pairs(multi_di_graph1, multi_di_graph2, seeds)
+    for seed_pair in seed_pairs:
+        vertex_map = grow_vertex_map(seed_pair, multi_di_graph1, multi_di_graph2, g1_adjacency, g2_adjacency)
+        vertex_maps.add(frozenset(g1_vertex * len(multi_di_graph2) + g2_vertex
+                                  for g1_vertex, g2_vertex in vertex_map.items()))
+    if stats is not None:
+        stats['seeds'] = len(seed_pairs)
+    return vertex_maps
@@ -1,11 +1,15 @@
 import argparse
-from graph_functions import read_graph_from_file, print_clique_and_matrix, print_submat
+from multiprocessing import freeze_support
+from graph_functions import print_clique_and_matrix, print_submat
 from distance_functions import distance_l1, distance_l2, approx_distance_l1, approx_distance_l2
-from maximum_subgraph import find_maximum_subgraphs
+from maximum_subgraph import find_maximum_induced_subgraphs, find_maximum_subgraphs
+from product_cache import ProductGraphCache
 from sys import exit
 from MultiDiGraph import MultiDiGraph
 
 if __name__ == '__main__':
+    # worker processes (workers > 1) start the frozen executable again, freeze_support runs them instead of main
+    freeze_support()
 
     parser = argparse.ArgumentParser()
     parser.add_argument('-g1', '--graph1')
@@ -19,6 +23,19 @@ if __name__ == '__main__':
     parser.add_argument('-ad2', '--approx_distance_l2', action='store_true')
     parser.add_argument('-s', '--subgraph', action='store_true')
     parser.add_argument('-as', '--approx_subgraph', action='store_true')
+    parser.add_argument('-ws', '--warm_start', action='store_true')
+    parser.add_argument('-con', '--connected', action='store_true')
+    parser.add_argument('-w', '--weighted', action='store_true')
+    parser.add_argument('-sb', '--symmetry_breaking', action='store_true')
+    parser.add_argument('-wc', '--components', action='store_true')
+    parser.add_argument('-vm', '--vertex_map')
+    parser.add_argument('-pc', '--product_cache')
+    parser.add_argument('-e', '--engine', default='edge_product', choices=['edge_product', 'greedy_expansion',
+                                                                           'multilevel'])
+    parser.add_argument('-is', '--induced_subgraph', action='store_true')
+    parser.add_argument('-ais', '--approx_induced_subgraph', action='store_true')
+    parser.add_argument('-ie', '--induced_engine', default='modular_product',
+                        choices=['modular_product', 'mcsplit'])
 
     args = parser.parse_args()
 
@@ -26,7 +43,7 @@ if __name__ == '__main__':
     if args.graph1:
         # with open(str(sys.argv[1]), 'r') as f:
         print("MultiDiGraph 1:")
-        g1 = MultiDiGraph(read_graph_from_file(args.graph1))
+        g1 = MultiDiGraph.from_file(args.graph1)
         g1.print()
         graph = MultiDiGraph.get_graph_from_multigraph(g1.adjacency_matrix)
         undirected_graph = MultiDiGraph.get_undirected_graph_from_directed_graph(graph)
@@ -37,9 +54,14 @@ if __name__ == '__main__':
 
     if args.clique:
         print('\n ------------------------------- Maximum cliques for graph 1: -------------------------------')
-        cliques = g1.maximum_cliques()
+        search_stats = {}
+        cliques = g1.maximum_cliques(warm_start=args.warm_start, stats=search_stats)
         for c in cliques:
             print_clique_and_matrix(g1.adjacency_matrix, c)
+        if args.warm_start:
+            print(f"Warm start bound (nodes, edges): {search_stats['warm_start_bound']}, pruned "
+                  f"{search_stats['pruned_branches']} of "
+                  f"{search_stats['pruned_branches'] + search_stats['explored_branches']} branches")
         print(' -------------------------------  Maximal cliques for graph 1: ------------------------------- ')
         cliques = g1.maximal_cliques()
         for c in cliques:
@@ -47,50 +69,83 @@ if __name__ == '__main__':
 
     if args.approx_clique:
         print(' ------------------------------- Maximum clique(s) approximation for graph 1: -------------------------------')
-        cliques = g1.approx_maximum_cliques()
+        approx_stats = {}
+        cliques = g1.approx_maximum_cliques(stats=approx_stats)
         for c in cliques:
             print_clique_and_matrix(g1.adjacency_matrix, c)
+        print(f"Upper bound on maximum clique size: {approx_stats['upper_bound']} (gap: {approx_stats['gap']})")
 
     if args.graph2:
         print("MultiDiGraph 2:")
-        g2 = MultiDiGraph(read_graph_from_file(args.graph2))
+        g2 = MultiDiGraph.from_file(args.graph2)
         g2.print()
     else:
-        if args.distance_l1 or args.subgraph or args.approx_distance_l1 or args.approx_subgraph or args.distance_l2  or args.approx_distance_l2:
+        if args.distance_l1 or args.subgraph or args.approx_distance_l1 or args.approx_subgraph or args.distance_l2  or args.approx_distance_l2 \
+                or args.induced_subgraph or args.approx_induced_subgraph:
             print('No graph data file for 2nd graph given!')
         exit()
 
+    # vertex map given as comma separated pairs, f.e. 0:2,1:0 maps vertex 0 of graph 1 to vertex 2 of graph 2
+    vertex_map = dict(tuple(int(vertex) for vertex in pair.split(':'))
+                      for pair in args.vertex_map.split(',')) if args.vertex_map else None
+    product_cache = ProductGraphCache(args.product_cache) if args.product_cache else None
+
     if args.distance_l1:
         print(" ------------------------------- Distance (L1) between graph 1 and graph 2: -------------------------------")
-        distance, _ = distance_l1(g1, g2)
+        distance, _ = distance_l1(g1, g2, connected=args.connected, vertex_map=vertex_map,
+                                  product_cache=product_cache)
         # Limit distance to 3 significant digits
         distance = float(f"{distance:.3}")
         print(distance)
 
     if args.approx_distance_l1:
         print(" ------------------------------- Distance approximation (L1) between graph 1 and graph 2: -------------------------------")
-        distance, _ = approx_distance_l1(g1, g2)
+        approx_stats = {}
+        distance, _ = approx_distance_l1(g1, g2, stats=approx_stats, connected=args.connected,
+                                         vertex_map=vertex_map, product_cache=product_cache,
+                                         engine=args.engine)
         # Limit distance to 3 significant digits
         distance = float(f"{distance:.3}")
         print(distance)
+        lower_bound_distance = float(f"{approx_stats['distance_interval'][0]:.3}")
+        print(f"Exact distance lies in the interval [{lower_bound_distance}, {distance}]")
 
     if args.distance_l2:
         print(" ------------------------------- Distance (L2) between graph 1 and graph 2: -------------------------------")
-        distance, _ = distance_l2(g1, g2)
+        distance, _ = distance_l2(g1, g2, connected=args.connected, vertex_map=vertex_map,
+                                  product_cache=product_cache)
         # Limit distance to 3 significant digits
         distance = float(f"{distance:.3}")
         print(distance)
 
     if args.approx_distance_l2:
         print(" ------------------------------- Distance approximation (L2) between graph 1 and graph 2: -------------------------------")
-        distance, _ = approx_distance_l2(g1, g2)
+        approx_stats = {}
+        distance, _ = approx_distance_l2(g1, g2, stats=approx_stats, connected=args.connected,
+                                         vertex_map=vertex_map, product_cache=product_cache,
+                                         engine=args.engine)
         # Limit distance to 3 significant digits
         distance = float(f"{distance:.3}")
         print(distance)
+        lower_bound_distance = float(f"{approx_stats['distance_interval'][0]:.3}")
+        print(f"Exact distance lies in the interval [{lower_bound_distance}, {distance}]")
 
     if args.subgraph:
-        _, maximum_subgraphs = find_maximum_subgraphs(g1, g2)
+        search_stats = {}
+        _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, warm_start=args.warm_start, stats=search_stats,
+                                                      connected=args.connected, engine=args.engine,
+                                                      weighted=args.weighted,
+                                                      symmetry_breaking=args.symmetry_breaking,
+                                                      components=args.components, vertex_map=vertex_map,
+                                                      product_cache=product_cache)
         print(" ------------------------------- SUBGRAPHS -------------------------------")
+        # the engines other than edge_product, components and connected ignore the warm start
+        if args.warm_start and 'warm_start_bound' in search_stats:
+            print(f"Warm start bound (nodes, edges): {search_stats['warm_start_bound']}, pruned "
+                  f"{search_stats['pruned_branches']} of "
+                  f"{search_stats['pruned_branches'] + search_stats['explored_branches']} branches")
+        elif args.warm_start:
+            print("Warm start ignored by the options used")
         print(f"Number of maximum subgraphs for graph 1 and graph 2: {len(maximum_subgraphs)}, convention for mapping "
               f"vertices used: (subgraph_vertex_index, graph_1_vertex_index, graph_2_vertex_index) ")
 
@@ -109,7 +164,11 @@ if __name__ == '__main__':
             print(f"\nvertices map: {subgraph['printable_vertex_map']}\n")
 
     if args.approx_subgraph:
-        _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, approximate=True)
+        _, maximum_subgraphs = find_maximum_subgraphs(g1, g2, approximate=True, connected=args.connected,
+                                                      engine=args.engine, weighted=args.weighted,
+                                                      symmetry_breaking=args.symmetry_breaking,
+                                                      components=args.components, vertex_map=vertex_map,
+                                                      product_cache=product_cache)
         print(" ------------------------------- SUBGRAPHS APPROXIMATIONS -------------------------------")
         print(f"Number of maximum subgraphs approximations for graph 1 and graph 2: {len(maximum_subgraphs)}, "
               f"convention for mapping vertices used: (subgraph_vertex_index, graph_1_vertex_index, "
@@ -128,3 +187,34 @@ if __name__ == '__main__':
             # print(f"\nmultigraph 1 vertex set: {subgraph['graph_1_vertices']}")
             # print(f"multigraph 2 vertex set: {subgraph['graph_2_vertices']}")
             print(f"\nvertices map: {subgraph['printable_vertex_map']}\n")
+
+    if args.induced_subgraph or args.approx_induced_subgraph:
+        search_stats = {}
+        _, maximum_subgraphs = find_maximum_induced_subgraphs(g1, g2, engine=args.induced_engine,
+                                                              approximate=args.approx_induced_subgraph,
+                                                              warm_start=args.warm_start, stats=search_stats)
+        print(" ------------------------------- INDUCED SUBGRAPHS -------------------------------")
+        if args.approx_induced_subgraph and 'subgraph_size_upper_bound' in search_stats:
+            print(f"Upper bound on maximum induced subgraph size (nodes, edges): "
+                  f"{search_stats['subgraph_size_upper_bound']}")
+        # only the exact search of the modular product engine is warm started
+        elif args.warm_start and 'warm_start_bound' in search_stats:
+            print(f"Warm start bound (nodes, edges): {search_stats['warm_start_bound']}, pruned "
+                  f"{search_stats['pruned_branches']} of "
+                  f"{search_stats['pruned_branches'] + search_stats['explored_branches']} branches")
+        elif args.warm_start:
+            print("Warm start ignored by the options used")
+        print(f"Number of maximum induced subgraphs for graph 1 and graph 2: {len(maximum_subgraphs)}, convention "
+              f"for mapping vertices used: (subgraph_vertex_index, graph_1_vertex_index, graph_2_vertex_index) ")
+
+        for subgraph in maximum_subgraphs:
+            print(f"===== subgraph {maximum_subgraphs.index(subgraph) +1} / {len(maximum_subgraphs)} =====")
+            subgraph['multi_di_subgraph'].print()
+
+            print("\n multigraph 1: ")
+            print_submat(subgraph['graph_1_with_only_subgraph_edges'], subgraph['graph_1_vertices'])
+
+            print("\n multigraph 2: ")
+            print_submat(subgraph['graph_2_with_only_subgraph_edges'], subgraph['graph_2_vertices'])
+
+            print(f"\nvertices map: {subgraph['printable_vertex_map']}\n")
@@ -1,7 +1,23 @@
+from multiprocessing import Pool
 from time import perf_counter
 import numpy as np
 from MultiDiGraph import MultiDiGraph
-from typing import FrozenSet, Union, List, Tuple
+from coarsening import multilevel_vertex_maps
+from greedy_expansion import greedy_expansion_vertex_maps
+from mcsplit import mcsplit_vertex_maps
+from product_cache import ProductGraphCache
+from symmetry import get_orbits
+from graph_functions import (bronKerbosch_bounded, bronKerbosch_maximum, get_edge_pair_relation_codes,
+                             get_weakly_connected_components, maximum_weight_assignment,
+                             greedy_coloring_weight_bound,
+                             greedy_single_maximal_clique_from_neighbors,
+                             greedy_single_maximal_connected_clique_from_neighbors, maximal_connected_cliques)
+from product_graph import (BitsetEdgeGraphProduct, ConsistentEdgeGraphProduct, EdgeGraphProduct,
+                           ImplicitEdgeGraphProduct, IncrementalEdgeGraphProduct, MaskedEdgeGraphProduct,
+                           SparseEdgeGraphProduct, SymmetryBreakingEdgeGraphProduct, get_anchor_compatibility,
+                           get_connected_neighbors, get_label_compatibility, get_product_edges_count,
+                           get_product_rows_in_parallel, get_symmetry_breaking_images)
+from typing import Callable, Dict, FrozenSet, Iterable, Set, Union, List, Optional, Tuple
 
 
 def are_edge_pairs_isomorphic(e1: dict, f1: dict, e2: dict, f2: dict) -> bool:
@@ -67,31 +83,167 @@ def are_edge_pairs_isomorphic(e1: dict, f1: dict, e2: dict, f2: dict) -> bool:
     return False
 
 
-def get_edge_graph_product(g1_edges: List[dict], g2_edges: List[dict]) -> MultiDiGraph:
-    """Returns edge graph product based on the lists of edges of two graphs g1 and g2."""
-    g1_edges_count = len(g1_edges)
-    g2_edges_count = len(g2_edges)
-    vertices_count = int(g1_edges_count * g2_edges_count)
-    edge_graph_product = np.zeros(shape=(vertices_count, vertices_count))
+def get_edge_array(edges: List[dict]) -> np.array:
+    """Returns the array of shape (edge count, 2) with the start and the end vertex of each edge."""
+    return np.array([[edge['v0'], edge['vf']] for edge in edges], dtype=int).reshape(-1, 2)
 
-    for i in range(g1_edges_count):  # maybe not all needs to be checked? we have some repetitions? or not?
-        for j in range(g1_edges_count):
-            if i == j:
-                continue
 
-            for k in range(g2_edges_count):
-                for l in range(g2_edges_count):  # from k+1 ?
-                    if k == l:
-                        continue
+def get_edge_list(edge_array: np.array) -> List[dict]:
+    """Returns the list of edges (like MultiDiGraph.get_list_of_edges) of the array of get_edge_array."""
+    return [{'v0': start, 'vf': end} for start, end in edge_array.tolist()]
 
-                    v0 = i * g2_edges_count + k
-                    vf = j * g2_edges_count + l
 
-                    if edge_graph_product[v0][vf] != 1 or edge_graph_product[vf][v0] != 1:
-                        if are_edge_pairs_isomorphic(g1_edges[i], g1_edges[j], g2_edges[k], g2_edges[l]):
-                            edge_graph_product[v0][vf] = edge_graph_product[vf][v0] = 1  # epg is undirected
+def get_edge_graph_product(g1_edges: List[dict], g2_edges: List[dict], workers: int = 1) -> MultiDiGraph:
+    """Returns edge graph product based on the lists of edges of two graphs g1 and g2.
 
-    return MultiDiGraph(edge_graph_product, remove_isolated_vertices=False)
+    Vertex i * len(g2_edges) + k of the product corresponds to the pair of edges (g1_edges[i], g2_edges[k]).
+    Vertices (i, k) and (j, l) are connected if the pairs of edges g1_edges[i]-g1_edges[j] and
+    g2_edges[k]-g2_edges[l] are isomorphic (see are_edge_pairs_isomorphic), i.e. when their relation codes
+    have a common flag. With workers > 1, blocks of rows are built by that many processes.
+    """
+    g1_codes = get_edge_pair_relation_codes(get_edge_array(g1_edges))
+    g2_codes = get_edge_pair_relation_codes(get_edge_array(g2_edges))
+    vertices_count = int(len(g1_edges) * len(g2_edges))
+
+    if workers > 1:
+        edge_graph_product = get_product_rows_in_parallel(g1_codes, g2_codes, False, workers)
+        try:
+            # MultiDiGraph keeps its own (integer) copy of the matrix
+            return MultiDiGraph(edge_graph_product, remove_isolated_vertices=False)
+        finally:
+            edge_graph_product.shared_memory.unlink()
+    # [i, k, j, l] entry compares codes of pairs i-j and k-l
+    edge_graph_product = (g1_codes[:, None, :, None] & g2_codes[None, :, None, :]) != 0
+
+    return MultiDiGraph(edge_graph_product.reshape(vertices_count, vertices_count), remove_isolated_vertices=False)
+
+
+def get_sparse_edge_graph_product(g1_edges: List[dict], g2_edges: List[dict]) -> SparseEdgeGraphProduct:
+    """Returns edge graph product (see get_edge_graph_product) stored as sorted neighbor arrays."""
+    return SparseEdgeGraphProduct.from_relation_codes(get_edge_pair_relation_codes(get_edge_array(g1_edges)),
+                                                      get_edge_pair_relation_codes(get_edge_array(g2_edges)))
+
+
+def get_implicit_edge_graph_product(g1_edges: List[dict], g2_edges: List[dict],
+                                    cache_size: int = 4096) -> ImplicitEdgeGraphProduct:
+    """Returns edge graph product (see get_edge_graph_product) computing neighborhoods on demand."""
+    return ImplicitEdgeGraphProduct(get_edge_array(g1_edges), get_edge_array(g2_edges), cache_size)
+
+
+def get_bitset_edge_graph_product(g1_edges: List[dict], g2_edges: List[dict],
+                                  workers: int = 1) -> BitsetEdgeGraphProduct:
+    """Returns edge graph product (see get_edge_graph_product) stored as rows packed into 64-bit words."""
+    return BitsetEdgeGraphProduct.from_relation_codes(get_edge_pair_relation_codes(get_edge_array(g1_edges)),
+                                                      get_edge_pair_relation_codes(get_edge_array(g2_edges)),
+                                                      workers=workers)
+
+
+def get_symmetry_breaking_product(edge_graph_product: EdgeGraphProduct, multi_di_graph1: MultiDiGraph,
+                                  multi_di_graph2: MultiDiGraph, g1_edges: np.array, g2_edges: np.array,
+                                  cache_size: int = 4096) -> EdgeGraphProduct:
+    """Returns edge graph product restricted by symmetry breaking on the largest orbit of g1 or g2 vertices (see
+    SymmetryBreakingEdgeGraphProduct), the product itself if neither graph has any symmetry.
+
+    Keyword arguments:
+    edge_graph_product -- edge graph product of g1 and g2
+    multi_di_graph1 -- g1 (its automorphisms keep its labels)
+    multi_di_graph2 -- g2
+    g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+    g2_edges -- the same array for g2
+    cache_size -- maximal number of neighborhoods kept in memory
+    """
+    largest_orbit = None
+    for in_g1, multi_di_graph in ((True, multi_di_graph1), (False, multi_di_graph2)):
+        orbits = get_orbits(multi_di_graph.adjacency_matrix, multi_di_graph.vertex_labels,
+                            multi_di_graph.edge_labels)
+        orbit_sizes = np.bincount(orbits)
+        leader = int(np.argmax(orbit_sizes))
+        if orbit_sizes[leader] > 1 and (largest_orbit is None or orbit_sizes[leader] > largest_orbit[0]):
+            largest_orbit = (orbit_sizes[leader], in_g1, leader, np.flatnonzero(orbits == leader)[1:])
+    if largest_orbit is None:
+        return edge_graph_product
+
+    _, in_g1, leader, orbit = largest_orbit
+    if in_g1:
+        leader_images, orbit_images = get_symmetry_breaking_images(g1_edges, g2_edges, leader, orbit)
+    else:
+        leader_images, orbit_images = get_symmetry_breaking_images(g2_edges, g1_edges, leader, orbit)
+        leader_images, orbit_images = leader_images.T, orbit_images.T
+    return SymmetryBreakingEdgeGraphProduct(edge_graph_product, leader_images.ravel(), orbit_images.ravel(),
+                                            cache_size)
+
+
+def get_anchored_product(edge_graph_product: EdgeGraphProduct, g1_edges: np.array, g2_edges: np.array,
+                         vertex_map: Dict[int, int], graph_1_size: int, graph_2_size: int,
+                         cache_size: int = 4096) -> MaskedEdgeGraphProduct:
+    """Returns edge graph product restricted to the pairs of edges agreeing with the partial vertex map, the
+    pairs of edges between mapped vertices forced into every clique (see MaskedEdgeGraphProduct).
+
+    Keyword arguments:
+    edge_graph_product -- edge graph product of g1 and g2
+    g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+    g2_edges -- the same array for g2
+    vertex_map -- dictionary mapping g1 vertices to g2 vertices one to one
+    graph_1_size -- vertex count of g1
+    graph_2_size -- vertex count of g2
+    cache_size -- maximal number of neighborhoods kept in memory
+    """
+    g1_images = np.full(graph_1_size, -1)
+    g2_preimages = np.full(graph_2_size, -1)
+    for g1_vertex, g2_vertex in vertex_map.items():
+        g1_images[g1_vertex] = g2_vertex
+        g2_preimages[g2_vertex] = g1_vertex
+    mask = get_anchor_compatibility(g1_edges, g2_edges, g1_images, g2_preimages)
+    # a g1 edge between mapped vertices agrees only with the edge between their images
+    mapped_g1_edges = (g1_images[g1_edges[:, 0]] >= 0) & (g1_images[g1_edges[:, 1]] >= 0)
+    forced = np.flatnonzero(mask & np.repeat(mapped_g1_edges, len(g2_edges)))
+    all_vertices = edge_graph_product.all_vertices()
+    return MaskedEdgeGraphProduct(edge_graph_product, mask,
+                                  [vertex for vertex in forced.tolist() if vertex in all_vertices], cache_size)
+
+
+def get_edge_graph_product_in_storage(g1_edges: List[dict], g2_edges: List[dict], storage: str = 'auto',
+                                      cache_size: int = 4096, block_size: int = 1024,
+                                      memmap_directory: Optional[str] = None, workers: int = 1,
+                                      mask: Optional[np.array] = None) -> EdgeGraphProduct:
+    """Returns edge graph product of g1 and g2 in given storage.
+
+    Keyword arguments:
+    storage -- 'sparse' for sorted neighbor arrays (see get_sparse_edge_graph_product), 'bitset' for packed
+               rows (see get_bitset_edge_graph_product), 'implicit' for neighborhoods computed on demand
+               (see get_implicit_edge_graph_product), 'memmap' for packed rows in a memory-mapped temporary
+               file or 'auto' to choose the smaller of 'sparse' and 'bitset'
+    cache_size -- number of neighborhoods cached by 'implicit' storage
+    block_size -- number of rows built at once by 'bitset' and 'memmap' storages (bounds memory used while
+                  building)
+    memmap_directory -- directory of the file of 'memmap' storage (system temporary directory if None)
+    workers -- number of processes building the rows of 'bitset' storage
+    mask -- boolean array of the product vertices used (f.e. label compatible pairs of edges, see
+            get_label_compatibility); 'sparse' storage only computes and stores the edges between them,
+            the product has to be restricted to them by the caller (see MaskedEdgeGraphProduct)
+    """
+    if storage == 'implicit':
+        return get_implicit_edge_graph_product(g1_edges, g2_edges, cache_size)
+    if storage not in ('auto', 'sparse', 'bitset', 'memmap'):
+        raise ValueError(f'Unknown edge graph product storage: {storage}')
+
+    g1_codes = get_edge_pair_relation_codes(get_edge_array(g1_edges))
+    g2_codes = get_edge_pair_relation_codes(get_edge_array(g2_edges))
+    if storage == 'auto':
+        # sparse storage needs 32 bits per (directed) edge, bitset storage 1 bit per pair of vertices
+        vertices_count = len(g1_edges) * len(g2_edges)
+        edges_count = get_product_edges_count(g1_codes, g2_codes)
+        if mask is not None:
+            # the edges are assumed to be spread evenly between the vertices
+            edges_count *= np.count_nonzero(mask) ** 2 / max(vertices_count, 1) ** 2
+        dense = edges_count * 32 > vertices_count * vertices_count
+        storage = 'bitset' if dense else 'sparse'
+
+    if storage == 'memmap':
+        return BitsetEdgeGraphProduct.from_relation_codes_to_memmap(g1_codes, g2_codes, block_size, memmap_directory)
+    if storage == 'bitset':
+        return BitsetEdgeGraphProduct.from_relation_codes(g1_codes, g2_codes, block_size, workers)
+    return SparseEdgeGraphProduct.from_relation_codes(g1_codes, g2_codes, mask)
 
 
 def get_subgraph_edges(clique: FrozenSet[int], di_graph1_edges: List[dict], di_graph2_edges: List[dict]) -> List[dict]:
@@ -130,31 +282,25 @@ def get_matrix_from_edges(subgraph_edges_map: List[dict], graph_num: int) -> np.
         subgraph_vertices.append(edge[f'edge_g{graph_num}']['vf'])
 
     subgraph_vertices_count = len(set(subgraph_vertices))
-    sorted_subgraph_vertices = sorted(set(subgraph_vertices))
+    subgraph_vertex_indices = {vertex: index for index, vertex in enumerate(sorted(set(subgraph_vertices)))}
     matrix = np.zeros(shape=(subgraph_vertices_count, subgraph_vertices_count))
 
     for edge in subgraph_edges_map:
-        v0 = sorted_subgraph_vertices.index(edge[f'edge_g{graph_num}']['v0'])
-        vf = sorted_subgraph_vertices.index(edge[f'edge_g{graph_num}']['vf'])
+        v0 = subgraph_vertex_indices[edge[f'edge_g{graph_num}']['v0']]
+        vf = subgraph_vertex_indices[edge[f'edge_g{graph_num}']['vf']]
         matrix[v0][vf] = edge['count']
 
     return matrix
 
 
 def remove_duplicated(maximum_subgraphs: list) -> list:
+    """Returns the subgraphs without duplicates (same edges mapped with the same counts), keeping the order."""
     result = []
+    keys = set()
     for maximum_subgraph in maximum_subgraphs:
-        if len(result) == 0:
-            result.append(maximum_subgraph)
-            continue
-
-        duplicate = False
-        for res in result:
-            if res['multisubgraph_edge_map'] == maximum_subgraph['multisubgraph_edge_map']:
-                duplicate = True
-                continue
-
-        if not duplicate:
+        key = get_subgraph_key(maximum_subgraph['multisubgraph_edge_map'])
+        if key not in keys:
+            keys.add(key)
             result.append(maximum_subgraph)
 
     return result
@@ -170,7 +316,7 @@ def get_subgraph_vertices_map(subgraph_edges_map: list[dict], graph_num: int) ->
     second_graph_num = 2 if graph_num == 1 else 1
 
     subgraph_vertices_map = []
-    for subgraph_vertex in sorted_subgraph_vertices:
+    for subgraph_vertex_index, subgraph_vertex in enumerate(sorted_subgraph_vertices):
         second_graph_vertex = ""
 
         for edge in subgraph_edges_map:
@@ -182,7 +328,7 @@ def get_subgraph_vertices_map(subgraph_edges_map: list[dict], graph_num: int) ->
                 break
 
         subgraph_vertices_map.append({
-            'v_subgraph_index': sorted_subgraph_vertices.index(subgraph_vertex),
+            'v_subgraph_index': subgraph_vertex_index,
             f'v_graph_{graph_num}_index': subgraph_vertex,
             f'v_graph_{second_graph_num}_index': second_graph_vertex
         })
@@ -217,101 +363,898 @@ def get_multigraph_with_only_subgraph_edges(graph_size: int, edge_map: dict, gra
     return matrix
 
 
-def find_maximum_subgraphs(multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph, approximate: bool = False) \
-        -> Tuple[float, Union[List[np.array], None]]:
+class MaximumSubgraph:
+    """Maximum subgraph of two multigraphs, as returned by find_maximum_subgraphs.
+
+    Only the mapped edges are stored (one row of g1 start, g1 end, g2 start, g2 end and count per edge),
+    all the other fields are computed on first access. Fields can be read as attributes or, as before,
+    as dictionary items (f.e. subgraph['multi_di_subgraph']).
+    """
+
+    KEYS = ('multi_di_subgraph', 'multisubgraph_edge_map', 'multisubgraph_vertex_map', 'printable_vertex_map',
+            'graph_1_vertices', 'graph_2_vertices', 'graph_1_with_only_subgraph_edges',
+            'graph_2_with_only_subgraph_edges')
+    __slots__ = ('mapped_edges', 'graph_1_size', 'graph_2_size') + tuple('_' + key for key in KEYS)
+
+    def __init__(self, mapped_edges: np.array, graph_1_size: int, graph_2_size: int):
+        """Keyword arguments:
+        mapped_edges -- array of shape (edge count, 5) with rows (g1 start, g1 end, g2 start, g2 end, count)
+        graph_1_size -- number of vertices of m1
+        graph_2_size -- number of vertices of m2
+        """
+        self.mapped_edges = mapped_edges
+        self.graph_1_size = graph_1_size
+        self.graph_2_size = graph_2_size
+        for key in MaximumSubgraph.KEYS:
+            setattr(self, '_' + key, None)
+
+    def _get_field(self, key: str, compute: Callable[[], object]):
+        value = getattr(self, '_' + key)
+        if value is None:
+            value = compute()
+            setattr(self, '_' + key, value)
+        return value
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Returns the size (node count, edge count) of the multisubgraph without building it."""
+        return np.unique(self.mapped_edges[:, :2]).size, int(self.mapped_edges[:, 4].sum())
+
+    @property
+    def multisubgraph_edge_map(self) -> List[dict]:
+        return self._get_field('multisubgraph_edge_map', lambda: [
+            {'edge_g1': {'v0': v0_1, 'vf': vf_1}, 'edge_g2': {'v0': v0_2, 'vf': vf_2}, 'count': count}
+            for v0_1, vf_1, v0_2, vf_2, count in self.mapped_edges.tolist()])
+
+    @property
+    def multi_di_subgraph(self) -> MultiDiGraph:
+        return self._get_field('multi_di_subgraph', lambda: MultiDiGraph(
+            get_matrix_from_edges(self.multisubgraph_edge_map, 1)))
+
+    @property
+    def multisubgraph_vertex_map(self) -> List[dict]:
+        return self._get_field('multisubgraph_vertex_map', lambda: get_subgraph_vertices_map(
+            self.multisubgraph_edge_map, 1))
+
+    @property
+    def printable_vertex_map(self) -> List[list]:
+        return self._get_field('printable_vertex_map', lambda: get_printible_vertex_map(
+            self.multisubgraph_vertex_map))
+
+    @property
+    def graph_1_vertices(self) -> set:
+        return self._get_field('graph_1_vertices', lambda: get_graph_vertices(self.multisubgraph_edge_map, 1))
+
+    @property
+    def graph_2_vertices(self) -> set:
+        return self._get_field('graph_2_vertices', lambda: get_graph_vertices(self.multisubgraph_edge_map, 2))
+
+    @property
+    def graph_1_with_only_subgraph_edges(self) -> np.array:
+        return self._get_field('graph_1_with_only_subgraph_edges', lambda: get_multigraph_with_only_subgraph_edges(
+            self.graph_1_size, self.multisubgraph_edge_map, 1))
+
+    @property
+    def graph_2_with_only_subgraph_edges(self) -> np.array:
+        return self._get_field('graph_2_with_only_subgraph_edges', lambda: get_multigraph_with_only_subgraph_edges(
+            self.graph_2_size, self.multisubgraph_edge_map, 2))
+
+    def __getitem__(self, key: str):
+        if key not in MaximumSubgraph.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in MaximumSubgraph.KEYS
+
+    def __iter__(self):
+        return iter(MaximumSubgraph.KEYS)
+
+    def __len__(self) -> int:
+        return len(MaximumSubgraph.KEYS)
+
+    def keys(self) -> Tuple[str, ...]:
+        return MaximumSubgraph.KEYS
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+
+def get_product_vertex_weights(edges1: np.array, edges2: np.array, multi_di_graph1: np.array,
+                               multi_di_graph2: np.array) -> np.array:
+    """Returns the multiplicity of multisubgraph edge given by each edge product vertex (the smaller of the two)."""
+    return np.minimum.outer(multi_di_graph1[edges1[:, 0], edges1[:, 1]],
+                            multi_di_graph2[edges2[:, 0], edges2[:, 1]]).ravel()
+
+
+def get_subgraph_key(subgraph_edges_map: List[dict]) -> tuple:
+    """Returns the canonical (hashable) key of the subgraph: sorted tuple of mapped edges
+    (g1 start, g1 end, g2 start, g2 end, count)."""
+    return tuple(sorted((edge['edge_g1']['v0'], edge['edge_g1']['vf'], edge['edge_g2']['v0'], edge['edge_g2']['vf'],
+                         edge['count']) for edge in subgraph_edges_map))
+
+
+class CliqueScorer:
+    """Scores cliques of the edge graph product from index arrays, without building the subgraphs.
+
+    Called with a clique, returns the size of corresponding multisubgraph (None if the edges of the clique
+    do not map vertices of g1 to vertices of g2 one to one, f.e. for triangular and y subgraphs). Edges of
+    a clique are distinct in g1 and in g2, so both subgraphs have as many edges as the clique has vertices.
+    """
+
+    def __init__(self, di_graph1_edges: List[dict], di_graph2_edges: List[dict], multi_di_graph1: np.array,
+                 multi_di_graph2: np.array):
+        self.edges1 = get_edge_array(di_graph1_edges)
+        self.edges2 = get_edge_array(di_graph2_edges)
+        self.weights = get_product_vertex_weights(self.edges1, self.edges2, multi_di_graph1, multi_di_graph2)
+        # pairs of corresponding vertices are encoded as g1 vertex * g2_vertices_count + g2 vertex
+        self.g2_vertices_count = int(self.edges2.max()) + 1 if len(self.edges2) else 1
+
+    def __call__(self, clique: FrozenSet[int]) -> Union[Tuple[int, int], None]:
+        indices = np.fromiter(clique, dtype=int, count=len(clique))
+        g1_indices, g2_indices = np.divmod(indices, len(self.edges2))
+        g1_vertices = self.edges1[g1_indices].ravel()
+        g2_vertices = self.edges2[g2_indices].ravel()
+        nodes = np.unique(g1_vertices).size
+        if nodes != np.unique(g2_vertices).size or \
+                nodes != np.unique(g1_vertices * self.g2_vertices_count + g2_vertices).size:
+            return None
+        return nodes, int(self.weights[indices].sum())
+
+    def mapped_edges(self, clique: FrozenSet[int]) -> np.array:
+        """Returns the edges of multisubgraph of the clique as rows (g1 start, g1 end, g2 start, g2 end, count)."""
+        indices = np.fromiter(clique, dtype=int, count=len(clique))
+        g1_indices, g2_indices = np.divmod(indices, len(self.edges2))
+        return np.column_stack([self.edges1[g1_indices], self.edges2[g2_indices], self.weights[indices]])
+
+    def key(self, clique: FrozenSet[int]) -> tuple:
+        """Returns the key of multisubgraph of the clique (equal to get_subgraph_key of its edge map)."""
+        return tuple(sorted(map(tuple, self.mapped_edges(clique).tolist())))
+
+
+class WeightedCliqueScorer(CliqueScorer):
+    """Scores cliques of the edge graph product like CliqueScorer, with the multisubgraph size given as
+    (edge count, node count), so the subgraphs with the most multiedges come first."""
+
+    def __call__(self, clique: FrozenSet[int]) -> Union[Tuple[int, int], None]:
+        size = super().__call__(clique)
+        return None if size is None else (size[1], size[0])
+
+
+class VertexMapScorer:
+    """Scores cliques of the modular product of g1 and g2 (see get_modular_product_rows), i.e. the vertex maps.
+
+    Called with a clique, returns the size of multisubgraph made of the edges present in both graphs between
+    the mapped vertices (None if there is no such edge or the vertices are not mapped one to one). Methods
+    mapped_edges and key work like the ones of CliqueScorer.
+    """
+
+    def __init__(self, multi_di_graph1: np.array, multi_di_graph2: np.array):
+        self.multi_di_graph1 = multi_di_graph1
+        self.multi_di_graph2 = multi_di_graph2
+
+    def _get_common_edges(self, clique: FrozenSet[int]) -> Tuple[np.array, np.array, np.array]:
+        """Returns the mapped vertices of g1 and g2 and the matrix of multiplicities of common edges between them."""
+        indices = np.fromiter(clique, dtype=int, count=len(clique))
+        g1_vertices, g2_vertices = np.divmod(indices, len(self.multi_di_graph2))
+        counts = np.minimum(self.multi_di_graph1[np.ix_(g1_vertices, g1_vertices)],
+                            self.multi_di_graph2[np.ix_(g2_vertices, g2_vertices)])
+        return g1_vertices, g2_vertices, counts
+
+    def __call__(self, clique: FrozenSet[int]) -> Union[Tuple[int, int], None]:
+        g1_vertices, g2_vertices, counts = self._get_common_edges(clique)
+        # the cliques of modular product always map vertices one to one, other vertex maps may not
+        if np.unique(g1_vertices).size != g1_vertices.size or np.unique(g2_vertices).size != g2_vertices.size:
+            return None
+        if not counts.any():
+            return None
+        return int(np.count_nonzero(counts.any(axis=0) | counts.any(axis=1))), int(counts.sum())
+
+    def mapped_edges(self, clique: FrozenSet[int]) -> np.array:
+        """Returns the edges of multisubgraph of the clique as rows (g1 start, g1 end, g2 start, g2 end, count)."""
+        g1_vertices, g2_vertices, counts = self._get_common_edges(clique)
+        starts, ends = np.nonzero(counts)
+        return np.column_stack([g1_vertices[starts], g1_vertices[ends], g2_vertices[starts], g2_vertices[ends],
+                                counts[starts, ends]])
+
+    def key(self, clique: FrozenSet[int]) -> tuple:
+        """Returns the key of multisubgraph of the clique (equal to get_subgraph_key of its edge map)."""
+        return tuple(sorted(map(tuple, self.mapped_edges(clique).tolist())))
+
+
+def get_vertex_map_score_upper_bound(multi_di_graph1: np.array, multi_di_graph2: np.array) \
+        -> Callable[[Set[int]], Tuple[int, int]]:
+    """Returns a function bounding the size of multisubgraph of any clique within given modular product vertices.
+
+    Node count is bounded by the number of distinct g1 (and g2) vertices of the pairs, edge count by the
+    multiplicities of all edges between them.
+    """
+    def upper_bound(vertices: Set[int]) -> Tuple[int, int]:
+        indices = np.fromiter(vertices, dtype=int, count=len(vertices))
+        g1_indices, g2_indices = np.divmod(indices, len(multi_di_graph2))
+        g1_vertices = np.unique(g1_indices)
+        g2_vertices = np.unique(g2_indices)
+        return min(g1_vertices.size, g2_vertices.size), \
+            int(min(multi_di_graph1[np.ix_(g1_vertices, g1_vertices)].sum(),
+                    multi_di_graph2[np.ix_(g2_vertices, g2_vertices)].sum()))
+
+    return upper_bound
+
+
+def get_weighted_clique_score_upper_bound(edge_graph_product: EdgeGraphProduct, di_graph1_edges: List[dict],
+                                          di_graph2_edges: List[dict], multi_di_graph1: np.array,
+                                          multi_di_graph2: np.array) -> Callable[[Set[int]], Tuple[int, int]]:
+    """Returns a function bounding the (edge count, node count) size of multisubgraph of any clique within given
+    edge product vertices (see WeightedCliqueScorer).
+
+    Edge count is bounded by the greedy coloring of the vertices weighted by the multiplicities they would
+    contribute (see greedy_coloring_weight_bound), node count like in get_clique_score_upper_bound.
+    """
+    weights = get_product_vertex_weights(get_edge_array(di_graph1_edges), get_edge_array(di_graph2_edges),
+                                         multi_di_graph1, multi_di_graph2)
+    clique_score_upper_bound = get_clique_score_upper_bound(di_graph1_edges, di_graph2_edges, multi_di_graph1,
+                                                            multi_di_graph2)
+
+    def upper_bound(vertices: Set[int]) -> Tuple[int, int]:
+        nodes, _ = clique_score_upper_bound(vertices)
+        return greedy_coloring_weight_bound(vertices, edge_graph_product.neighbors, weights), nodes
+
+    return upper_bound
+
+
+def get_clique_score_upper_bound(di_graph1_edges: List[dict], di_graph2_edges: List[dict],
+                                 multi_di_graph1: np.array, multi_di_graph2: np.array) \
+        -> Callable[[Set[int]], Tuple[int, int]]:
+    """Returns a function bounding the size of multisubgraph of any clique within given edge product vertices.
+
+    Node count is bounded by the number of distinct end vertices of the edges in g1 (and g2), edge count by
+    the sum of multiplicities the product vertices would contribute.
+    """
+    edges1 = get_edge_array(di_graph1_edges)
+    edges2 = get_edge_array(di_graph2_edges)
+    weights = get_product_vertex_weights(edges1, edges2, multi_di_graph1, multi_di_graph2)
+
+    def upper_bound(vertices: Set[int]) -> Tuple[int, int]:
+        indices = np.fromiter(vertices, dtype=int, count=len(vertices))
+        g1_indices, g2_indices = np.divmod(indices, len(edges2))
+        nodes = min(np.unique(edges1[g1_indices]).size, np.unique(edges2[g2_indices]).size)
+        return nodes, int(weights[indices].sum())
+
+    return upper_bound
+
+
+def get_subgraph_size_upper_bound(edge_graph_product: EdgeGraphProduct, di_graph1_edges: List[dict],
+                                  di_graph2_edges: List[dict], multi_di_graph1: MultiDiGraph,
+                                  multi_di_graph2: MultiDiGraph) -> Tuple[int, int]:
+    """Returns an upper bound on the size (node count, edge count) of maximum subgraph of m1 and m2.
+
+    The edge count of a subgraph in g1/g2 is bounded by the greedy coloring number and the degree bound
+    of the edge graph product, node count by twice that and the node counts of both multigraphs.
+    """
+    clique_bound = edge_graph_product.clique_upper_bound()
+
+    # every edge of g1 and g2 is used at most once, so the largest multiplicities give the bound
+    multiplicities1 = np.sort([multi_di_graph1.adjacency_matrix[edge['v0']][edge['vf']]
+                               for edge in di_graph1_edges])[::-1]
+    multiplicities2 = np.sort([multi_di_graph2.adjacency_matrix[edge['v0']][edge['vf']]
+                               for edge in di_graph2_edges])[::-1]
+    edges = min(int(multiplicities1[:clique_bound].sum()), int(multiplicities2[:clique_bound].sum()))
+    nodes = min(multi_di_graph1.size[0], multi_di_graph2.size[0], 2 * clique_bound)
+    return nodes, edges
+
+
+def get_approx_subgraph_size(edge_graph_product: EdgeGraphProduct, di_graph1_edges: List[dict],
+                              di_graph2_edges: List[dict], multi_di_graph1: np.array,
+                              multi_di_graph2: np.array) -> Tuple[int, int]:
+    """Returns the size of the largest multisubgraph among approximated cliques ((0, 0) if there is none)."""
+    clique_score = CliqueScorer(di_graph1_edges, di_graph2_edges, multi_di_graph1, multi_di_graph2)
+    scores = [clique_score(clique) for clique in edge_graph_product.approx_maximal_cliques()]
+    return max((score for score in scores if score is not None), default=(0, 0))
+
+
+def warm_started_maximal_cliques(edge_graph_product: EdgeGraphProduct, di_graph1_edges: List[dict],
+                                 di_graph2_edges: List[dict], multi_di_graph1: np.array, multi_di_graph2: np.array,
+                                 stats: dict) -> Set[FrozenSet[int]]:
+    """Returns maximal cliques of the edge graph product that can compete with the approximated subgraph.
+
+    The best (nodes, edges) score among approximated cliques is used as the initial lower bound, so every
+    branch of the search which cannot reach it is pruned.
+    """
+    lower_bound = get_approx_subgraph_size(edge_graph_product, di_graph1_edges, di_graph2_edges,
+                                           multi_di_graph1, multi_di_graph2)
+    stats['warm_start_bound'] = lower_bound
+
+    upper_bound = get_clique_score_upper_bound(di_graph1_edges, di_graph2_edges, multi_di_graph1, multi_di_graph2)
+    return bronKerbosch_bounded(set(), edge_graph_product.all_vertices(), edge_graph_product.vertex_set(),
+                                edge_graph_product.neighbors, upper_bound, lower_bound, stats)
+
+
+def maximum_score_cliques(edge_graph_product: EdgeGraphProduct, di_graph1_edges: List[dict],
+                          di_graph2_edges: List[dict], multi_di_graph1: np.array, multi_di_graph2: np.array,
+                          lower_bound: Tuple[int, int], stats: dict) -> Set[FrozenSet[int]]:
+    """Returns the maximal cliques of the edge graph product whose multisubgraphs have the largest size.
+
+    Branch and bound search: the size of the best subgraph found so far (initially lower_bound) is the
+    bound, every branch whose candidate vertices cannot give a subgraph as large is skipped.
+    """
+    best = {'score': lower_bound, 'cliques': set()}
+    bronKerbosch_maximum(
+        set(), edge_graph_product.all_vertices(), edge_graph_product.vertex_set(), edge_graph_product.neighbors,
+        CliqueScorer(di_graph1_edges, di_graph2_edges, multi_di_graph1, multi_di_graph2),
+        get_clique_score_upper_bound(di_graph1_edges, di_graph2_edges, multi_di_graph1, multi_di_graph2),
+        best, stats)
+    stats['maximum_score'] = best['score']
+    return best['cliques']
+
+
+def maximum_weight_cliques(edge_graph_product: EdgeGraphProduct, di_graph1_edges: List[dict],
+                           di_graph2_edges: List[dict], multi_di_graph1: np.array, multi_di_graph2: np.array,
+                           lower_bound: Tuple[int, int], stats: dict) -> Set[FrozenSet[int]]:
+    """Returns the maximal cliques of the edge graph product whose multisubgraphs have the most multiedges
+    (the most nodes among them).
+
+    Maximum weight clique search, product vertices weighted by min(g1 multiplicity, g2 multiplicity): like
+    maximum_score_cliques, but with the weighted size (see WeightedCliqueScorer) and its coloring bound.
+    """
+    best = {'score': lower_bound, 'cliques': set()}
+    bronKerbosch_maximum(
+        set(), edge_graph_product.all_vertices(), edge_graph_product.vertex_set(), edge_graph_product.neighbors,
+        WeightedCliqueScorer(di_graph1_edges, di_graph2_edges, multi_di_graph1, multi_di_graph2),
+        get_weighted_clique_score_upper_bound(edge_graph_product, di_graph1_edges, di_graph2_edges, multi_di_graph1,
+                                              multi_di_graph2),
+        best, stats)
+    stats['maximum_score'] = best['score']
+    return best['cliques']
+
+
+def connected_maximal_cliques(edge_graph_product: EdgeGraphProduct, g1_edges: np.array, g2_edges: np.array,
+                              approximate: bool = False, cache_size: int = 4096) -> Set[FrozenSet[int]]:
+    """Returns maximal c-cliques of edge graph product, i.e. the ones corresponding to connected subgraphs.
+
+    Keyword arguments:
+    edge_graph_product -- edge graph product of g1 and g2
+    g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+    g2_edges -- the same array for g2
+    approximate -- if True, only one greedy c-clique per vertex is found
+    cache_size -- maximal number of c-neighborhoods kept in memory
+    """
+    c_neighbors = get_connected_neighbors(edge_graph_product, g1_edges, g2_edges, cache_size)
+    vertices = edge_graph_product.all_vertices()
+    if approximate:
+        return set(greedy_single_maximal_connected_clique_from_neighbors(
+            edge_graph_product.neighbors, c_neighbors, edge_graph_product.vertices_count, vertex)
+                   for vertex in vertices)
+    return maximal_connected_cliques(vertices, edge_graph_product.neighbors, c_neighbors)
+
+
+def get_multiplicity_upper_bound(multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph) -> Tuple[int, int]:
+    """Returns the upper bound on the size of common subgraphs of two multigraphs which needs no product graph:
+    the smaller vertex count, and the sum of the pairwise smaller multiplicities of both graphs' edges sorted
+    by decreasing multiplicity."""
+    multiplicities1 = np.sort(multi_di_graph1.adjacency_matrix[multi_di_graph1.adjacency_matrix > 0])[::-1]
+    multiplicities2 = np.sort(multi_di_graph2.adjacency_matrix[multi_di_graph2.adjacency_matrix > 0])[::-1]
+    edges_count = min(len(multiplicities1), len(multiplicities2))
+    return (min(multi_di_graph1.size[0], multi_di_graph2.size[0]),
+            int(np.minimum(multiplicities1[:edges_count], multiplicities2[:edges_count]).sum()))
+
+
+def get_maximum_subgraphs(cliques: Iterable[FrozenSet[int]], clique_score: Union[CliqueScorer, VertexMapScorer],
+                          graph_1_size: int, graph_2_size: int) -> List[MaximumSubgraph]:
+    """Returns the subgraphs of the cliques with the largest size (see MaximumSubgraph), without duplicates.
+
+    Cliques scored (0, 0) (empty ones, or with all their pairs of edges left out by the scorer, e.g. loops mapped
+    to non-loop edges) give no subgraph, so the list is empty if no clique has a common edge. The scores count
+    the multiplicities of g1 and g2 edges at the indices of the edges the cliques were found for, so these have
+    to be the edges of the scored multigraphs, isolated vertices included (see find_maximum_subgraphs).
+
+    Keyword arguments:
+    cliques -- cliques of the product graph
+    clique_score -- scorer of the cliques of the product graph (CliqueScorer or VertexMapScorer)
+    graph_1_size -- vertex count of g1
+    graph_2_size -- vertex count of g2
+    """
+    # score all cliques (from index arrays), keeping only the ones with the largest subgraphs
+    maximum_cliques = []
+    maximum_keys = set()
+    max_size = (0, 0)
+    for clique in cliques:
+        size = clique_score(clique)
+        # for triangular and y subgraphs, the empty ones or smaller ones
+        if size is None or size == (0, 0) or size < max_size:
+            continue
+        if size > max_size:
+            maximum_cliques.clear()
+            maximum_keys.clear()
+            max_size = size
+        key = clique_score.key(clique)
+        if key in maximum_keys:  # the subgraph is a duplicate
+            continue
+        maximum_keys.add(key)
+        maximum_cliques.append(clique)
+
+    # only the mapped edges of the maximum cliques are kept, the subgraphs are built on demand
+    return [MaximumSubgraph(clique_score.mapped_edges(clique), graph_1_size, graph_2_size)
+            for clique in maximum_cliques]
+
+
+def modular_product_maximum_cliques(multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph,
+                                    approximate: bool = False, warm_start: bool = False,
+                                    stats: Optional[dict] = None) -> Set[FrozenSet[int]]:
+    """Returns the cliques of modular product of g1 and g2 whose induced multisubgraphs have the largest size.
+
+    Branch and bound search like maximum_score_cliques, with one greedy clique per vertex pair if approximate
+    (or as the initial bound with warm_start). Stats are filled like in find_maximum_induced_subgraphs.
+    """
+    di_graph1 = MultiDiGraph.get_graph_from_multigraph(multi_di_graph1.adjacency_matrix)
+    di_graph2 = MultiDiGraph.get_graph_from_multigraph(multi_di_graph2.adjacency_matrix)
+    modular_product = BitsetEdgeGraphProduct.from_adjacency_matrices(di_graph1, di_graph2)
+    # pairs of a vertex with self-loop and one without it are never mapped
+    vertices = modular_product.vertex_set(np.flatnonzero(
+        np.diagonal(di_graph1)[:, None] == np.diagonal(di_graph2)[None, :]).tolist())
+    search_stats = stats if stats is not None else {}
+    clique_score = VertexMapScorer(multi_di_graph1.adjacency_matrix, multi_di_graph2.adjacency_matrix)
+
+    if approximate or warm_start:
+        approx_cliques = set(greedy_single_maximal_clique_from_neighbors(
+            modular_product.neighbors, modular_product.vertices_count, vertex) for vertex in vertices)
+    if approximate:
+        # k mapped vertices have at most k * k edges between them (only for the induced subgraphs, the common
+        # edge subgraphs can map more vertices than the largest clique of the modular product)
+        clique_bound = modular_product.clique_upper_bound()
+        multiplicities1 = np.sort(multi_di_graph1.adjacency_matrix.ravel())[::-1]
+        multiplicities2 = np.sort(multi_di_graph2.adjacency_matrix.ravel())[::-1]
+        search_stats['subgraph_size_upper_bound'] = (
+            min(multi_di_graph1.size[0], multi_di_graph2.size[0], clique_bound),
+            min(int(multiplicities1[:clique_bound * clique_bound].sum()),
+                int(multiplicities2[:clique_bound * clique_bound].sum())))
+        return approx_cliques
+
+    lower_bound = (0, 0)
+    if warm_start:
+        lower_bound = max((score for score in map(clique_score, approx_cliques) if score is not None),
+                          default=(0, 0))
+        search_stats['warm_start_bound'] = lower_bound
+    best = {'score': lower_bound, 'cliques': set()}
+    bronKerbosch_maximum(set(), vertices, modular_product.vertex_set(), modular_product.neighbors, clique_score,
+                         get_vertex_map_score_upper_bound(multi_di_graph1.adjacency_matrix,
+                                                          multi_di_graph2.adjacency_matrix),
+                         best, search_stats)
+    search_stats['maximum_score'] = best['score']
+    return best['cliques']
+
+
+def _get_component_pair_mapped_edges(component1: MultiDiGraph, component2: MultiDiGraph,
+                                     options: dict) -> List[np.array]:
+    """Returns the mapped edges of the maximum connected subgraphs of two components (run by worker processes)."""
+    _, subgraphs = find_maximum_subgraphs(component1, component2, connected=True, **options)
+    return [subgraph.mapped_edges for subgraph in subgraphs]
+
+
+def component_maximum_subgraphs(multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph, workers: int = 1,
+                                stats: Optional[dict] = None, **options) -> List[MaximumSubgraph]:
+    """Returns the maximum subgraph of two multigraphs combined from maximum connected subgraphs of their weakly
+    connected components.
+
+    Every pair of components (g1 component, g2 component) is solved by find_maximum_subgraphs with connected and
+    given options, the identical pairs (same adjacency matrices and labels) only once and with workers > 1 in that
+    many processes. Then each g1 component is assigned at most one g2 component, so that the sum of sizes of their
+    subgraphs is the largest (see maximum_weight_assignment, sizes compared like in find_maximum_subgraphs). Only
+    one subgraph is returned, joined from the first maximum subgraph of every assigned pair. A common subgraph
+    mapping pieces of one component into several components is never found, so it can be smaller than the one
+    found by find_maximum_subgraphs, but the products are built for the components only.
+
+    Keyword arguments:
+    multi_di_graph1 -- g1
+    multi_di_graph2 -- g2
+    workers -- number of processes solving the pairs of components
+    stats -- dictionary filled with the number of 'component_pairs' and 'solved_component_pairs'
+    options -- options of find_maximum_subgraphs used for every pair of components
+    """
+    matrix1 = multi_di_graph1.adjacency_matrix
+    components1 = get_weakly_connected_components(matrix1)
+    components2 = get_weakly_connected_components(multi_di_graph2.adjacency_matrix)
+    component_graphs1 = [multi_di_graph1.get_induced_subgraph(component) for component in components1]
+    component_graphs2 = [multi_di_graph2.get_induced_subgraph(component) for component in components2]
+
+    # pairs of components with the same adjacency matrices and labels are solved once
+    def get_key(component: MultiDiGraph) -> tuple:
+        return (len(component.adjacency_matrix), component.adjacency_matrix.tobytes(),
+                None if component.vertex_labels is None else tuple(component.vertex_labels.tolist()),
+                None if component.edge_labels is None else tuple(component.edge_labels.ravel().tolist()))
+
+    pair_keys = [[(get_key(component1), get_key(component2)) for component2 in component_graphs2]
+                 for component1 in component_graphs1]
+    tasks = {}
+    for index1, component1 in enumerate(component_graphs1):
+        for index2, component2 in enumerate(component_graphs2):
+            tasks.setdefault(pair_keys[index1][index2], (component1, component2, options))
+    if workers > 1 and len(tasks) > 1:
+        with Pool(workers) as pool:
+            solutions = pool.starmap(_get_component_pair_mapped_edges, tasks.values())
+    else:
+        solutions = [_get_component_pair_mapped_edges(*task) for task in tasks.values()]
+    solutions = dict(zip(tasks, solutions))
+    if stats is not None:
+        stats['component_pairs'] = len(components1) * len(components2)
+        stats['solved_component_pairs'] = len(tasks)
+
+    # sizes (compared as tuples) are turned into integer weights: the second one never reaches the scale
+    scale = max(int(matrix1.sum()), len(matrix1)) + 1
+    weights = np.zeros((len(components1), len(components2)), dtype=object)
+    for index1 in range(len(components1)):
+        for index2 in range(len(components2)):
+            mapped_edges = solutions[pair_keys[index1][index2]]
+            if mapped_edges:
+                size = MaximumSubgraph(mapped_edges[0], 0, 0).size
+                score = size[::-1] if options.get('weighted') else size
+                weights[index1, index2] = score[0] * scale + score[1]
+
+    joined_mapped_edges = []
+    for index1, index2 in maximum_weight_assignment(weights):
+        if weights[index1, index2]:
+            # component vertices back to g1 and g2 vertices
+            mapped_edges = solutions[pair_keys[index1][index2]][0].copy()
+            mapped_edges[:, :2] = components1[index1][mapped_edges[:, :2]]
+            mapped_edges[:, 2:4] = components2[index2][mapped_edges[:, 2:4]]
+            joined_mapped_edges.append(mapped_edges)
+    if not joined_mapped_edges:
+        return []
+    return [MaximumSubgraph(np.concatenate(joined_mapped_edges), multi_di_graph1.size[0], multi_di_graph2.size[0])]
+
+
+def find_maximum_subgraphs(multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph, approximate: bool = False,
+                           warm_start: bool = False, stats: Optional[dict] = None, storage: str = 'auto',
+                           cache_size: int = 4096, block_size: int = 1024, memmap_directory: Optional[str] = None,
+                           workers: int = 1, maximum_only: bool = False, connected: bool = False,
+                           engine: str = 'edge_product', weighted: bool = False,
+                           symmetry_breaking: bool = False, components: bool = False,
+                           vertex_map: Optional[Dict[int, int]] = None,
+                           product_cache: Optional[ProductGraphCache] = None) \
+        -> Tuple[float, List[MaximumSubgraph]]:
     """Returns maximum subgraphs of two graphs based on node count first, edge count second.
 
     Algorithm:
     1. Find edge product graph based on graphs g1 nad g2 (ignoring all 'extra' edges from input multigraphs)
+       - in given storage (see get_edge_graph_product_in_storage), by default sparse or bit-packed depending
+         on its density; 'implicit' storage allows comparing graphs whose product would not fit in memory,
+         'memmap' storage keeps the packed product in a file in memmap_directory and builds it block_size
+         rows at a time; with workers > 1 'bitset' rows are built by that many processes
+       - with labels on both graphs (vertex_labels and edge_labels of MultiDiGraph), restricted to the pairs of
+         edges with the same labels of their end vertices and of themselves (see get_label_compatibility), the
+         other pairs are left out of 'sparse' storage altogether
+       - with self-loops, restricted to the cliques mapping vertices one to one (see ConsistentEdgeGraphProduct),
+         so the search never explores the cliques which would be discarded in 3.
+       - with symmetry_breaking, restricted by a symmetry breaking constraint on the largest orbit of vertices
+         under the automorphisms of g1 or g2 (see get_symmetry_breaking_product), so the cliques equivalent
+         up to an automorphism are mostly searched once; the size of maximum subgraphs does not change, but
+         only some of the subgraphs equivalent up to symmetry are returned (ignored with vertex_map)
+       - with vertex_map (dictionary of g1 vertices mapped to g2 vertices, as indices of the adjacency
+         matrices), restricted to the pairs of edges agreeing with it, and the pairs of edges between mapped
+         vertices are in every clique (see get_anchored_product), so only the subgraphs extending the map are
+         searched for; mapped vertices without common edges are not in the subgraphs
     2. Find maximal cliques for the edge product graph
+       - with warm_start (ignored when approximate), the approximation is run first and branches that cannot
+         reach its subgraph size are skipped; if stats dictionary is given, it is filled with the search
+         statistics ('warm_start_bound', 'explored_branches', 'pruned_branches')
+       - with maximum_only (ignored when approximate), only the cliques giving the largest subgraphs are
+         searched for, branches which cannot reach the best subgraph found so far are skipped (the
+         approximation is the initial bound with warm_start); if stats dictionary is given, it is filled
+         with 'explored_branches', 'pruned_branches' and 'maximum_score'
+       - with approximate, if stats dictionary is given, it is filled with the 'subgraph_size_upper_bound'
+         on the size of maximum subgraph
+       - with weighted, the subgraphs with the most multiedges are the maximum ones (the most nodes among
+         them); unless approximate or connected, the maximum weight cliques are searched for directly, with
+         product vertices weighted by min(g1 multiplicity, g2 multiplicity), and branches which cannot reach
+         the best weight so far are skipped (the approximation is the initial bound with warm_start); stats are
+         filled like with maximum_only, 'maximum_score' given as (edge count, node count)
+       - with connected, only the cliques grown along c-edges (pairs of edges sharing a vertex) are searched
+         for, so the subgraphs are weakly connected (warm_start and maximum_only are then ignored)
     3. Iterate over maximal cliques, for each clique:
-        a) calculate the corresponding subgraph in g1/g2
-           - if it is a duplicate of any current maximum subgraphs skip this clique
-        b) calculate the multisubgraph and update the maximum subgraph list
+        a) calculate the size of the corresponding subgraphs in g1/g2 from edge indices
+           - if the edges do not map vertices one to one (triangular and y subgraphs) skip this clique
+        b) calculate the size of the multisubgraph and update the list of maximum cliques
+           - if its subgraph is a duplicate of any current maximum subgraph (same key) skip this clique
+    4. Return the maximum subgraphs (see MaximumSubgraph, its fields are computed on first access), an empty
+       list if the graphs have no common edge (with every engine and option)
+
+    The maximum common induced subgraphs are searched for by find_maximum_induced_subgraphs.
+    With engine='greedy_expansion' approximate subgraphs are grown from a few seed pairs of edges along the
+    edges of both graphs (see greedy_expansion_vertex_maps, stats get the number of 'seeds'), in time close to
+    linear in the number of edges, so for large graphs it is much cheaper than approximate.
+    With engine='multilevel' both graphs are coarsened by merging heavy edge matchings, subgraphs of the coarsest
+    ones are grown like with greedy_expansion and their vertex maps are projected back and refined level by level
+    (see multilevel_vertex_maps, stats get the number of 'levels'), also in time close to linear in the number of
+    edges. With these two engines the 'subgraph_size_upper_bound' is the one of get_multiplicity_upper_bound.
+    With components, both graphs are split into weakly connected components, and one subgraph joined from the
+    connected subgraphs of assigned pairs of components is returned (see component_maximum_subgraphs, the other
+    options are used for each pair, workers are the processes solving the pairs).
     """
+    if engine not in ('edge_product', 'greedy_expansion', 'multilevel'):
+        raise ValueError(f'Unknown maximum subgraph engine: {engine}')
+    if vertex_map is not None:
+        if engine != 'edge_product' or components:
+            raise ValueError('Vertex map is only supported by the edge_product engine without components')
+        if len(set(vertex_map.values())) != len(vertex_map) or \
+                not all(0 <= g1_vertex < multi_di_graph1.size[0] and 0 <= g2_vertex < multi_di_graph2.size[0]
+                        for g1_vertex, g2_vertex in vertex_map.items()):
+            raise ValueError(f'Invalid vertex map: {vertex_map}')
+
+    cache_key = None
+    cached_product = None
+    if product_cache is not None and engine == 'edge_product' and not components and \
+            storage in ('auto', 'sparse', 'bitset'):
+        cache_key = product_cache.get_key(multi_di_graph1, multi_di_graph2, storage)
+        cached_product = product_cache.load(cache_key)
+        if stats is not None:
+            stats['product_cache_hit'] = cached_product is not None
+
+    if cached_product is not None:
+        # edges are stored with the product, so the graphs are not scanned again
+        di_graph1_edges = get_edge_list(cached_product[1])
+        di_graph2_edges = get_edge_list(cached_product[2])
+    else:
+        # get graphs from multigraphs, isolated vertices are kept so edges are indexed like in the multigraphs
+        di_graph1 = MultiDiGraph(multi_di_graph1.get_graph_from_multigraph(multi_di_graph1.adjacency_matrix),
+                                 remove_isolated_vertices=False)
+        di_graph2 = MultiDiGraph(multi_di_graph2.get_graph_from_multigraph(multi_di_graph2.adjacency_matrix),
+                                 remove_isolated_vertices=False)
 
-    # get graphs from multigraphs
-    di_graph1 = MultiDiGraph(multi_di_graph1.get_graph_from_multigraph(multi_di_graph1.adjacency_matrix))
-    di_graph2 = MultiDiGraph(multi_di_graph2.get_graph_from_multigraph(multi_di_graph2.adjacency_matrix))
-
-    # get edges of both graphs
-    di_graph1_edges = MultiDiGraph.get_list_of_edges(di_graph1.adjacency_matrix)
-    di_graph2_edges = MultiDiGraph.get_list_of_edges(di_graph2.adjacency_matrix)
+        # get edges of both graphs
+        di_graph1_edges = MultiDiGraph.get_list_of_edges(di_graph1.adjacency_matrix)
+        di_graph2_edges = MultiDiGraph.get_list_of_edges(di_graph2.adjacency_matrix)
 
     if not di_graph1_edges or not di_graph2_edges:
         print("Subgraph does not exist.")
-        return 0, None
+        return 0, []
+
+    if components:
+        t1 = perf_counter()
+        maximum_subgraphs = component_maximum_subgraphs(
+            multi_di_graph1, multi_di_graph2, workers, stats, approximate=approximate, warm_start=warm_start,
+            storage=storage, cache_size=cache_size, block_size=block_size, memmap_directory=memmap_directory,
+            maximum_only=maximum_only, engine=engine, weighted=weighted, symmetry_breaking=symmetry_breaking,
+            product_cache=product_cache)
+        t2 = perf_counter()
+        return t2 - t1, maximum_subgraphs
+
+    if engine in ('greedy_expansion', 'multilevel'):
+        vertex_map_score = VertexMapScorer(multi_di_graph1.adjacency_matrix, multi_di_graph2.adjacency_matrix)
+        t1 = perf_counter()
+        if engine == 'greedy_expansion':
+            maximum_cliques = greedy_expansion_vertex_maps(multi_di_graph1.adjacency_matrix,
+                                                           multi_di_graph2.adjacency_matrix, stats=stats)
+        else:
+            maximum_cliques = multilevel_vertex_maps(multi_di_graph1.adjacency_matrix,
+                                                     multi_di_graph2.adjacency_matrix, VertexMapScorer, stats=stats)
+        t2 = perf_counter()
+        if stats is not None:
+            stats['subgraph_size_upper_bound'] = get_multiplicity_upper_bound(multi_di_graph1, multi_di_graph2)
+        return t2 - t1, get_maximum_subgraphs(maximum_cliques, vertex_map_score, multi_di_graph1.size[0],
+                                              multi_di_graph2.size[0])
+
+    g1_edges_array = get_edge_array(di_graph1_edges)
+    g2_edges_array = get_edge_array(di_graph2_edges)
+    label_mask = get_label_compatibility(g1_edges_array, g2_edges_array, multi_di_graph1.vertex_labels,
+                                         multi_di_graph2.vertex_labels, multi_di_graph1.edge_labels,
+                                         multi_di_graph2.edge_labels)
+    if label_mask.all():
+        label_mask = None
 
     # find edge graph product
-    edge_graph_product = get_edge_graph_product(di_graph1_edges, di_graph2_edges)
+    if cached_product is not None:
+        edge_graph_product = cached_product[0]
+    else:
+        edge_graph_product = get_edge_graph_product_in_storage(di_graph1_edges, di_graph2_edges, storage,
+                                                               cache_size, block_size, memmap_directory, workers,
+                                                               label_mask)
+        if cache_key is not None:
+            product_cache.store(cache_key, edge_graph_product, g1_edges_array, g2_edges_array)
+    # the product is closed (its file removed) once the search is done
+    stored_product = edge_graph_product
+    if label_mask is not None:
+        edge_graph_product = MaskedEdgeGraphProduct(edge_graph_product, label_mask, cache_size=cache_size)
+    # without self-loops every clique maps vertices one to one
+    if np.any(g1_edges_array[:, 0] == g1_edges_array[:, 1]) or np.any(g2_edges_array[:, 0] == g2_edges_array[:, 1]):
+        edge_graph_product = ConsistentEdgeGraphProduct(edge_graph_product, g1_edges_array, g2_edges_array,
+                                                        cache_size)
+    if vertex_map:
+        edge_graph_product = get_anchored_product(edge_graph_product, g1_edges_array, g2_edges_array, vertex_map,
+                                                  multi_di_graph1.size[0], multi_di_graph2.size[0], cache_size)
+    elif symmetry_breaking:
+        edge_graph_product = get_symmetry_breaking_product(edge_graph_product, multi_di_graph1, multi_di_graph2,
+                                                           g1_edges_array, g2_edges_array, cache_size)
 
     # get all maximal cliques
     t1 = perf_counter()
-    if approximate:
+    if connected:
+        maximal_cliques = connected_maximal_cliques(edge_graph_product, g1_edges_array, g2_edges_array,
+                                                    approximate, cache_size)
+    elif approximate:
         maximal_cliques = edge_graph_product.approx_maximal_cliques()
+    elif weighted:
+        search_stats = stats if stats is not None else {}
+        lower_bound = (0, 0)
+        if warm_start:
+            weighted_score = WeightedCliqueScorer(di_graph1_edges, di_graph2_edges, multi_di_graph1.adjacency_matrix,
+                                                  multi_di_graph2.adjacency_matrix)
+            lower_bound = max((score for score in map(weighted_score, edge_graph_product.approx_maximal_cliques())
+                               if score is not None), default=(0, 0))
+            search_stats['warm_start_bound'] = lower_bound
+        maximal_cliques = maximum_weight_cliques(
+            edge_graph_product, di_graph1_edges, di_graph2_edges, multi_di_graph1.adjacency_matrix,
+            multi_di_graph2.adjacency_matrix, lower_bound, search_stats)
+    elif maximum_only:
+        search_stats = stats if stats is not None else {}
+        lower_bound = (0, 0)
+        if warm_start:
+            lower_bound = get_approx_subgraph_size(edge_graph_product, di_graph1_edges, di_graph2_edges,
+                                                   multi_di_graph1.adjacency_matrix, multi_di_graph2.adjacency_matrix)
+            search_stats['warm_start_bound'] = lower_bound
+        maximal_cliques = maximum_score_cliques(
+            edge_graph_product, di_graph1_edges, di_graph2_edges, multi_di_graph1.adjacency_matrix,
+            multi_di_graph2.adjacency_matrix, lower_bound, search_stats)
+    elif warm_start:
+        maximal_cliques = warm_started_maximal_cliques(
+            edge_graph_product, di_graph1_edges, di_graph2_edges, multi_di_graph1.adjacency_matrix,
+            multi_di_graph2.adjacency_matrix, stats if stats is not None else {})
     else:
         maximal_cliques = edge_graph_product.maximal_cliques()
     t2 = perf_counter()
     maximal_clique_finding_time = t2-t1
+    if approximate and stats is not None:
+        stats['subgraph_size_upper_bound'] = get_subgraph_size_upper_bound(
+            edge_graph_product, di_graph1_edges, di_graph2_edges, multi_di_graph1, multi_di_graph2)
+    del edge_graph_product
+    if isinstance(stored_product, BitsetEdgeGraphProduct):
+        stored_product.close()
     # print(f"finding maximal cliques: {maximal_clique_finding_time}")
     # print(f"num of maximal cliques: {len(maximal_cliques)}")
 
-    maximum_subgraphs = []
-    max_size = (0, 0)
-
-    # iterate through all cliques
-    for clique in maximal_cliques:
-        subgraph_edges_map = get_subgraph_edges(clique, di_graph1_edges, di_graph2_edges)
+    clique_score = (WeightedCliqueScorer if weighted else CliqueScorer)(
+        di_graph1_edges, di_graph2_edges, multi_di_graph1.adjacency_matrix, multi_di_graph2.adjacency_matrix)
+    return maximal_clique_finding_time, get_maximum_subgraphs(maximal_cliques, clique_score,
+                                                              multi_di_graph1.size[0], multi_di_graph2.size[0])
+
+
+def find_maximum_induced_subgraphs(multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph,
+                                   engine: str = 'modular_product', approximate: bool = False,
+                                   warm_start: bool = False, stats: Optional[dict] = None) \
+        -> Tuple[float, List[MaximumSubgraph]]:
+    """Returns maximum common induced subgraphs of two graphs based on node count first, edge count second.
+
+    Unlike the subgraphs of find_maximum_subgraphs, the mapped vertices have the same edges between them in both
+    directions in g1 and g2 (the multiplicities can differ), so the induced subgraphs can be smaller and their
+    size bounds neither the maximum subgraphs nor the distances of distance_functions.
+
+    With engine='modular_product' the cliques are searched for in the modular product of the vertices of g1 and
+    g2 (n1 * n2 vertices rather than E1 * E2 of the edge product, better suited for dense graphs), see
+    modular_product_maximum_cliques. With engine='mcsplit' the same subgraphs are found without any product
+    graph, by McSplit branch and bound on the adjacency matrices (see mcsplit_vertex_maps); approximate and
+    warm_start are then ignored.
+
+    Keyword arguments:
+    multi_di_graph1 -- g1
+    multi_di_graph2 -- g2
+    engine -- 'modular_product' or 'mcsplit'
+    approximate -- with one greedy clique per vertex pair instead of the search, if stats dictionary is given,
+                   it is filled with the 'subgraph_size_upper_bound' on the size of maximum induced subgraph
+    warm_start -- with the approximation as the initial bound of the search ('warm_start_bound' in stats)
+    stats -- dictionary filled with 'explored_branches', 'pruned_branches' and 'maximum_score' of the search
+    """
+    if engine not in ('modular_product', 'mcsplit'):
+        raise ValueError(f'Unknown maximum induced subgraph engine: {engine}')
+    vertex_map_score = VertexMapScorer(multi_di_graph1.adjacency_matrix, multi_di_graph2.adjacency_matrix)
+    t1 = perf_counter()
+    if engine == 'modular_product':
+        maximum_cliques = modular_product_maximum_cliques(multi_di_graph1, multi_di_graph2, approximate,
+                                                          warm_start, stats)
+    else:
+        maximum_cliques = mcsplit_vertex_maps(multi_di_graph1.adjacency_matrix,
+                                              multi_di_graph2.adjacency_matrix, vertex_map_score, stats=stats)
+    t2 = perf_counter()
+    return t2 - t1, get_maximum_subgraphs(maximum_cliques, vertex_map_score, multi_di_graph1.size[0],
+                                          multi_di_graph2.size[0])
 
-        di_subgraph = MultiDiGraph(get_matrix_from_edges(subgraph_edges_map, 1))
-        di_subgraph2 = MultiDiGraph(get_matrix_from_edges(subgraph_edges_map, 2))
 
-        if di_subgraph.size != di_subgraph2.size:  # for triangular and y subgraphs
-            continue
+class IncrementalMaximumSubgraphs:
+    """Maximum subgraphs of two multigraphs kept up to date while edges are added to and removed from them.
 
-        for maximum_subgraph in maximum_subgraphs:  # check if the subgraph is not a duplicate
-            if any(x != y for x, y in zip(maximum_subgraph['subgraph_edge_map'], subgraph_edges_map)):
-                continue
-
-        multisubgraph_edges_map = get_multisubgraph_edges(subgraph_edges_map, multi_di_graph1.adjacency_matrix,
-                                                          multi_di_graph2.adjacency_matrix)
-
-        multi_di_subgraph = MultiDiGraph(get_matrix_from_edges(multisubgraph_edges_map, 1))
-        multisubgraph_vertices_map = get_subgraph_vertices_map(multisubgraph_edges_map, 1)
-
-        # update the maximum subgraphs list
-        if multi_di_subgraph.size[0] > max_size[0] or \
-                (multi_di_subgraph.size[0] == max_size[0] and multi_di_subgraph.size[1] > max_size[1]):
-            maximum_subgraphs.clear()
-            maximum_subgraphs.append({
-                'subgraph_edge_map': subgraph_edges_map,
-                'multisubgraph_edge_map': multisubgraph_edges_map,
-                'multisubgraph_vertex_map': multisubgraph_vertices_map,
-                'multi_di_subgraph': multi_di_subgraph
-            })
-            max_size = multi_di_subgraph.size
-
-        if multi_di_subgraph.size == max_size:
-            maximum_subgraphs.append({
-                'subgraph_edge_map': subgraph_edges_map,
-                'multisubgraph_edge_map': multisubgraph_edges_map,
-                'multisubgraph_vertex_map': multisubgraph_vertices_map,
-                'multi_di_subgraph': multi_di_subgraph
-            })
-
-    maximum_subgraphs = remove_duplicated(maximum_subgraphs)
+    The edge graph product is kept between the updates (see IncrementalEdgeGraphProduct), so an update only
+    computes the product vertices of an edge which appears or disappears, never the whole product. Each search
+    (like find_maximum_subgraphs with maximum_only) starts from the size of the previous maximum subgraphs
+    restricted to the edges still present, which are still common subgraphs, so the branches which cannot
+    reach it are skipped; if nothing is found from that bound, the search is repeated without it. Vertices of
+    the multigraphs are never added or removed, labels are ignored.
+    """
 
-    result = []
-    for maximum_subgraph in maximum_subgraphs:
-        result.append({
-            'multi_di_subgraph': maximum_subgraph['multi_di_subgraph'],
-            'multisubgraph_vertex_map': maximum_subgraph['multisubgraph_vertex_map'],
-            'printable_vertex_map': get_printible_vertex_map(maximum_subgraph['multisubgraph_vertex_map']),
-            'graph_1_vertices': get_graph_vertices(maximum_subgraph['multisubgraph_edge_map'], 1),
-            'graph_2_vertices': get_graph_vertices(maximum_subgraph['multisubgraph_edge_map'], 2),
-            'graph_1_with_only_subgraph_edges': get_multigraph_with_only_subgraph_edges(
-                multi_di_graph1.size[0], maximum_subgraph['multisubgraph_edge_map'], 1),
-            'graph_2_with_only_subgraph_edges': get_multigraph_with_only_subgraph_edges(
-                multi_di_graph2.size[0], maximum_subgraph['multisubgraph_edge_map'], 2)
-        })
-    return maximal_clique_finding_time, result
+    def __init__(self, multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph, cache_size: int = 4096,
+                 block_size: int = 1024):
+        """Keyword arguments:
+        multi_di_graph1 -- initial g1
+        multi_di_graph2 -- initial g2
+        cache_size -- maximal number of neighborhoods kept in memory (with self-loops)
+        block_size -- number of product rows computed at once
+        """
+        self.adjacency_matrices = [multi_di_graph1.adjacency_matrix.copy(), multi_di_graph2.adjacency_matrix.copy()]
+        self.cache_size = cache_size
+        self.product = IncrementalEdgeGraphProduct(np.argwhere(self.adjacency_matrices[0] > 0),
+                                                   np.argwhere(self.adjacency_matrices[1] > 0), block_size)
+        # pairs of mapped edges ((g1 start, g1 end), (g2 start, g2 end)) of the previous maximum subgraphs
+        self.previous_edge_pairs = []
+
+    @property
+    def multi_di_graph1(self) -> MultiDiGraph:
+        return MultiDiGraph(self.adjacency_matrices[0], remove_isolated_vertices=False)
+
+    @property
+    def multi_di_graph2(self) -> MultiDiGraph:
+        return MultiDiGraph(self.adjacency_matrices[1], remove_isolated_vertices=False)
+
+    def _get_matrix(self, graph_num: int, start: int, end: int) -> np.array:
+        if graph_num not in (1, 2):
+            raise ValueError(f'Unknown graph: {graph_num}')
+        matrix = self.adjacency_matrices[graph_num - 1]
+        if not (0 <= start < len(matrix) and 0 <= end < len(matrix)):
+            raise ValueError(f'Invalid edge of graph {graph_num}: {start} -> {end}')
+        return matrix
+
+    def add_edge(self, graph_num: int, start: int, end: int):
+        """Adds an edge start -> end to g1 (graph_num 1) or g2 (graph_num 2), product vertices are added only
+        for a new edge (not another one between the same vertices)."""
+        matrix = self._get_matrix(graph_num, start, end)
+        matrix[start, end] += 1
+        if matrix[start, end] == 1:
+            self.product.add_edge(graph_num - 1, (start, end))
+
+    def remove_edge(self, graph_num: int, start: int, end: int):
+        """Removes an edge start -> end from g1 (graph_num 1) or g2 (graph_num 2), product vertices are removed
+        only with the last edge between the vertices."""
+        matrix = self._get_matrix(graph_num, start, end)
+        if matrix[start, end] == 0:
+            raise ValueError(f'Invalid edge of graph {graph_num}: {start} -> {end}')
+        matrix[start, end] -= 1
+        if matrix[start, end] == 0:
+            self.product.remove_edge(graph_num - 1, (start, end))
+
+    def find_maximum_subgraphs(self, stats: Optional[dict] = None) -> List[MaximumSubgraph]:
+        """Returns maximum subgraphs of the current g1 and g2 (see find_maximum_subgraphs with maximum_only).
+
+        If stats dictionary is given, it is filled with the 'warm_start_bound' (size of the previous maximum
+        subgraphs within the current graphs), 'explored_branches', 'pruned_branches' and 'maximum_score'.
+        """
+        multi_di_graph1, multi_di_graph2 = self.adjacency_matrices
+        if not np.any(self.product.used[0]) or not np.any(self.product.used[1]):
+            self.previous_edge_pairs = []
+            return []
+        # edges are listed by slots (free slots included), like the vertices of the product
+        di_graph1_edges = get_edge_list(self.product.slot_edges[0])
+        di_graph2_edges = get_edge_list(self.product.slot_edges[1])
+        clique_score = CliqueScorer(di_graph1_edges, di_graph2_edges, multi_di_graph1, multi_di_graph2)
+
+        edge_graph_product = self.product
+        g1_loops = self.product.used[0] & (self.product.slot_edges[0][:, 0] == self.product.slot_edges[0][:, 1])
+        g2_loops = self.product.used[1] & (self.product.slot_edges[1][:, 0] == self.product.slot_edges[1][:, 1])
+        if np.any(g1_loops) or np.any(g2_loops):
+            edge_graph_product = ConsistentEdgeGraphProduct(edge_graph_product, self.product.slot_edges[0],
+                                                            self.product.slot_edges[1], self.cache_size)
+
+        lower_bound = (0, 0)
+        for edge_pairs in self.previous_edge_pairs:
+            clique = frozenset(vertex for vertex in (self.product.get_vertex(g1_edge, g2_edge)
+                                                     for g1_edge, g2_edge in edge_pairs) if vertex is not None)
+            size = clique_score(clique) if clique else None
+            if size is not None:
+                lower_bound = max(lower_bound, size)
+        search_stats = stats if stats is not None else {}
+        search_stats['warm_start_bound'] = lower_bound
+        maximal_cliques = maximum_score_cliques(edge_graph_product, di_graph1_edges, di_graph2_edges,
+                                                multi_di_graph1, multi_di_graph2, lower_bound, search_stats)
+        if not maximal_cliques and lower_bound != (0, 0):
+            maximal_cliques = maximum_score_cliques(edge_graph_product, di_graph1_edges, di_graph2_edges,
+                                                    multi_di_graph1, multi_di_graph2, (0, 0), search_stats)
+
+        maximum_subgraphs = get_maximum_subgraphs(maximal_cliques, clique_score, len(multi_di_graph1),
+                                                  len(multi_di_graph2))
+        self.previous_edge_pairs = [[(tuple(edge[:2]), tuple(edge[2:4])) for edge in subgraph.mapped_edges.tolist()]
+                                    for subgraph in maximum_subgraphs]
+        return maximum_subgraphs
@@ -0,0 +1,153 @@
+from typing import Callable, FrozenSet, List, Optional, Set, Tuple
+import numpy as np
+
+
+# Label of vertex u seen from vertex v: 0 no edge, 1 edge v -> u, 2 edge u -> v, 3 edges in both directions
+ADJACENCY_LABELS = 4
+
+# Label class: vertices of g1 and vertices of g2 with the same labels towards all the mapped vertices
+LabelClass = Tuple[np.array, np.array]
+
+
+def get_adjacency_labels(di_graph: np.array) -> np.array:
+    """Returns the matrix of adjacency labels (see ADJACENCY_LABELS) of a graph without multiple edges."""
+    return di_graph + 2 * di_graph.T
+
+
+def get_initial_label_classes(di_graph1: np.array, di_graph2: np.array) -> List[LabelClass]:
+    """Returns the label classes before any vertex is mapped (vertices with and without self-loop)."""
+    g1_loops = np.diagonal(di_graph1) > 0
+    g2_loops = np.diagonal(di_graph2) > 0
+    label_classes = []
+    for loop in (False, True):
+        g1_vertices = np.flatnonzero(g1_loops == loop)
+        g2_vertices = np.flatnonzero(g2_loops == loop)
+        if len(g1_vertices) and len(g2_vertices):
+            label_classes.append((g1_vertices, g2_vertices))
+    return label_classes
+
+
+def refine_label_classes(label_classes: List[LabelClass], g1_labels: np.array, g2_labels: np.array,
+                         g1_vertex: int, g2_vertex: int) -> List[LabelClass]:
+    """Returns the label classes after mapping g1_vertex to g2_vertex.
+
+    Every class is split by the labels of its vertices towards the newly mapped vertices, the classes without
+    vertices of g1 or of g2 are left out.
+    """
+    refined = []
+    for g1_vertices, g2_vertices in label_classes:
+        g1_vertices = g1_vertices[g1_vertices != g1_vertex]
+        g2_vertices = g2_vertices[g2_vertices != g2_vertex]
+        g1_vertex_labels = g1_labels[g1_vertex, g1_vertices]
+        g2_vertex_labels = g2_labels[g2_vertex, g2_vertices]
+        for label in range(ADJACENCY_LABELS):
+            g1_class = g1_vertices[g1_vertex_labels == label]
+            g2_class = g2_vertices[g2_vertex_labels == label]
+            if len(g1_class) and len(g2_class):
+                refined.append((g1_class, g2_class))
+    return refined
+
+
+def mcsplit(vertex_map: List[Tuple[int, int]], label_classes: List[LabelClass], g1_labels: np.array,
+            g2_labels: np.array, g1_degrees: np.array, score: Callable[[List[Tuple[int, int]]], Optional[tuple]],
+            upper_bound: Callable[[List[Tuple[int, int]], List[LabelClass]], tuple], best: dict,
+            stats: dict) -> None:
+    """Recursive McSplit branch and bound searching for the vertex maps with the highest score.
+
+    Vertices which can still be mapped are kept in label classes (vertices of g1 and g2 with the same
+    adjacency labels towards every mapped vertex), so any extension maps vertices within classes only and
+    the map can grow by at most the sum of min class sizes. The score of the best map found so far is used as
+    the lower bound, all maps tied for it are kept (like in bronKerbosch_maximum).
+
+    Keyword arguments:
+        vertex_map -- required for recursive calls (first call with empty list)
+        label_classes -- required for recursive calls (first call with get_initial_label_classes)
+        g1_labels -- matrix of adjacency labels of g1 (see get_adjacency_labels)
+        g2_labels -- matrix of adjacency labels of g2
+        g1_degrees -- degrees of g1 vertices, the ones with the highest degree are branched on first
+        score -- function returning the score of a vertex map (None if the map is not valid)
+        upper_bound -- function returning an upper bound on the score of any extension of the vertex map
+                       within given label classes (scores are compared as tuples)
+        best -- dictionary with the best 'score' so far (initially any known lower bound) and the
+                set of 'vertex_maps' (frozensets of (g1 vertex, g2 vertex) pairs) reaching it, updated in place
+        stats -- dictionary updated with the number of 'explored_branches' and
+                 'pruned_branches'
+    """
+    stats['explored_branches'] = stats.get('explored_branches', 0) + 1
+    stats.setdefault('pruned_branches', 0)
+
+    map_score = score(vertex_map)
+    if map_score is not None and map_score >= best['score']:
+        if map_score > best['score']:
+            best['score'] = map_score
+            best['vertex_maps'] = set()
+        best['vertex_maps'].add(frozenset(vertex_map))
+    if not label_classes:
+        return
+    if upper_bound(vertex_map, label_classes) < best['score']:
+        stats['pruned_branches'] += 1
+        return
+
+    # the smallest class gives the fewest branches
+    class_index = min(range(len(label_classes)),
+                      key=lambda index: max(len(label_classes[index][0]), len(label_classes[index][1])))
+    g1_vertices, g2_vertices = label_classes[class_index]
+    g1_vertex = int(g1_vertices[np.argmax(g1_degrees[g1_vertices])])
+    for g2_vertex in g2_vertices.tolist():
+        mcsplit(vertex_map + [(g1_vertex, g2_vertex)],
+                refine_label_classes(label_classes, g1_labels, g2_labels, g1_vertex, g2_vertex),
+                g1_labels, g2_labels, g1_degrees, score, upper_bound, best, stats)
+
+    # g1_vertex is left unmapped
+    remaining_g1_vertices = g1_vertices[g1_vertices != g1_vertex]
+    remaining_classes = label_classes[:class_index] + label_classes[class_index + 1:]
+    if len(remaining_g1_vertices):
+        remaining_classes.append((remaining_g1_vertices, g2_vertices))
+    mcsplit(vertex_map, remaining_classes, g1_labels, g2_labels, g1_degrees, score, upper_bound, best, stats)
+
+
+def get_label_classes_bound(label_classes: List[LabelClass]) -> int:
+    """Returns the largest number of vertices that can still be mapped (sum of min class sizes)."""
+    return sum(min(len(g1_vertices), len(g2_vertices)) for g1_vertices, g2_vertices in label_classes)
+
+
+def mcsplit_vertex_maps(multi_di_graph1: np.array, multi_di_graph2: np.array,
+                        score: Callable[[FrozenSet[int]], Optional[Tuple[int, int]]],
+                        lower_bound: Tuple[int, int] = (0, 0), stats: Optional[dict] = None) -> Set[FrozenSet[int]]:
+    """Returns the vertex maps of the maximum common induced subgraphs of two multigraphs.
+
+    Vertex maps are returned as the cliques of modular product of g1 and g2 (u-th vertex of g1 mapped to x-th
+    vertex of g2 is u * (g2 vertex count) + x), so they are scored like them (f.e. by VertexMapScorer).
+
+    Keyword arguments:
+    multi_di_graph1 -- adjacency matrix of g1
+    multi_di_graph2 -- adjacency matrix of g2
+    score -- function returning the size (node count, edge count) of multisubgraph of a vertex map
+             (None if there is no such subgraph)
+    lower_bound -- size of any known common subgraph, the branches which cannot reach it are pruned
+    stats -- dictionary filled with 'explored_branches', 'pruned_branches' and 'maximum_score'
+    """
+    di_graph1 = (multi_di_graph1 > 0).astype(int)
+    di_graph2 = (multi_di_graph2 > 0).astype(int)
+    g2_vertices_count = len(multi_di_graph2)
+
+    def encode(vertex_map) -> FrozenSet[int]:
+        return frozenset(g1_vertex * g2_vertices_count + g2_vertex for g1_vertex, g2_vertex in vertex_map)
+
+    def upper_bound(vertex_map: List[Tuple[int, int]], label_classes: List[LabelClass]) -> Tuple[int, int]:
+        # node count by the mapped and mappable vertices, edge count by all edges between the ones of g1 (and g2)
+        g1_vertices = np.concatenate([[g1_vertex for g1_vertex, _ in vertex_map]] +
+                                     [g1_class for g1_class, _ in label_classes]).astype(int)
+        g2_vertices = np.concatenate([[g2_vertex for _, g2_vertex in vertex_map]] +
+                                     [g2_class for _, g2_class in label_classes]).astype(int)
+        return len(vertex_map) + get_label_classes_bound(label_classes), \
+            int(min(multi_di_graph1[np.ix_(g1_vertices, g1_vertices)].sum(),
+                    multi_di_graph2[np.ix_(g2_vertices, g2_vertices)].sum()))
+
+    search_stats = stats if stats is not None else {}
+    best = {'score': lower_bound, 'vertex_maps': set()}
+    mcsplit([], get_initial_label_classes(di_graph1, di_graph2), get_adjacency_labels(di_graph1),
+            get_adjacency_labels(di_graph2), di_graph1.sum(axis=0) + di_graph1.sum(axis=1),
+            lambda vertex_map: score(encode(vertex_map)) if vertex_map else None, upper_bound, best, search_stats)
+    search_stats['maximum_score'] = best['score']
+    return set(encode(vertex_map) for vertex_map in best['vertex_maps'])
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+from typing import Optional, Tuple
+import numpy as np
+from MultiDiGraph import MultiDiGraph
+from product_graph import BitsetEdgeGraphProduct, EdgeGraphProduct, SparseEdgeGraphProduct
+
+
+class ProductGraphCache:
+    """On-disk cache of edge graph products, shared by all the jobs using the same directory.
+
+    Every product is stored with the edges of g1 and g2 it was built from in one .npz file named by the hash of
+    both multigraphs (adjacency matrices and labels) and the storage. Only 'sparse' and 'bitset' products are
+    cached. Files are written under a temporary name and renamed, so other jobs never read a partial file. When
+    the files take more than max_bytes, the least recently used ones (by modification time, updated on every
+    load) are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        """Keyword arguments:
+        directory -- directory of the cache files (created if missing)
+        max_bytes -- total size of the cache files kept after storing a product
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def get_key(multi_di_graph1: MultiDiGraph, multi_di_graph2: MultiDiGraph, storage: str) -> str:
+        """Returns the key (sha256 hex digest) of the product of two multigraphs in given storage."""
+        digest = hashlib.sha256(storage.encode())
+        for multi_di_graph in (multi_di_graph1, multi_di_graph2):
+            matrix = multi_di_graph.adjacency_matrix.astype(np.int64)
+            digest.update(repr(matrix.shape).encode())
+            digest.update(matrix.tobytes())
+            for labels in (multi_di_graph.vertex_labels, multi_di_graph.edge_labels):
+                digest.update(repr(None if labels is None else labels.tolist()).encode())
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        """Returns the path of the cache file of given key."""
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def load(self, key: str) -> Optional[Tuple[EdgeGraphProduct, np.array, np.array]]:
+        """Returns the product with the edge arrays of g1 and g2 stored under the key, None if there is none
+        (or the file cannot be read, f.e. removed by another job meanwhile)."""
+        path = self.get_path(key)
+        try:
+            with np.load(path) as arrays:
+                if str(arrays['storage']) == 'bitset':
+                    product = BitsetEdgeGraphProduct(arrays['rows'], int(arrays['vertices_count']))
+                else:
+                    product = SparseEdgeGraphProduct(arrays['indptr'], arrays['indices'])
+                g1_edges, g2_edges = arrays['g1_edges'], arrays['g2_edges']
+            os.utime(path)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        return product, g1_edges, g2_edges
+
+    def store(self, key: str, product: EdgeGraphProduct, g1_edges: np.array, g2_edges: np.array) -> None:
+        """Stores the product (if 'sparse' or 'bitset') with the edge arrays of g1 and g2 under the key, then
+        removes the least recently used files over max_bytes."""
+        if isinstance(product, SparseEdgeGraphProduct):
+            arrays = {'storage': np.array('sparse'), 'indptr': product.indptr, 'indices': product.indices}
+        elif isinstance(product, BitsetEdgeGraphProduct) and not product.file_backed:
+            arrays = {'storage': np.array('bitset'), 'rows': np.asarray(product.rows),
+                      'vertices_count': np.array(product.vertices_count)}
+        else:
+            return
+        file_descriptor, temporary_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as f:
+                np.savez(f, g1_edges=g1_edges, g2_edges=g2_edges, **arrays)
+            os.replace(temporary_path, self.get_path(key))
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self.evict(keep=key)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Removes the least recently used files until the cache takes at most max_bytes (except the file of
+        key keep)."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            try:
+                status = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, name))
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if name == f'{keep}.npz':
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total_bytes -= size
@@ -0,0 +1,946 @@
+from functools import lru_cache
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from tempfile import TemporaryFile
+from typing import IO, Callable, FrozenSet, Iterable, Iterator, Optional, Set, Tuple, Union
+import numpy as np
+from graph_functions import (EDGES_DISJOINT, bronKerbosch_pivot, degree_clique_bound_from_degrees,
+                             get_edge_endpoint_equalities, get_edge_pair_relation_codes,
+                             get_edge_relation_codes, get_relation_codes, greedy_coloring_number_from_neighbors,
+                             greedy_single_maximal_clique_from_neighbors)
+
+
+def get_product_rows(g1_codes: np.array, g2_codes: np.array, first_row: int, last_row: int) -> np.array:
+    """Returns the rows first_row, ..., last_row - 1 of edge graph product as a boolean matrix.
+
+    Keyword arguments:
+    g1_codes -- matrix of relation codes of g1 edges (see get_edge_pair_relation_codes)
+    g2_codes -- matrix of relation codes of g2 edges
+    first_row -- first product vertex of the block
+    last_row -- product vertex after the last one of the block
+    """
+    return get_product_vertex_rows(g1_codes, g2_codes, np.arange(first_row, last_row))
+
+
+def get_product_vertex_rows(g1_codes: np.array, g2_codes: np.array, vertices: np.array) -> np.array:
+    """Returns the rows of given vertices of edge graph product as a boolean matrix (see get_product_rows)."""
+    g1_edges, g2_edges = np.divmod(vertices, len(g2_codes))
+    # [r, j, l] entry compares codes of pairs g1_edges[r]-j and g2_edges[r]-l
+    rows = (g1_codes[g1_edges][:, :, None] & g2_codes[g2_edges][:, None, :]) != 0
+    return rows.reshape(len(vertices), len(g1_codes) * len(g2_codes))
+
+
+# COMMON_FLAG[a, b] is true when relation codes a and b have a common flag, i.e. when pairs of edges with
+# these codes are connected in the edge graph product
+COMMON_FLAG = (np.arange(64)[:, None] & np.arange(64)[None, :]) != 0
+
+
+def get_product_edges_count(g1_codes: np.array, g2_codes: np.array) -> int:
+    """Returns the number of edges of edge graph product (each counted in both directions) without building it."""
+    return int(np.bincount(g1_codes.ravel(), minlength=64) @ COMMON_FLAG @
+               np.bincount(g2_codes.ravel(), minlength=64))
+
+
+# Number of set bits of every byte value
+POPCOUNT_TABLE = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+def get_words_count(vertices_count: int) -> int:
+    """Returns the number of 64-bit words needed to store one bit per vertex."""
+    return (vertices_count + 63) // 64
+
+
+def pack_rows(rows: np.array) -> np.array:
+    """Returns boolean rows packed into 64-bit words (bit b of word w holds column 64 * w + b)."""
+    words_count = get_words_count(rows.shape[1])
+    padded = np.zeros(shape=(rows.shape[0], words_count * 64), dtype=bool)
+    padded[:, :rows.shape[1]] = rows
+    return np.packbits(padded, axis=1, bitorder='little').view('<u8')
+
+
+def fill_packed_rows(rows: np.array, g1_codes: np.array, g2_codes: np.array, first_row: int, last_row: int,
+                     block_size: int):
+    """Writes packed rows first_row, ..., last_row - 1 of edge graph product into rows, block_size at a time."""
+    for block_start in range(first_row, last_row, block_size):
+        block_end = min(block_start + block_size, last_row)
+        rows[block_start:block_end] = pack_rows(get_product_rows(g1_codes, g2_codes, block_start, block_end))
+
+
+def _fill_shared_rows(shared_memory_name: str, shape: Tuple[int, int], dtype: str, g1_codes: np.array,
+                      g2_codes: np.array, first_row: int, last_row: int, block_size: int):
+    """Writes rows first_row, ..., last_row - 1 of edge graph product into the shared memory buffer (run by
+    the worker processes of get_product_rows_in_parallel)."""
+    shared_memory = SharedMemory(name=shared_memory_name)
+    rows = np.ndarray(shape, dtype=dtype, buffer=shared_memory.buf)
+    if rows.dtype == bool:
+        for block_start in range(first_row, last_row, block_size):
+            block_end = min(block_start + block_size, last_row)
+            rows[block_start:block_end] = get_product_rows(g1_codes, g2_codes, block_start, block_end)
+    else:
+        fill_packed_rows(rows, g1_codes, g2_codes, first_row, last_row, block_size)
+    del rows
+    shared_memory.close()
+
+
+def get_modular_product_rows(g1_matrix: np.array, g2_matrix: np.array, g1_vertex: int) -> np.array:
+    """Returns the rows of modular product of two simple directed graphs for the pairs (g1_vertex, x) of g2 vertices.
+
+    Vertex u * (g2 vertex count) + x corresponds to the pair of u-th vertex of g1 and x-th vertex of g2, pairs
+    (u, x) and (v, y) are adjacent if u != v, x != y and edges between u and v are the same as between x and y
+    in both directions. Pairs of a vertex with self-loop and one without it have no neighbors.
+
+    Keyword arguments:
+    g1_matrix -- adjacency matrix of g1 (without multiple edges)
+    g2_matrix -- adjacency matrix of g2
+    g1_vertex -- vertex u of g1
+    """
+    # code of a pair of vertices: 1 for the edge u -> v, 2 for v -> u
+    g1_codes = g1_matrix[g1_vertex] + 2 * g1_matrix[:, g1_vertex]
+    g2_codes = g2_matrix + 2 * g2_matrix.T
+    loops_equal = np.diagonal(g1_matrix)[:, None] == np.diagonal(g2_matrix)[None, :]
+    # [x, v, y] entry compares pairs (g1_vertex, x) and (v, y)
+    rows = (g1_codes[None, :, None] == g2_codes[:, None, :]) & loops_equal[None, :, :]
+    rows &= loops_equal[g1_vertex][:, None, None]
+    rows[:, g1_vertex, :] = False
+    rows[np.arange(len(g2_matrix)), :, np.arange(len(g2_matrix))] = False
+    return rows.reshape(len(g2_matrix), len(g1_matrix) * len(g2_matrix))
+
+
+class SharedMemoryArray(np.ndarray):
+    """Array viewing the buffer of shared memory, which stays mapped as long as the array or any of its views is
+    alive (the views keep the array as their base)."""
+
+    def __new__(cls, shape: Tuple[int, int], dtype: np.dtype, shared_memory: SharedMemory) -> 'SharedMemoryArray':
+        array = super().__new__(cls, shape, dtype=dtype, buffer=shared_memory.buf)
+        array.shared_memory = shared_memory
+        return array
+
+
+def get_product_rows_in_parallel(g1_codes: np.array, g2_codes: np.array, packed: bool, workers: int,
+                                 block_size: int = 1024) -> SharedMemoryArray:
+    """Returns all rows of edge graph product (packed into 64-bit words if packed, boolean otherwise).
+
+    Ranges of rows are split between the worker processes, each of them writes its rows block by block
+    directly into a shared memory buffer, so no rows are sent between the processes. The rows are the buffer
+    itself (not copied), the caller unlinks their shared_memory once it is not needed by other processes.
+    """
+    vertices_count = len(g1_codes) * len(g2_codes)
+    dtype = np.dtype('<u8') if packed else np.dtype(bool)
+    shape = (vertices_count, get_words_count(vertices_count) if packed else vertices_count)
+    # a few ranges per worker to even out the load, each range a whole number of blocks
+    range_size = max(block_size, -(-vertices_count // (workers * 4 * block_size)) * block_size)
+
+    shared_memory = SharedMemory(create=True, size=max(shape[0] * shape[1] * dtype.itemsize, 1))
+    try:
+        with Pool(workers) as pool:
+            pool.starmap(_fill_shared_rows, [
+                (shared_memory.name, shape, dtype.str, g1_codes, g2_codes, first_row,
+                 min(first_row + range_size, vertices_count), block_size)
+                for first_row in range(0, vertices_count, range_size)])
+    except BaseException:
+        shared_memory.close()
+        shared_memory.unlink()
+        raise
+    return SharedMemoryArray(shape, dtype, shared_memory)
+
+
+class BitSet:
+    """Set of vertices stored as bits of 64-bit words.
+
+    Supports the set operations used by the clique searches (&, |, -, len, iteration, membership),
+    intersections are word-wise and with len computed by popcount. Operands can also be Python sets.
+    """
+
+    def __init__(self, words: np.array, vertices_count: int):
+        self.words = words
+        self.vertices_count = vertices_count
+
+    @classmethod
+    def from_vertices(cls, vertices: Iterable[int], vertices_count: int) -> 'BitSet':
+        words = np.zeros(get_words_count(vertices_count), dtype='<u8')
+        for vertex in vertices:
+            words[vertex >> 6] |= np.uint64(1) << np.uint64(vertex & 63)
+        return cls(words, vertices_count)
+
+    def _words_of(self, other) -> np.array:
+        if isinstance(other, BitSet):
+            return other.words
+        return BitSet.from_vertices(other, self.vertices_count).words
+
+    def __and__(self, other) -> 'BitSet':
+        return BitSet(self.words & self._words_of(other), self.vertices_count)
+
+    def __or__(self, other) -> 'BitSet':
+        return BitSet(self.words | self._words_of(other), self.vertices_count)
+
+    def __sub__(self, other) -> 'BitSet':
+        return BitSet(self.words & ~self._words_of(other), self.vertices_count)
+
+    __rand__ = __and__
+    __ror__ = __or__
+
+    def __rsub__(self, other) -> 'BitSet':
+        return BitSet(self._words_of(other) & ~self.words, self.vertices_count)
+
+    def __len__(self) -> int:
+        return int(POPCOUNT_TABLE[self.words.view(np.uint8)].sum())
+
+    def __bool__(self) -> bool:
+        return bool(self.words.any())
+
+    def __contains__(self, vertex: int) -> bool:
+        return bool((int(self.words[vertex >> 6]) >> (vertex & 63)) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        bits = np.unpackbits(self.words.view(np.uint8), bitorder='little')
+        return iter(np.flatnonzero(bits).tolist())
+
+    def __eq__(self, other) -> bool:
+        return set(self) == set(other)
+
+
+class SparseEdgeGraphProduct:
+    """Edge graph product stored as sorted neighbor arrays (CSR), so memory grows with the number of its edges.
+
+    Vertex i * (g2 edge count) + k corresponds to the pair of i-th edge of g1 and k-th edge of g2,
+    neighbors of vertex v are indices[indptr[v]:indptr[v + 1]].
+    """
+
+    def __init__(self, indptr: np.array, indices: np.array):
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_relation_codes(cls, g1_codes: np.array, g2_codes: np.array,
+                            mask: Optional[np.array] = None) -> 'SparseEdgeGraphProduct':
+        """Returns edge graph product built row block by row block (one block per g1 edge).
+
+        With mask (boolean array of product vertices), only the edges between the vertices of the mask are
+        stored, the other vertices have no neighbors.
+        """
+        vertices_count = len(g1_codes) * len(g2_codes)
+        index_type = np.int32 if vertices_count <= np.iinfo(np.int32).max else np.int64
+
+        degrees = np.zeros(vertices_count, dtype=np.int64)
+        blocks = []
+        for g1_edge in range(len(g1_codes)):
+            if mask is None:
+                rows, columns = np.nonzero(get_product_rows(g1_codes, g2_codes, g1_edge * len(g2_codes),
+                                                            (g1_edge + 1) * len(g2_codes)))
+                degrees[g1_edge * len(g2_codes):(g1_edge + 1) * len(g2_codes)] = np.bincount(
+                    rows, minlength=len(g2_codes))
+            else:
+                # only the rows of the mask are computed
+                g2_edges = np.flatnonzero(mask[g1_edge * len(g2_codes):(g1_edge + 1) * len(g2_codes)])
+                block = (g1_codes[g1_edge][None, :, None] & g2_codes[g2_edges][:, None, :]) != 0
+                rows, columns = np.nonzero(block.reshape(len(g2_edges), vertices_count) & mask[None, :])
+                degrees[g1_edge * len(g2_codes) + g2_edges] = np.bincount(rows, minlength=len(g2_edges))
+            blocks.append(columns.astype(index_type))
+
+        indptr = np.zeros(vertices_count + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        indices = np.concatenate(blocks) if blocks else np.zeros(0, dtype=index_type)
+        return cls(indptr, indices)
+
+    @property
+    def vertices_count(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Returns (vertex count, edge count), with each undirected edge counted in both directions."""
+        return self.vertices_count, len(self.indices)
+
+    @property
+    def degrees(self) -> np.array:
+        return np.diff(self.indptr)
+
+    def vertex_set(self, vertices: Iterable[int] = ()) -> Set[int]:
+        """Returns the set of given vertices in the form used by neighbors."""
+        return set(vertices)
+
+    def all_vertices(self) -> Set[int]:
+        """Returns the set of all vertices in the form used by neighbors."""
+        return set(range(self.vertices_count))
+
+    def neighbor_array(self, vertex: int) -> np.array:
+        """Returns the sorted array of neighbors of the vertex."""
+        return self.indices[self.indptr[vertex]:self.indptr[vertex + 1]]
+
+    def neighbors(self, vertex: int) -> Set[int]:
+        """Returns the set of neighbors of the vertex."""
+        return set(self.neighbor_array(vertex).tolist())
+
+    def clique_upper_bound(self) -> int:
+        """Returns an upper bound on the size of maximum clique (greedy coloring and degree bounds)."""
+        return min(greedy_coloring_number_from_neighbors(self.neighbor_array, self.degrees),
+                   degree_clique_bound_from_degrees(self.degrees))
+
+    def maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns all maximal cliques (using Bron-Kerbosch with pivoting)."""
+        return bronKerbosch_pivot(set(), self.all_vertices(), self.vertex_set(), self.neighbors)
+
+    def approx_maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns the approximation of set of maximal cliques (one greedy clique per vertex)."""
+        return set(greedy_single_maximal_clique_from_neighbors(self.neighbors, self.vertices_count, vertex)
+                   for vertex in range(self.vertices_count))
+
+
+class ImplicitEdgeGraphProduct:
+    """Edge graph product which is never stored, neighbors are computed on demand from the edges of g1 and g2.
+
+    Vertex i * (g2 edge count) + k corresponds to the pair of i-th edge of g1 and k-th edge of g2. Only the
+    most recently used neighborhoods are kept (up to cache_size of them), so memory does not depend on the
+    number of product edges.
+    """
+
+    def __init__(self, g1_edges: np.array, g2_edges: np.array, cache_size: int = 4096):
+        """Keyword arguments:
+        g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+        g2_edges -- the same array for g2
+        cache_size -- maximal number of neighborhoods kept in memory
+        """
+        self.g1_edges = g1_edges
+        self.g2_edges = g2_edges
+        self._cached_neighbor_array = lru_cache(maxsize=cache_size)(self._get_neighbor_array)
+
+    @property
+    def vertices_count(self) -> int:
+        return len(self.g1_edges) * len(self.g2_edges)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Returns (vertex count, edge count), with each undirected edge counted in both directions."""
+        return self.vertices_count, int(self.degrees.sum())
+
+    @property
+    def degrees(self) -> np.array:
+        """Returns the degrees of all vertices, computed from the counts of relation codes of each edge."""
+        g1_code_counts = np.array([np.bincount(get_edge_relation_codes(self.g1_edges, edge), minlength=64)
+                                   for edge in range(len(self.g1_edges))]).reshape(-1, 64)
+        g2_code_counts = np.array([np.bincount(get_edge_relation_codes(self.g2_edges, edge), minlength=64)
+                                   for edge in range(len(self.g2_edges))]).reshape(-1, 64)
+        return (g1_code_counts @ COMMON_FLAG @ g2_code_counts.T).ravel()
+
+    def _get_neighbor_array(self, vertex: int) -> np.array:
+        g1_edge, g2_edge = divmod(vertex, len(self.g2_edges))
+        g1_codes = get_edge_relation_codes(self.g1_edges, g1_edge)
+        g2_codes = get_edge_relation_codes(self.g2_edges, g2_edge)
+        return np.flatnonzero((g1_codes[:, None] & g2_codes[None, :]) != 0)
+
+    def cache_info(self):
+        """Returns hits, misses and size of the neighborhood cache."""
+        return self._cached_neighbor_array.cache_info()
+
+    def vertex_set(self, vertices: Iterable[int] = ()) -> Set[int]:
+        """Returns the set of given vertices in the form used by neighbors."""
+        return set(vertices)
+
+    def all_vertices(self) -> Set[int]:
+        """Returns the set of all vertices in the form used by neighbors."""
+        return set(range(self.vertices_count))
+
+    def neighbor_array(self, vertex: int) -> np.array:
+        """Returns the sorted array of neighbors of the vertex."""
+        return self._cached_neighbor_array(vertex)
+
+    def neighbors(self, vertex: int) -> Set[int]:
+        """Returns the set of neighbors of the vertex."""
+        return set(self.neighbor_array(vertex).tolist())
+
+    def clique_upper_bound(self) -> int:
+        """Returns an upper bound on the size of maximum clique (greedy coloring and degree bounds)."""
+        degrees = self.degrees
+        return min(greedy_coloring_number_from_neighbors(self.neighbor_array, degrees),
+                   degree_clique_bound_from_degrees(degrees))
+
+    def maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns all maximal cliques (using Bron-Kerbosch with pivoting)."""
+        return bronKerbosch_pivot(set(), self.all_vertices(), self.vertex_set(), self.neighbors)
+
+    def approx_maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns the approximation of set of maximal cliques (one greedy clique per vertex)."""
+        return set(greedy_single_maximal_clique_from_neighbors(self.neighbors, self.vertices_count, vertex)
+                   for vertex in range(self.vertices_count))
+
+
+class BitsetEdgeGraphProduct:
+    """Edge graph product stored as rows of adjacency matrix packed into 64-bit words (one bit per cell).
+
+    Vertex i * (g2 edge count) + k corresponds to the pair of i-th edge of g1 and k-th edge of g2. Neighbors
+    are returned as BitSet views of the rows, so the clique search intersects them word by word and counts
+    them with popcount; best suited for dense products. Rows kept in a file (see from_relation_codes_to_memmap)
+    or in shared memory (built by several processes) are released by close, or by using the product as a context
+    manager.
+    """
+
+    def __init__(self, rows: np.array, vertices_count: int, backing_file: Optional[IO] = None,
+                 shared_memory: Optional[SharedMemory] = None, block_size: int = 1024):
+        """Keyword arguments:
+        rows -- packed rows of adjacency matrix
+        vertices_count -- number of vertices (bits used in every row)
+        block_size -- number of rows read at once when scanning all of them (f.e. for the degrees)
+        backing_file -- file the rows are mapped from, closed (and so removed if temporary) by close
+        shared_memory -- shared memory the rows are a view of, unlinked by close (and unmapped when the rows
+                         and their views are freed)
+        """
+        self.rows = rows
+        self.vertices_count = vertices_count
+        self.backing_file = backing_file
+        self.shared_memory = shared_memory
+        self.block_size = block_size
+
+    @property
+    def file_backed(self) -> bool:
+        """Returns whether the rows are mapped from a file rather than kept in memory."""
+        return self.backing_file is not None
+
+    def close(self) -> None:
+        """Releases the file or shared memory backing the rows; the product cannot be used afterwards."""
+        self.rows = None
+        if self.backing_file is not None:
+            self.backing_file.close()
+            self.backing_file = None
+        if self.shared_memory is not None:
+            self.shared_memory.unlink()
+            self.shared_memory = None
+
+    def __enter__(self) -> 'BitsetEdgeGraphProduct':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @classmethod
+    def from_relation_codes(cls, g1_codes: np.array, g2_codes: np.array, block_size: int = 1024,
+                            workers: int = 1) -> 'BitsetEdgeGraphProduct':
+        """Returns edge graph product built block_size rows at a time (in parallel if workers > 1)."""
+        vertices_count = len(g1_codes) * len(g2_codes)
+        if workers > 1:
+            rows = get_product_rows_in_parallel(g1_codes, g2_codes, True, workers, block_size)
+            return cls(rows, vertices_count, shared_memory=rows.shared_memory, block_size=block_size)
+        rows = np.zeros(shape=(vertices_count, get_words_count(vertices_count)), dtype='<u8')
+        fill_packed_rows(rows, g1_codes, g2_codes, 0, vertices_count, block_size)
+        return cls(rows, vertices_count, block_size=block_size)
+
+    @classmethod
+    def from_adjacency_matrices(cls, g1_matrix: np.array, g2_matrix: np.array) -> 'BitsetEdgeGraphProduct':
+        """Returns modular product of two simple directed graphs (see get_modular_product_rows), built one
+        g1 vertex at a time."""
+        vertices_count = len(g1_matrix) * len(g2_matrix)
+        rows = np.zeros(shape=(vertices_count, get_words_count(vertices_count)), dtype='<u8')
+        for g1_vertex in range(len(g1_matrix)):
+            rows[g1_vertex * len(g2_matrix):(g1_vertex + 1) * len(g2_matrix)] = pack_rows(
+                get_modular_product_rows(g1_matrix, g2_matrix, g1_vertex))
+        return cls(rows, vertices_count)
+
+    @classmethod
+    def from_relation_codes_to_memmap(cls, g1_codes: np.array, g2_codes: np.array, block_size: int = 1024,
+                                      directory: Optional[str] = None) -> 'BitsetEdgeGraphProduct':
+        """Returns edge graph product with packed rows written block by block to a memory-mapped file.
+
+        Only block_size rows are kept in memory while building, the clique search reads neighborhoods
+        from the mapping. The file is temporary (created in given directory, system default if None)
+        and removed when the product is closed.
+        """
+        vertices_count = len(g1_codes) * len(g2_codes)
+        backing_file = TemporaryFile(dir=directory)
+        words_count = get_words_count(vertices_count)
+        # an empty file cannot be mapped, so at least one word is allocated
+        rows = np.memmap(backing_file, dtype='<u8', mode='w+',
+                         shape=(max(vertices_count, 1), max(words_count, 1)))[:vertices_count, :words_count]
+        fill_packed_rows(rows, g1_codes, g2_codes, 0, vertices_count, block_size)
+        rows.flush()
+        return cls(rows, vertices_count, backing_file, block_size=block_size)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Returns (vertex count, edge count), with each undirected edge counted in both directions."""
+        return self.vertices_count, int(self.degrees.sum())
+
+    @property
+    def degrees(self) -> np.array:
+        """Returns the degrees of all vertices, counted block_size rows at a time (so the popcounts of a
+        memory-mapped product are never all kept in memory)."""
+        degrees = np.zeros(self.vertices_count, dtype=int)
+        for block_start in range(0, self.vertices_count, self.block_size):
+            block = self.rows[block_start:block_start + self.block_size]
+            degrees[block_start:block_start + len(block)] = POPCOUNT_TABLE[block.view(np.uint8)].sum(axis=1)
+        return degrees
+
+    def vertex_set(self, vertices: Iterable[int] = ()) -> BitSet:
+        """Returns the set of given vertices in the form used by neighbors."""
+        return BitSet.from_vertices(vertices, self.vertices_count)
+
+    def all_vertices(self) -> BitSet:
+        """Returns the set of all vertices in the form used by neighbors."""
+        return BitSet(pack_rows(np.ones(shape=(1, self.vertices_count), dtype=bool))[0], self.vertices_count)
+
+    def neighbor_array(self, vertex: int) -> np.array:
+        """Returns the sorted array of neighbors of the vertex."""
+        return np.flatnonzero(np.unpackbits(self.rows[vertex].view(np.uint8), bitorder='little'))
+
+    def neighbors(self, vertex: int) -> BitSet:
+        """Returns the set of neighbors of the vertex (a view of its row)."""
+        return BitSet(self.rows[vertex], self.vertices_count)
+
+    def common_neighbors_count(self, vertex: int, other_vertex: int) -> int:
+        """Returns the number of common neighbors of two vertices."""
+        return len(self.neighbors(vertex) & self.neighbors(other_vertex))
+
+    def clique_upper_bound(self) -> int:
+        """Returns an upper bound on the size of maximum clique (greedy coloring and degree bounds)."""
+        degrees = self.degrees
+        return min(greedy_coloring_number_from_neighbors(self.neighbor_array, degrees),
+                   degree_clique_bound_from_degrees(degrees))
+
+    def maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns all maximal cliques (using Bron-Kerbosch with pivoting on packed rows)."""
+        return bronKerbosch_pivot(set(), self.all_vertices(), self.vertex_set(), self.neighbors)
+
+    def approx_maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns the approximation of set of maximal cliques (one greedy clique per vertex)."""
+        return set(greedy_single_maximal_clique_from_neighbors(self.neighbors, self.vertices_count, vertex)
+                   for vertex in range(self.vertices_count))
+
+
+def get_slots_count(edges_count: int) -> int:
+    """Returns the number of edge slots of IncrementalEdgeGraphProduct for given number of edges (a quarter
+    more, so the rows are rebuilt once per that many added edges)."""
+    return edges_count + max(edges_count // 4, 4)
+
+
+class IncrementalEdgeGraphProduct(BitsetEdgeGraphProduct):
+    """Bit-packed edge graph product of two graphs whose edges are added and removed one at a time.
+
+    Edges of both graphs are kept in slots, vertex i * (g2 slot count) + k corresponds to the pair of the
+    edges in i-th slot of g1 and k-th slot of g2. Relation codes of free slots are 0, so their vertices have
+    no neighbors and are left out of all_vertices. Adding an edge fills a free slot and computes only the rows
+    of its vertices (one per slot of the other graph) and sets their bits in the rows of their neighbors,
+    removing it clears them; slots never move, so the vertices of the other edges keep their numbers. Without
+    a free slot the slots of the graph grow (see get_slots_count) and all rows are rebuilt.
+    """
+
+    def __init__(self, g1_edges: np.array, g2_edges: np.array, block_size: int = 1024):
+        """Keyword arguments:
+        g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+        g2_edges -- the same array for g2
+        block_size -- number of rows computed at once (bounds memory used while updating)
+        """
+        self.block_size = block_size
+        self.slot_edges = []
+        self.used = []
+        self.codes = []
+        self.slots = []
+        for edges in (g1_edges, g2_edges):
+            slots_count = get_slots_count(len(edges))
+            slot_edges = np.zeros(shape=(slots_count, 2), dtype=int)
+            slot_edges[:len(edges)] = edges
+            codes = np.zeros(shape=(slots_count, slots_count), dtype=np.uint8)
+            codes[:len(edges), :len(edges)] = get_edge_pair_relation_codes(slot_edges[:len(edges)])
+            self.slot_edges.append(slot_edges)
+            self.used.append(np.arange(slots_count) < len(edges))
+            self.codes.append(codes)
+            self.slots.append(dict((tuple(edge), slot) for slot, edge in enumerate(slot_edges[:len(edges)].tolist())))
+        self._rebuild()
+
+    def _rebuild(self):
+        vertices_count = len(self.codes[0]) * len(self.codes[1])
+        rows = np.zeros(shape=(vertices_count, get_words_count(vertices_count)), dtype='<u8')
+        fill_packed_rows(rows, self.codes[0], self.codes[1], 0, vertices_count, self.block_size)
+        super().__init__(rows, vertices_count, block_size=self.block_size)
+
+    def get_slot_vertices(self, graph: int, slot: int) -> np.array:
+        """Returns the product vertices of the edge in given slot of g1 (graph 0) or g2 (graph 1)."""
+        g2_slots_count = len(self.codes[1])
+        if graph == 0:
+            return np.arange(slot * g2_slots_count, (slot + 1) * g2_slots_count)
+        return np.arange(len(self.codes[0])) * g2_slots_count + slot
+
+    def get_vertex(self, g1_edge: Tuple[int, int], g2_edge: Tuple[int, int]) -> Optional[int]:
+        """Returns the product vertex of a pair of edges, None if any of them is not in its graph."""
+        if g1_edge not in self.slots[0] or g2_edge not in self.slots[1]:
+            return None
+        return self.slots[0][g1_edge] * len(self.codes[1]) + self.slots[1][g2_edge]
+
+    def _write_columns(self, vertices: np.array, columns: Optional[np.array] = None):
+        """Writes the bits of given (ascending) vertices in all rows, block_size rows at a time.
+
+        Columns is the boolean array of shape (vertex count, len(vertices)) with the bits, all of them are
+        cleared if it is None. Only the words holding the bits are read and written.
+        """
+        words, starts = np.unique(vertices >> 6, return_index=True)
+        bits = np.left_shift(np.uint64(1), (vertices & 63).astype(np.uint64))
+        kept_bits = ~np.bitwise_or.reduceat(bits, starts)
+        for block_start in range(0, self.vertices_count, self.block_size):
+            block_end = min(block_start + self.block_size, self.vertices_count)
+            block_words = self.rows[block_start:block_end, words] & kept_bits
+            if columns is not None:
+                block_words |= np.bitwise_or.reduceat(columns[block_start:block_end] * bits, starts, axis=1)
+            self.rows[block_start:block_end, words] = block_words
+
+    def add_edge(self, graph: int, edge: Tuple[int, int]):
+        """Adds an edge (start, end) to g1 (graph 0) or g2 (graph 1) with the product vertices it gives."""
+        if edge in self.slots[graph]:
+            return
+        free_slots = np.flatnonzero(~self.used[graph])
+        if not len(free_slots):
+            slots_count = get_slots_count(len(self.used[graph]))
+            self.slot_edges[graph] = np.concatenate([self.slot_edges[graph],
+                                                     np.zeros(shape=(slots_count - len(self.used[graph]), 2),
+                                                              dtype=int)])
+            self.used[graph] = np.concatenate([self.used[graph],
+                                               np.zeros(slots_count - len(self.used[graph]), dtype=bool)])
+            codes = np.zeros(shape=(slots_count, slots_count), dtype=np.uint8)
+            codes[:len(self.codes[graph]), :len(self.codes[graph])] = self.codes[graph]
+            self.codes[graph] = codes
+            self._rebuild()
+            free_slots = np.flatnonzero(~self.used[graph])
+        slot = int(free_slots[0])
+        edges = self.slot_edges[graph]
+        edges[slot] = edge
+        self.used[graph][slot] = True
+        self.slots[graph][edge] = slot
+        codes = self.codes[graph]
+        codes[slot] = get_relation_codes(edge[0], edge[1], edges[:, 0], edges[:, 1]) * self.used[graph]
+        codes[:, slot] = get_relation_codes(edges[:, 0], edges[:, 1], edge[0], edge[1]) * self.used[graph]
+        codes[slot, slot] = 0
+
+        # rows of the new vertices, and (the product being symmetric) the same bits in their columns
+        vertices = self.get_slot_vertices(graph, slot)
+        for block_start in range(0, len(vertices), self.block_size):
+            block_vertices = vertices[block_start:block_start + self.block_size]
+            block = get_product_vertex_rows(self.codes[0], self.codes[1], block_vertices)
+            self.rows[block_vertices] = pack_rows(block)
+            self._write_columns(block_vertices, block.T)
+
+    def remove_edge(self, graph: int, edge: Tuple[int, int]):
+        """Removes an edge (start, end) from g1 (graph 0) or g2 (graph 1) with the product vertices it gives."""
+        slot = self.slots[graph].pop(edge, None)
+        if slot is None:
+            return
+        vertices = self.get_slot_vertices(graph, slot)
+        self.rows[vertices] = 0
+        for block_start in range(0, len(vertices), self.block_size):
+            self._write_columns(vertices[block_start:block_start + self.block_size])
+        self.codes[graph][slot] = 0
+        self.codes[graph][:, slot] = 0
+        self.used[graph][slot] = False
+        self.slot_edges[graph][slot] = 0
+
+    @property
+    def vertex_mask(self) -> np.array:
+        """Returns the boolean array of the vertices of pairs of edges (not of free slots)."""
+        return np.outer(self.used[0], self.used[1]).ravel()
+
+    def all_vertices(self) -> BitSet:
+        """Returns the set of the vertices of pairs of edges in the form used by neighbors."""
+        return BitSet(pack_rows(self.vertex_mask[None, :])[0], self.vertices_count)
+
+    def approx_maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns the approximation of set of maximal cliques (one greedy clique per vertex)."""
+        return set(greedy_single_maximal_clique_from_neighbors(self.neighbors, self.vertices_count, vertex)
+                   for vertex in np.flatnonzero(self.vertex_mask).tolist())
+
+
+class ConsistentEdgeGraphProduct:
+    """Edge graph product (in any storage) restricted to the cliques mapping vertices of g1 to vertices of g2
+    one to one.
+
+    Every vertex added to a clique extends the vertex correspondence induced by the clique with the end
+    vertices of its two edges. Only the neighbors keeping it one to one are returned (a vertex is never
+    mapped to two, f.e. in triangular and y subgraphs), so the clique searches don't explore the cliques
+    which would be discarded, and vertices pairing a self-loop with an ordinary edge are left out. Without
+    self-loops every clique of the edge graph product is one to one.
+    """
+
+    def __init__(self, product: 'EdgeGraphProduct', g1_edges: np.array, g2_edges: np.array, cache_size: int = 4096):
+        """Keyword arguments:
+        product -- edge graph product of g1 and g2
+        g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+        g2_edges -- the same array for g2
+        cache_size -- maximal number of neighborhoods kept in memory
+        """
+        self.product = product
+        self.g1_edges = g1_edges
+        self.g2_edges = g2_edges
+        g1_loops = g1_edges[:, 0] == g1_edges[:, 1]
+        g2_loops = g2_edges[:, 0] == g2_edges[:, 1]
+        self._loop_pairs = (g1_loops[:, None] == g2_loops[None, :]).ravel()
+        self._cached_neighbors = lru_cache(maxsize=cache_size)(self._get_neighbors)
+
+    @property
+    def vertices_count(self) -> int:
+        return self.product.vertices_count
+
+    def _get_consistent(self, vertex: int) -> np.array:
+        """Returns the mask of vertices which keep the correspondence one to one together with the vertex."""
+        g1_edge, g2_edge = divmod(vertex, len(self.g2_edges))
+        return (get_edge_endpoint_equalities(self.g1_edges, g1_edge)[:, None] ==
+                get_edge_endpoint_equalities(self.g2_edges, g2_edge)[None, :]).ravel()
+
+    def _get_neighbors(self, vertex: int):
+        return self.product.vertex_set(self.neighbor_array(vertex).tolist())
+
+    def vertex_set(self, vertices: Iterable[int] = ()):
+        """Returns the set of given vertices in the form used by neighbors."""
+        return self.product.vertex_set(vertices)
+
+    def all_vertices(self):
+        """Returns the set of all vertices whose edges are both self-loops or both ordinary edges."""
+        return self.product.vertex_set([vertex for vertex in self.product.all_vertices() if self._loop_pairs[vertex]])
+
+    def neighbor_array(self, vertex: int) -> np.array:
+        """Returns the sorted array of neighbors of the vertex."""
+        neighbors = self.product.neighbor_array(vertex)
+        return neighbors[(self._get_consistent(vertex) & self._loop_pairs)[neighbors]]
+
+    def neighbors(self, vertex: int):
+        """Returns the set of neighbors of the vertex."""
+        return self._cached_neighbors(vertex)
+
+    def clique_upper_bound(self) -> int:
+        """Returns an upper bound on the size of maximum clique (the bound of the whole edge graph product)."""
+        return self.product.clique_upper_bound()
+
+    def maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns all maximal cliques (using Bron-Kerbosch with pivoting)."""
+        return bronKerbosch_pivot(set(), self.all_vertices(), self.vertex_set(), self.neighbors)
+
+    def approx_maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns the approximation of set of maximal cliques (one greedy clique per vertex)."""
+        return set(greedy_single_maximal_clique_from_neighbors(self.neighbors, self.vertices_count, vertex)
+                   for vertex in self.all_vertices())
+
+
+def get_symmetry_breaking_images(from_edges: np.array, to_edges: np.array, leader: int,
+                                 orbit: np.array) -> Tuple[np.array, np.array]:
+    """Returns the vertex each pair of edges (from_edges edge, to_edges edge) maps the leader vertex to (-1 if
+    it is not an end vertex of the edge), and the smallest vertex it maps any other vertex of its orbit to
+    (to_edges vertex count if none).
+
+    Arrays have shape (from_edges edge count, to_edges edge count).
+
+    Keyword arguments:
+    from_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of the graph
+                  with the leader
+    to_edges -- the same array for the other graph
+    leader -- vertex of the graph of from_edges
+    orbit -- the other vertices of the orbit of the leader
+    """
+    no_image = int(to_edges.max()) + 1
+    leader_images = np.full((len(from_edges), len(to_edges)), -1)
+    orbit_images = np.full((len(from_edges), len(to_edges)), no_image)
+    for end in (0, 1):
+        leader_images = np.where((from_edges[:, end] == leader)[:, None], to_edges[None, :, end], leader_images)
+        orbit_images = np.where(np.isin(from_edges[:, end], orbit)[:, None],
+                                np.minimum(orbit_images, to_edges[None, :, end]), orbit_images)
+    return leader_images, orbit_images
+
+
+class SymmetryBreakingEdgeGraphProduct:
+    """Edge graph product (in any storage) restricted to the cliques in which the leader vertex is mapped below
+    the other vertices of its orbit under the automorphisms of its graph.
+
+    Any common subgraph can be moved by an automorphism so that, among the vertices of the orbit it maps, the
+    leader is mapped to the smallest vertex (and it stays the same common subgraph up to symmetry). Pairs of
+    product vertices breaking that are not neighbors, so each family of equivalent cliques is searched less
+    often; at least one maximum subgraph of every such family is kept.
+    """
+
+    def __init__(self, product: 'EdgeGraphProduct', leader_images: np.array, orbit_images: np.array,
+                 cache_size: int = 4096):
+        """Keyword arguments:
+        product -- edge graph product of g1 and g2
+        leader_images -- array with the vertex each product vertex maps the leader to, -1 if none
+                         (see get_symmetry_breaking_images)
+        orbit_images -- array with the smallest vertex each product vertex maps the rest of its orbit to
+        cache_size -- maximal number of neighborhoods kept in memory
+        """
+        self.product = product
+        self.leader_images = leader_images
+        self.orbit_images = orbit_images
+        self._valid = (leader_images < 0) | (orbit_images > leader_images)
+        self._cached_neighbors = lru_cache(maxsize=cache_size)(self._get_neighbors)
+
+    @property
+    def vertices_count(self) -> int:
+        return self.product.vertices_count
+
+    def _get_neighbors(self, vertex: int):
+        return self.product.vertex_set(self.neighbor_array(vertex).tolist())
+
+    def vertex_set(self, vertices: Iterable[int] = ()):
+        """Returns the set of given vertices in the form used by neighbors."""
+        return self.product.vertex_set(vertices)
+
+    def all_vertices(self):
+        """Returns the set of all vertices of the product kept, which map the leader below its orbit."""
+        return self.product.vertex_set([vertex for vertex in self.product.all_vertices() if self._valid[vertex]])
+
+    def neighbor_array(self, vertex: int) -> np.array:
+        """Returns the sorted array of neighbors of the vertex."""
+        neighbors = self.product.neighbor_array(vertex)
+        keep = self._valid[neighbors]
+        if self.leader_images[vertex] >= 0:
+            keep &= self.orbit_images[neighbors] > self.leader_images[vertex]
+        keep &= (self.leader_images[neighbors] < 0) | (self.leader_images[neighbors] < self.orbit_images[vertex])
+        return neighbors[keep]
+
+    def neighbors(self, vertex: int):
+        """Returns the set of neighbors of the vertex."""
+        return self._cached_neighbors(vertex)
+
+    def clique_upper_bound(self) -> int:
+        """Returns an upper bound on the size of maximum clique (the bound of the whole edge graph product)."""
+        return self.product.clique_upper_bound()
+
+    def maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns all maximal cliques (using Bron-Kerbosch with pivoting)."""
+        return bronKerbosch_pivot(set(), self.all_vertices(), self.vertex_set(), self.neighbors)
+
+    def approx_maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns the approximation of set of maximal cliques (one greedy clique per vertex)."""
+        return set(greedy_single_maximal_clique_from_neighbors(self.neighbors, self.vertices_count, vertex)
+                   for vertex in self.all_vertices())
+
+
+def get_label_compatibility(g1_edges: np.array, g2_edges: np.array, g1_vertex_labels: Optional[np.array],
+                            g2_vertex_labels: Optional[np.array], g1_edge_labels: Optional[np.array],
+                            g2_edge_labels: Optional[np.array]) -> np.array:
+    """Returns the mask of pairs of edges (g1 edge, g2 edge) with the same labels, as an array of edge graph
+    product vertices.
+
+    The start vertices, the end vertices and the edges themselves have to have the same labels; vertex (edge)
+    labels are only compared if both graphs have them.
+
+    Keyword arguments:
+    g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+    g2_edges -- the same array for g2
+    g1_vertex_labels -- array with the label of each g1 vertex (or None)
+    g2_vertex_labels -- the same array for g2
+    g1_edge_labels -- matrix with the label of each g1 edge (or None)
+    g2_edge_labels -- the same matrix for g2
+    """
+    compatible = np.ones((len(g1_edges), len(g2_edges)), dtype=bool)
+    if g1_vertex_labels is not None and g2_vertex_labels is not None:
+        for end in (0, 1):
+            compatible &= g1_vertex_labels[g1_edges[:, end]][:, None] == g2_vertex_labels[g2_edges[:, end]][None, :]
+    if g1_edge_labels is not None and g2_edge_labels is not None:
+        compatible &= g1_edge_labels[g1_edges[:, 0], g1_edges[:, 1]][:, None] == \
+            g2_edge_labels[g2_edges[:, 0], g2_edges[:, 1]][None, :]
+    return compatible.ravel()
+
+
+def get_anchor_compatibility(g1_edges: np.array, g2_edges: np.array, g1_images: np.array,
+                             g2_preimages: np.array) -> np.array:
+    """Returns the mask of pairs of edges (g1 edge, g2 edge) agreeing with a partial vertex map, as an array of
+    edge graph product vertices.
+
+    An end vertex of the g1 edge mapped by the vertex map has to be paired with its image, an end vertex of the
+    g2 edge which is an image has to be paired with its preimage, all the other end vertices are free.
+
+    Keyword arguments:
+    g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+    g2_edges -- the same array for g2
+    g1_images -- array with the g2 vertex each g1 vertex is mapped to, -1 if it is not mapped
+    g2_preimages -- array with the g1 vertex mapped to each g2 vertex, -1 if none
+    """
+    compatible = np.ones((len(g1_edges), len(g2_edges)), dtype=bool)
+    for end in (0, 1):
+        images = g1_images[g1_edges[:, end]]
+        preimages = g2_preimages[g2_edges[:, end]]
+        compatible &= (images[:, None] == g2_edges[None, :, end]) | \
+            ((images[:, None] < 0) & (preimages[None, :] < 0))
+    return compatible.ravel()
+
+
+class MaskedEdgeGraphProduct:
+    """Edge graph product (in any storage) restricted to the vertices of a mask, with a set of forced vertices
+    contained in every maximal clique.
+
+    The forced vertices have to be neighbors of all the other vertices of the mask (f.e. the pairs of edges
+    between the vertices of a partial vertex map, see get_anchor_compatibility), so the search for maximal
+    cliques starts from them instead of branching on them.
+    """
+
+    def __init__(self, product: 'EdgeGraphProduct', mask: np.array, forced: Iterable[int] = (),
+                 cache_size: int = 4096):
+        """Keyword arguments:
+        product -- edge graph product of g1 and g2
+        mask -- boolean array with the product vertices kept
+        forced -- product vertices (of the mask) in every maximal clique
+        cache_size -- maximal number of neighborhoods kept in memory
+        """
+        self.product = product
+        self.mask = mask
+        self.forced = frozenset(forced)
+        self._cached_neighbors = lru_cache(maxsize=cache_size)(self._get_neighbors)
+
+    @property
+    def vertices_count(self) -> int:
+        return self.product.vertices_count
+
+    def _get_neighbors(self, vertex: int):
+        return self.product.vertex_set(self.neighbor_array(vertex).tolist())
+
+    def vertex_set(self, vertices: Iterable[int] = ()):
+        """Returns the set of given vertices in the form used by neighbors."""
+        return self.product.vertex_set(vertices)
+
+    def all_vertices(self):
+        """Returns the set of all vertices of the mask."""
+        return self.product.vertex_set([vertex for vertex in self.product.all_vertices() if self.mask[vertex]])
+
+    def neighbor_array(self, vertex: int) -> np.array:
+        """Returns the sorted array of neighbors of the vertex."""
+        neighbors = self.product.neighbor_array(vertex)
+        return neighbors[self.mask[neighbors]]
+
+    def neighbors(self, vertex: int):
+        """Returns the set of neighbors of the vertex."""
+        return self._cached_neighbors(vertex)
+
+    def clique_upper_bound(self) -> int:
+        """Returns an upper bound on the size of maximum clique (the bound of the whole edge graph product)."""
+        return self.product.clique_upper_bound()
+
+    def maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns all maximal cliques (using Bron-Kerbosch with pivoting, starting from the forced vertices)."""
+        candidates = self.all_vertices() - self.vertex_set(self.forced)
+        for vertex in self.forced:
+            candidates = candidates & self.neighbors(vertex)
+        return bronKerbosch_pivot(set(self.forced), candidates, self.vertex_set(), self.neighbors)
+
+    def approx_maximal_cliques(self) -> Set[FrozenSet[int]]:
+        """Returns the approximation of set of maximal cliques (one greedy clique per vertex)."""
+        return set(greedy_single_maximal_clique_from_neighbors(self.neighbors, self.vertices_count, vertex)
+                   for vertex in self.all_vertices())
+
+
+# Any of the edge graph product storages, all of them consumable by the clique searches
+EdgeGraphProduct = Union[SparseEdgeGraphProduct, BitsetEdgeGraphProduct, ImplicitEdgeGraphProduct,
+                         IncrementalEdgeGraphProduct, ConsistentEdgeGraphProduct, SymmetryBreakingEdgeGraphProduct,
+                         MaskedEdgeGraphProduct]
+
+
+def get_connected_neighbors(product: EdgeGraphProduct, g1_edges: np.array, g2_edges: np.array,
+                            cache_size: int = 4096) -> Callable[[int], Set[int]]:
+    """Returns a function giving the neighbors of edge graph product vertex joined to it by a c-edge.
+
+    C-edges join the pairs of edges sharing an end vertex (in g1 and so in g2), so the c-cliques correspond
+    to connected subgraphs. Neighbors are returned in the form used by product.neighbors.
+
+    Keyword arguments:
+    product -- edge graph product of g1 and g2
+    g1_edges -- array of shape (edge count, 2) with the start and the end vertex of each edge of g1
+    g2_edges -- the same array for g2
+    cache_size -- maximal number of neighborhoods kept in memory
+    """
+    @lru_cache(maxsize=cache_size)
+    def c_neighbors(vertex: int):
+        touching = (get_edge_relation_codes(g1_edges, vertex // len(g2_edges)) & ~np.uint8(EDGES_DISJOINT)) != 0
+        neighbors = product.neighbor_array(vertex)
+        return product.vertex_set(neighbors[touching[neighbors // len(g2_edges)]].tolist())
+
+    return c_neighbors
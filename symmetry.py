@@ -0,0 +1,106 @@
+from typing import Optional, Tuple
+import numpy as np
+
+
+def refine_color_pair(multi_di_graph: np.array, colors1: np.array, colors2: np.array) \
+        -> Optional[Tuple[np.array, np.array]]:
+    """Returns two colorings of the multigraph refined together until they are stable (color refinement).
+
+    Every round the color of a vertex is split by its self-loop multiplicity and the multisets of (color,
+    multiplicity) of its successors and predecessors. Both colorings are relabeled alike, so a vertex can only
+    be mapped to a vertex of the same color of the other one by an automorphism taking colors1 to colors2.
+    None is returned if the colorings stop being alike (there is no such automorphism).
+    """
+    def get_signatures(colors: np.array) -> list:
+        return [(int(colors[vertex]), int(multi_di_graph[vertex, vertex]),
+                 tuple(sorted(zip(colors[successors].tolist(), multi_di_graph[vertex, successors].tolist()))),
+                 tuple(sorted(zip(colors[predecessors].tolist(), multi_di_graph[predecessors, vertex].tolist()))))
+                for vertex, (successors, predecessors) in enumerate(neighbors)]
+
+    neighbors = [(np.flatnonzero(multi_di_graph[vertex]), np.flatnonzero(multi_di_graph[:, vertex]))
+                 for vertex in range(len(multi_di_graph))]
+    colors_count = len(np.unique(colors1))
+    while True:
+        signatures1 = get_signatures(colors1)
+        signatures2 = get_signatures(colors2)
+        if sorted(signatures1) != sorted(signatures2):
+            return None
+        labels = dict((signature, label) for label, signature in enumerate(sorted(set(signatures1))))
+        colors1 = np.array([labels[signature] for signature in signatures1], dtype=int)
+        colors2 = np.array([labels[signature] for signature in signatures2], dtype=int)
+        if len(labels) == colors_count:
+            return colors1, colors2
+        colors_count = len(labels)
+
+
+def find_automorphism(multi_di_graph: np.array, colors1: np.array, colors2: np.array) -> Optional[np.array]:
+    """Returns an automorphism of the multigraph taking coloring colors1 to colors2 (as the array of images of
+    vertices), None if there is none.
+
+    Colorings are refined and, until they are discrete, a vertex of the smallest non-singleton color is
+    individualized and tried with every vertex of that color in the other coloring (individualization and
+    refinement).
+    """
+    refined = refine_color_pair(multi_di_graph, colors1, colors2)
+    if refined is None:
+        return None
+    colors1, colors2 = refined
+    counts = np.bincount(colors1)
+    if np.all(counts == 1):
+        automorphism = np.empty(len(colors1), dtype=int)
+        automorphism[np.argsort(colors1)] = np.argsort(colors2)
+        if np.array_equal(multi_di_graph[np.ix_(automorphism, automorphism)], multi_di_graph):
+            return automorphism
+        return None
+
+    color = int(np.argmin(np.where(counts > 1, counts, len(colors1) + 1)))
+    vertex = int(np.flatnonzero(colors1 == color)[0])
+    for other_vertex in np.flatnonzero(colors2 == color):
+        individualized1 = colors1.copy()
+        individualized2 = colors2.copy()
+        individualized1[vertex] = individualized2[other_vertex] = len(colors1)
+        automorphism = find_automorphism(multi_di_graph, individualized1, individualized2)
+        if automorphism is not None:
+            return automorphism
+    return None
+
+
+def get_orbits(multi_di_graph: np.array, vertex_labels: Optional[np.array] = None,
+               edge_labels: Optional[np.array] = None) -> np.array:
+    """Returns the orbit of every vertex under the automorphisms of the multigraph (as its smallest vertex).
+
+    Vertices of the same color after color refinement are tried pairwise, each automorphism found merges the
+    orbits of all the vertices with their images. With labels, only the automorphisms keeping the labels of
+    vertices (and edges) are used.
+    """
+    vertices_count = len(multi_di_graph)
+    if edge_labels is not None:
+        # edges of different labels get different multiplicities
+        edge_codes = np.unique(edge_labels, return_inverse=True)[1].reshape(multi_di_graph.shape)
+        multi_di_graph = np.where(multi_di_graph > 0, multi_di_graph + edge_codes * (multi_di_graph.max() + 1), 0)
+    initial_colors = np.zeros(vertices_count, dtype=int) if vertex_labels is None else \
+        np.unique(vertex_labels, return_inverse=True)[1].reshape(vertices_count)
+    # orbits are kept as trees, each rooted at the smallest vertex of its orbit
+    parents = np.arange(vertices_count)
+
+    def get_root(vertex: int) -> int:
+        while parents[vertex] != vertex:
+            vertex = parents[vertex]
+        return int(vertex)
+
+    refined = refine_color_pair(multi_di_graph, initial_colors, initial_colors)
+    colors = refined[0] if refined is not None else np.arange(vertices_count)
+    for vertex in range(vertices_count):
+        for other_vertex in np.flatnonzero(colors == colors[vertex]).tolist():
+            if other_vertex <= vertex or get_root(vertex) == get_root(other_vertex):
+                continue
+            individualized1 = colors.copy()
+            individualized2 = colors.copy()
+            individualized1[vertex] = individualized2[other_vertex] = vertices_count
+            automorphism = find_automorphism(multi_di_graph, individualized1, individualized2)
+            if automorphism is None:
+                continue
+            for moved_vertex, image in enumerate(automorphism.tolist()):
+                root, image_root = get_root(moved_vertex), get_root(image)
+                parents[max(root, image_root)] = min(root, image_root)
+    return np.array([get_root(vertex) for vertex in range(vertices_count)], dtype=int)
@@ -1,4 +1,6 @@
 from typing import Tuple, cast
+import os
+import tempfile
 import unittest
 import numpy as np
 from MultiDiGraph import MultiDiGraph
@@ -177,6 +179,31 @@ class TestMultiDiGraphInstanceMethods(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+    def test_labels_of_isolated_vertices_removed(self):
+        """Should remove the labels of isolated vertices together with them."""
+        mdg = MultiDiGraph(np.array([[0, 1, 0], [0, 0, 0], [0, 0, 0]]), vertex_labels=np.array(['C', 'N', 'O']),
+                           edge_labels=np.array([['a', 'b', 'c'], ['d', 'e', 'f'], ['g', 'h', 'i']]))
+        self.assertEqual(mdg.vertex_labels.tolist(), ['C', 'N'])
+        self.assertEqual(mdg.edge_labels.tolist(), [['a', 'b'], ['d', 'e']])
+
+    def test_labels_not_matching_vertices(self):
+        """Should raise ValueError for labels of a different number of vertices."""
+        with self.assertRaises(ValueError):
+            MultiDiGraph(np.array([[0, 1], [1, 0]]), vertex_labels=np.array(['C']))
+
+    def test_labels_file(self):
+        """Should read back the written multigraph with its labels."""
+        mdg = MultiDiGraph(np.array([[0, 1, 0], [1, 0, 2], [0, 0, 0]]), vertex_labels=np.array(['C', 'N', 'C']),
+                           edge_labels=np.array([['-', 'single', '-'], ['single', '-', 'double'], ['-', '-', '-']]))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'graph.txt')
+            mdg.write_to_file(filename)
+            result = MultiDiGraph.from_file(filename)
+            self.assertTrue(np.array_equal(read_graph_from_file(filename).astype(int), mdg.adjacency_matrix))
+        self.assertTrue(np.array_equal(result.adjacency_matrix, mdg.adjacency_matrix))
+        self.assertEqual(result.vertex_labels.tolist(), ['C', 'N', 'C'])
+        self.assertEqual(result.edge_labels.tolist(), mdg.edge_labels.tolist())
+
     def test_maximal_cliques(self):
         """Should return correct maximum clique for a graph with 3 maximal cliques."""
 
@@ -291,6 +318,32 @@ class TestMaximumCliques(unittest.TestCase):
         result = self.g4.maximum_cliques()
         self.assertEqual(result, expected)
 
+    def test_warm_start_on_g1(self):
+        """Should return the same maximum cliques when warm started from the approximation."""
+        stats = {}
+        result = self.g1.maximum_cliques(warm_start=True, stats=stats)
+        self.assertEqual(result, self.g1.maximum_cliques())
+        self.assertEqual(stats['warm_start_bound'][0], 4)
+        self.assertGreater(stats['pruned_branches'], 0)
+
+    def test_warm_start_on_g4(self):
+        """Should return all the maximum cliques when warm started from the approximation."""
+        result = self.g4.maximum_cliques(warm_start=True)
+        self.assertEqual(result, self.g4.maximum_cliques())
+
+    def test_approx_gap_on_g3(self):
+        """Should return the upper bound not lower than the maximum clique size."""
+        stats = {}
+        result = self.g3.approx_maximum_cliques(stats=stats)
+        approx_size = len(next(iter(result)))
+        self.assertGreaterEqual(stats['upper_bound'], 3)
+        self.assertEqual(stats['gap'], stats['upper_bound'] - approx_size)
+
+    def test_maximum_clique_upper_bound_complete_graph(self):
+        """Should return exact bound for complete graph."""
+        mg = MultiDiGraph(matrix=np.ones(shape=(4, 4)) - np.eye(4))
+        self.assertEqual(mg.maximum_clique_upper_bound(), 4)
+
 class TestMaximalCliques(unittest.TestCase):
     def setUp(self) -> None:
         self.g1 = MultiDiGraph(read_graph_from_file(
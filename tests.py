@@ -1,9 +1,26 @@
+import os
+import tempfile
 import unittest
+from itertools import combinations, permutations
 import numpy as np
 from MultiDiGraph import MultiDiGraph
-from graph_functions import (bronKerbosch1, get_neighbors, is_symmetric, get_graph_with_n_nodes_and_m_edges,
-                             get_multigraph_from_graph)
-from maximum_subgraph import find_maximum_subgraphs
+from graph_functions import (bronKerbosch1, bronKerbosch_pivot, bronKerbosch_maximum, get_neighbors, is_symmetric,
+                             get_graph_with_n_nodes_and_m_edges, get_multigraph_from_graph, greedy_coloring_number,
+                             degree_clique_bound, get_edge_pair_relation_codes, maximal_connected_cliques,
+                             greedy_coloring_weight_bound, get_weakly_connected_components, maximum_weight_assignment)
+from maximum_subgraph import (find_maximum_subgraphs, find_maximum_induced_subgraphs, get_edge_graph_product,
+                              get_sparse_edge_graph_product, get_implicit_edge_graph_product,
+                              get_bitset_edge_graph_product, are_edge_pairs_isomorphic, get_edge_array, CliqueScorer,
+                              get_subgraph_edges, get_multisubgraph_edges, get_matrix_from_edges, get_subgraph_key,
+                              remove_duplicated, MaximumSubgraph, IncrementalMaximumSubgraphs, VertexMapScorer)
+from product_graph import (BitSet, BitsetEdgeGraphProduct, ConsistentEdgeGraphProduct, IncrementalEdgeGraphProduct,
+                           SharedMemoryArray)
+from mcsplit import get_adjacency_labels, refine_label_classes
+from greedy_expansion import get_seed_edge_pairs
+from coarsening import coarsen, get_heavy_edge_coarse_vertices
+from symmetry import get_orbits
+from product_cache import ProductGraphCache
+from distance_functions import distance_l1, distance_l2, approx_distance_l1, approx_distance_l2
 
 
 class TestCheckSymmetry(unittest.TestCase):
@@ -140,6 +157,100 @@ class TestBronKerbosch1(unittest.TestCase):
                 ValueError, bronKerbosch1, set(), nodes, set(), self.not_sym_matrix)
 
 
+    def test_pivot_disconnected(self):
+        """Should return the same maximal cliques with pivoting."""
+        nodes = set(range(len(self.sym_matrix_2)))
+        neighbors = [get_neighbors(node, self.sym_matrix_2) for node in nodes]
+        expected = bronKerbosch1(set(), nodes, set(), self.sym_matrix_2)
+
+        result = bronKerbosch_pivot(set(), nodes, set(), neighbors.__getitem__)
+        self.assertEqual(result, expected)
+
+    def test_maximum_cliques(self):
+        """Should return only the largest maximal cliques, keeping ties."""
+        nodes = set(range(len(self.sym_matrix_2)))
+        neighbors = [get_neighbors(node, self.sym_matrix_2) for node in nodes]
+        all_cliques = bronKerbosch1(set(), nodes, set(), self.sym_matrix_2)
+        largest = max(len(clique) for clique in all_cliques)
+        expected = set(clique for clique in all_cliques if len(clique) == largest)
+
+        best = {'score': (0,), 'cliques': set()}
+        stats = {}
+        bronKerbosch_maximum(set(), nodes, set(), neighbors.__getitem__, lambda clique: (len(clique),),
+                             lambda vertices: (len(vertices),), best, stats)
+        self.assertEqual(best['cliques'], expected)
+        self.assertEqual(best['score'], (largest,))
+        self.assertGreater(stats['pruned_branches'], 0)
+
+    def test_maximal_connected_cliques(self):
+        """Should return the maximal cliques connected by c-edges (here the edges joining odd and even node)."""
+        nodes = set(range(len(self.sym_matrix_2)))
+        neighbors = [get_neighbors(node, self.sym_matrix_2) for node in nodes]
+        c_neighbors = [set(neighbor for neighbor in neighbors[node] if (node + neighbor) % 2) for node in nodes]
+
+        def is_c_clique(vertices):
+            if not all(u in neighbors[v] for u, v in combinations(vertices, 2)):
+                return False
+            reached = set([vertices[0]])
+            for _ in vertices:
+                reached = reached | set(u for v in reached for u in c_neighbors[v] if u in vertices)
+            return len(reached) == len(vertices)
+
+        c_cliques = [frozenset(vertices) for size in range(1, len(nodes) + 1)
+                     for vertices in combinations(nodes, size) if is_c_clique(vertices)]
+        expected = set(clique for clique in c_cliques if not any(clique < other for other in c_cliques))
+
+        result = maximal_connected_cliques(nodes, neighbors.__getitem__, c_neighbors.__getitem__)
+        self.assertEqual(result, expected)
+
+
+class TestCliqueUpperBounds(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sym_matrix = np.array([
+            [0, 1, 0, 0, 1, 0],
+            [1, 0, 1, 0, 1, 0],
+            [0, 1, 0, 1, 0, 0],
+            [0, 0, 1, 0, 1, 1],
+            [1, 1, 0, 1, 0, 0],
+            [0, 0, 0, 1, 0, 0]])
+
+        self.complete_matrix = np.ones(shape=(5, 5)) - np.eye(5)
+
+    def test_greedy_coloring_number(self):
+        """Should color the graph with 3 colors."""
+        self.assertEqual(greedy_coloring_number(self.sym_matrix), 3)
+
+    def test_greedy_coloring_number_complete_graph(self):
+        """Should need as many colors as nodes for complete graph."""
+        self.assertEqual(greedy_coloring_number(self.complete_matrix), 5)
+
+    def test_greedy_coloring_weight_bound(self):
+        """Should bound the weight of cliques by the largest weight of every color."""
+        weights = np.array([5, 1, 2, 3, 4, 6])
+        nodes = set(range(len(self.sym_matrix)))
+        neighbors = [get_neighbors(node, self.sym_matrix) for node in nodes]
+        self.assertEqual(greedy_coloring_weight_bound(nodes, neighbors.__getitem__, weights), 13)
+        complete_neighbors = [get_neighbors(node, self.complete_matrix) for node in range(5)]
+        self.assertEqual(greedy_coloring_weight_bound(set(range(5)), complete_neighbors.__getitem__, weights), 15)
+
+    def test_maximum_weight_assignment(self):
+        """Should assign rows to distinct columns with the largest total weight, for any shape of weights."""
+        weights = np.array([[4, 1, 3], [2, 0, 5], [3, 2, 2]])
+        self.assertEqual(maximum_weight_assignment(weights), [(0, 0), (1, 2), (2, 1)])
+        self.assertEqual(maximum_weight_assignment(weights[:, :2]), [(0, 0), (2, 1)])
+        self.assertEqual(maximum_weight_assignment(weights[:2].T), [(0, 0), (2, 1)])
+
+    def test_degree_clique_bound(self):
+        """Should return the degree bound on clique size."""
+        self.assertEqual(degree_clique_bound(self.sym_matrix), 3)
+        self.assertEqual(degree_clique_bound(self.complete_matrix), 5)
+
+    def test_empty_graph(self):
+        """Should return 0 for graph without nodes."""
+        self.assertEqual(greedy_coloring_number(np.zeros(shape=(0, 0))), 0)
+        self.assertEqual(degree_clique_bound(np.zeros(shape=(0, 0))), 0)
+
+
 class TestGetNeighbors(unittest.TestCase):
     def setUp(self) -> None:
         self.g_matrix = np.array([
@@ -188,6 +299,259 @@ class TestGetNeighbors(unittest.TestCase):
         self.assertRaises(ValueError, get_neighbors, len(self.g_matrix), self.g_matrix)
 
 
+class TestEdgeGraphProduct(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng()
+
+    def get_expected_product(self, g1_edges: list, g2_edges: list) -> np.array:
+        g2_edges_count = len(g2_edges)
+        vertices_count = len(g1_edges) * g2_edges_count
+        expected = np.zeros(shape=(vertices_count, vertices_count), dtype=int)
+        for i in range(len(g1_edges)):
+            for j in range(len(g1_edges)):
+                for k in range(g2_edges_count):
+                    for l in range(g2_edges_count):
+                        if i != j and k != l and \
+                                are_edge_pairs_isomorphic(g1_edges[i], g1_edges[j], g2_edges[k], g2_edges[l]):
+                            expected[i * g2_edges_count + k][j * g2_edges_count + l] = 1
+        return expected
+
+    def test_product_of_graphs(self):
+        """Should connect product vertices exactly for isomorphic pairs of edges."""
+        g1_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(5, 5)))
+        g2_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(4, 4)))
+        result = get_edge_graph_product(g1_edges, g2_edges)
+        self.assertTrue(np.array_equal(result.adjacency_matrix, self.get_expected_product(g1_edges, g2_edges)))
+
+    def test_product_of_graphs_with_loops(self):
+        """Should connect product vertices exactly for isomorphic pairs of edges, including self-loops."""
+        g1_edges = MultiDiGraph.get_list_of_edges(np.array([
+            [1, 1, 0],
+            [1, 1, 1],
+            [0, 0, 0]
+        ]))
+        g2_edges = MultiDiGraph.get_list_of_edges(np.array([
+            [0, 1, 1],
+            [0, 1, 0],
+            [1, 0, 1]
+        ]))
+        result = get_edge_graph_product(g1_edges, g2_edges)
+        self.assertTrue(np.array_equal(result.adjacency_matrix, self.get_expected_product(g1_edges, g2_edges)))
+
+
+    def test_sparse_product(self):
+        """Should store the same edge graph product as sorted neighbor arrays."""
+        g1_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(5, 5)))
+        g2_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(4, 4)))
+        expected = get_edge_graph_product(g1_edges, g2_edges).adjacency_matrix
+        result = get_sparse_edge_graph_product(g1_edges, g2_edges)
+        self.assertEqual(result.size, (len(expected), np.sum(expected)))
+        for vertex in range(len(expected)):
+            self.assertTrue(np.array_equal(result.neighbor_array(vertex), np.flatnonzero(expected[vertex])))
+
+    def test_sparse_product_maximal_cliques(self):
+        """Should return the same maximal cliques as the dense edge graph product."""
+        g1_edges = MultiDiGraph.get_list_of_edges(np.array([
+            [0, 1, 1],
+            [1, 0, 1],
+            [0, 0, 0]
+        ]))
+        g2_edges = MultiDiGraph.get_list_of_edges(np.array([
+            [0, 1, 0],
+            [0, 0, 1],
+            [1, 1, 0]
+        ]))
+        expected = get_edge_graph_product(g1_edges, g2_edges).maximal_cliques()
+        result = get_sparse_edge_graph_product(g1_edges, g2_edges).maximal_cliques()
+        self.assertEqual(result, expected)
+
+    def test_implicit_product(self):
+        """Should compute the same neighborhoods and degrees as stored in the edge graph product."""
+        g1_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(5, 5)))
+        g2_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(4, 4)))
+        expected = get_edge_graph_product(g1_edges, g2_edges).adjacency_matrix
+        result = get_implicit_edge_graph_product(g1_edges, g2_edges, cache_size=3)
+        self.assertTrue(np.array_equal(result.degrees, expected.sum(axis=1)))
+        for vertex in range(len(expected)):
+            self.assertTrue(np.array_equal(result.neighbor_array(vertex), np.flatnonzero(expected[vertex])))
+        self.assertLessEqual(result.cache_info().currsize, 3)
+
+    def test_bitset_product(self):
+        """Should store the same edge graph product in packed rows."""
+        g1_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(5, 5)))
+        g2_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(4, 4)))
+        expected = get_edge_graph_product(g1_edges, g2_edges).adjacency_matrix
+        result = get_bitset_edge_graph_product(g1_edges, g2_edges)
+        self.assertTrue(np.array_equal(result.degrees, expected.sum(axis=1)))
+        for vertex in range(len(expected)):
+            self.assertTrue(np.array_equal(result.neighbor_array(vertex), np.flatnonzero(expected[vertex])))
+
+    def test_parallel_product(self):
+        """Should build the same dense and packed edge graph products with several worker processes."""
+        g1_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(5, 5)))
+        g2_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(4, 4)))
+        expected = get_edge_graph_product(g1_edges, g2_edges).adjacency_matrix
+        result = get_edge_graph_product(g1_edges, g2_edges, workers=2).adjacency_matrix
+        self.assertTrue(np.array_equal(result, expected))
+        expected = get_bitset_edge_graph_product(g1_edges, g2_edges).rows
+        with get_bitset_edge_graph_product(g1_edges, g2_edges, workers=2) as result:
+            self.assertTrue(isinstance(result.rows, SharedMemoryArray))
+            self.assertTrue(np.array_equal(result.rows, expected))
+
+    def test_clique_scorer(self):
+        """Should score maximal cliques mapping vertices one to one the same as the built subgraphs."""
+        m1 = get_multigraph_from_graph(self.rng.integers(low=0, high=2, size=(5, 5)), 3)
+        m2 = get_multigraph_from_graph(self.rng.integers(low=0, high=2, size=(4, 4)), 3)
+        g1_edges = MultiDiGraph.get_list_of_edges(np.minimum(m1, 1))
+        g2_edges = MultiDiGraph.get_list_of_edges(np.minimum(m2, 1))
+        score = CliqueScorer(g1_edges, g2_edges, m1, m2)
+        for clique in get_sparse_edge_graph_product(g1_edges, g2_edges).maximal_cliques():
+            edges_map = get_subgraph_edges(clique, g1_edges, g2_edges)
+            correspondence = set((edge['edge_g1'][end], edge['edge_g2'][end])
+                                 for edge in edges_map for end in ('v0', 'vf'))
+            if len(correspondence) != len(set(g1_vertex for g1_vertex, _ in correspondence)) or \
+                    len(correspondence) != len(set(g2_vertex for _, g2_vertex in correspondence)):
+                self.assertIsNone(score(clique))
+                continue
+            multisubgraph_edges_map = get_multisubgraph_edges(edges_map, m1, m2)
+            expected = MultiDiGraph(get_matrix_from_edges(multisubgraph_edges_map, 1)).size
+            self.assertEqual(score(clique), expected)
+            self.assertEqual(score.key(clique), get_subgraph_key(multisubgraph_edges_map))
+
+    def test_remove_duplicated(self):
+        """Should remove subgraphs with the same edges mapped in different order."""
+        edges_map = [{'edge_g1': {'v0': 0, 'vf': 1}, 'edge_g2': {'v0': 2, 'vf': 0}, 'count': 2},
+                     {'edge_g1': {'v0': 1, 'vf': 2}, 'edge_g2': {'v0': 0, 'vf': 1}, 'count': 1}]
+        other_edges_map = [dict(edges_map[0], count=1), edges_map[1]]
+        subgraphs = [{'multisubgraph_edge_map': edges_map},
+                     {'multisubgraph_edge_map': edges_map[::-1]},
+                     {'multisubgraph_edge_map': other_edges_map}]
+        self.assertEqual(remove_duplicated(subgraphs), [subgraphs[0], subgraphs[2]])
+
+    def test_consistent_product(self):
+        """Should return the maximal cliques among the cliques mapping vertices one to one."""
+        m1 = np.array([
+            [1, 1, 0],
+            [0, 0, 0],
+            [0, 0, 1]
+        ])
+        m2 = np.array([
+            [0, 1, 1],
+            [0, 1, 1],
+            [0, 0, 0]
+        ])
+        g1_edges = MultiDiGraph.get_list_of_edges(m1)
+        g2_edges = MultiDiGraph.get_list_of_edges(m2)
+        product = get_sparse_edge_graph_product(g1_edges, g2_edges)
+        score = CliqueScorer(g1_edges, g2_edges, m1, m2)
+        one_to_one_cliques = [frozenset(vertices) for size in range(1, product.vertices_count + 1)
+                              for vertices in combinations(range(product.vertices_count), size)
+                              if all(u in product.neighbors(v) for u, v in combinations(vertices, 2)) and
+                              score(frozenset(vertices)) is not None]
+        expected = set(clique for clique in one_to_one_cliques
+                       if not any(clique < other for other in one_to_one_cliques))
+
+        result = ConsistentEdgeGraphProduct(product, get_edge_array(g1_edges), get_edge_array(g2_edges))
+        self.assertEqual(result.maximal_cliques(), expected)
+        self.assertTrue(all(score(clique) is not None for clique in result.approx_maximal_cliques()))
+
+    def test_modular_product(self):
+        """Should connect pairs of vertices with the same edges between them in both directions."""
+        m1 = self.rng.integers(low=0, high=2, size=(4, 4))
+        m2 = self.rng.integers(low=0, high=2, size=(3, 3))
+        result = BitsetEdgeGraphProduct.from_adjacency_matrices(m1, m2)
+        for (u, x), (v, y) in combinations([(u, x) for u in range(4) for x in range(3)], 2):
+            expected = u != v and x != y and m1[u, u] == m2[x, x] and m1[v, v] == m2[y, y] and \
+                m1[u, v] == m2[x, y] and m1[v, u] == m2[y, x]
+            self.assertEqual(v * 3 + y in result.neighbors(u * 3 + x), expected)
+
+    def test_memmap_product(self):
+        """Should write the same packed rows block by block into a memory-mapped file."""
+        g1_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(5, 5)))
+        g2_edges = MultiDiGraph.get_list_of_edges(self.rng.integers(low=0, high=2, size=(4, 4)))
+        expected = get_bitset_edge_graph_product(g1_edges, g2_edges)
+        with BitsetEdgeGraphProduct.from_relation_codes_to_memmap(
+                get_edge_pair_relation_codes(get_edge_array(g1_edges)),
+                get_edge_pair_relation_codes(get_edge_array(g2_edges)), block_size=3) as result:
+            self.assertTrue(isinstance(result.rows, np.memmap))
+            self.assertTrue(result.file_backed)
+            self.assertTrue(np.array_equal(np.asarray(result.rows), expected.rows))
+            # degrees are counted 3 rows at a time
+            self.assertEqual(result.degrees.tolist(),
+                             [len(expected.neighbor_array(vertex)) for vertex in range(expected.vertices_count)])
+            self.assertEqual(result.size, expected.size)
+            backing_file = result.backing_file
+        self.assertTrue(backing_file.closed)
+        self.assertIsNone(result.rows)
+
+    def test_bitset_product_maximal_cliques(self):
+        """Should return the same maximal cliques as the sparse edge graph product."""
+        g1_edges = MultiDiGraph.get_list_of_edges(np.array([
+            [0, 1, 1, 0],
+            [1, 0, 1, 1],
+            [0, 0, 0, 1],
+            [1, 0, 0, 0]
+        ]))
+        g2_edges = MultiDiGraph.get_list_of_edges(np.array([
+            [0, 1, 0],
+            [0, 0, 1],
+            [1, 1, 0]
+        ]))
+        expected = get_sparse_edge_graph_product(g1_edges, g2_edges).maximal_cliques()
+        result = get_bitset_edge_graph_product(g1_edges, g2_edges).maximal_cliques()
+        self.assertEqual(result, expected)
+
+    def test_incremental_product(self):
+        """Should keep the same edges between pairs of edges as the product built from the current edges."""
+        m1 = self.rng.integers(low=0, high=2, size=(4, 4))
+        m2 = self.rng.integers(low=0, high=2, size=(4, 4))
+        result = IncrementalEdgeGraphProduct(np.argwhere(m1), np.argwhere(m2), block_size=5)
+        for graph, matrix in [(0, m1), (1, m2)] * 8:
+            start, end = self.rng.integers(low=0, high=4, size=2)
+            if matrix[start, end]:
+                result.remove_edge(graph, (int(start), int(end)))
+            else:
+                result.add_edge(graph, (int(start), int(end)))
+            matrix[start, end] = 1 - matrix[start, end]
+            g1_edges, g2_edges = np.argwhere(m1), np.argwhere(m2)
+            expected = get_sparse_edge_graph_product(MultiDiGraph.get_list_of_edges(m1),
+                                                     MultiDiGraph.get_list_of_edges(m2))
+            vertices = [result.get_vertex(tuple(g1_edge), tuple(g2_edge)) for g1_edge in g1_edges.tolist()
+                        for g2_edge in g2_edges.tolist()]
+            self.assertEqual(set(result.all_vertices()), set(vertices))
+            for vertex, other_vertex in combinations(range(len(vertices)), 2):
+                self.assertEqual(vertices[other_vertex] in result.neighbors(vertices[vertex]),
+                                 other_vertex in expected.neighbors(vertex))
+
+
+class TestBitSet(unittest.TestCase):
+    def setUp(self) -> None:
+        self.first = BitSet.from_vertices([0, 3, 64, 130], 131)
+        self.second = BitSet.from_vertices([3, 5, 130], 131)
+
+    def test_operations(self):
+        """Should behave like a set of vertices."""
+        self.assertEqual(set(self.first & self.second), {3, 130})
+        self.assertEqual(set(self.first | self.second), {0, 3, 5, 64, 130})
+        self.assertEqual(set(self.first - self.second), {0, 64})
+        self.assertEqual(len(self.first), 4)
+        self.assertTrue(64 in self.first)
+        self.assertFalse(5 in self.first)
+
+    def test_operations_with_python_set(self):
+        """Should accept Python sets as operands."""
+        self.assertEqual(set(self.first - {0, 1}), {3, 64, 130})
+        self.assertEqual(set({64, 65} & self.first), {64})
+        self.assertEqual(set({1} | self.second), {1, 3, 5, 130})
+
+    def test_empty(self):
+        """Should be false and of length 0 when empty."""
+        empty = self.first - self.first
+        self.assertFalse(empty)
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(list(empty), [])
+
+
 class TestMaximumSubgraph(unittest.TestCase):
     def setUp(self) -> None:
         self.multidigraph_3_no_edges = MultiDiGraph(np.array([
@@ -288,11 +652,25 @@ class TestMaximumSubgraph(unittest.TestCase):
 
     def test_no_subgraph(self):
         """Should not return any subgraph."""
-        expected = None
+        expected = []
         clique_finding_time, result = find_maximum_subgraphs(self.multidigraph_3_1, self.multidigraph_3_no_edges)
         self.assertEqual(result, expected)
         self.assertEqual(clique_finding_time, 0)
 
+    def test_no_common_edge(self):
+        """Should not return any subgraph when the only edges are a loop and a non-loop edge."""
+        g1 = MultiDiGraph(np.array([[1, 0], [0, 0]]), remove_isolated_vertices=False)
+        g2 = MultiDiGraph(np.array([[0, 1], [0, 0]]))
+        for options in ({}, {'approximate': True}, {'maximum_only': True}, {'weighted': True},
+                        {'connected': True}, {'storage': 'bitset'}, {'engine': 'multilevel'},
+                        {'engine': 'greedy_expansion'}, {'components': True}):
+            with self.subTest(**options):
+                _, result = find_maximum_subgraphs(g1, g2, **options)
+                self.assertEqual(result, [])
+        for distance_function in (distance_l1, distance_l2, approx_distance_l1, approx_distance_l2):
+            distance, _ = distance_function(g1, g2)
+            self.assertEqual(distance, 1.0)
+
     def test_triangular_y_subgraph(self):
         """Should return correct subgraphs."""
         # only triangular and y
@@ -318,6 +696,517 @@ class TestMaximumSubgraph(unittest.TestCase):
         self.assertTrue(any(np.array_equal(subgraph['multi_di_subgraph'].adjacency_matrix, expected) for subgraph in result))
         self.assertTrue(type(clique_finding_time) is float)
 
+    def test_warm_start(self):
+        """Should return the same subgraphs when warm started from the approximation."""
+        stats = {}
+        _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2)
+        clique_finding_time, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2,
+                                                             warm_start=True, stats=stats)
+        self.assertEqual(len(result), len(expected))
+        for subgraph in expected:
+            self.assertTrue(any(np.array_equal(subgraph['multi_di_subgraph'].adjacency_matrix,
+                                               other['multi_di_subgraph'].adjacency_matrix) for other in result))
+        self.assertTrue(stats['warm_start_bound'] <= result[0]['multi_di_subgraph'].size)
+        self.assertTrue(type(clique_finding_time) is float)
+
+    def test_lazy_result(self):
+        """Should compute result fields on first access, keeping dictionary access."""
+        _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2)
+        subgraph = result[0]
+        self.assertTrue(isinstance(subgraph, MaximumSubgraph))
+        self.assertIsNone(subgraph._graph_1_with_only_subgraph_edges)
+        self.assertEqual(subgraph.size, subgraph['multi_di_subgraph'].size)
+        self.assertIsNone(subgraph._graph_1_with_only_subgraph_edges)
+        matrix = subgraph['graph_1_with_only_subgraph_edges']
+        self.assertEqual(matrix.shape, (self.multidigraph_6_1.size[0], self.multidigraph_6_1.size[0]))
+        self.assertIs(subgraph.graph_1_with_only_subgraph_edges, matrix)
+        self.assertEqual(matrix.sum(), subgraph.size[1])
+        self.assertIn('printable_vertex_map', subgraph)
+        self.assertEqual(set(subgraph.keys()), set(subgraph))
+        self.assertIsNone(subgraph.get('unknown'))
+        with self.assertRaises(KeyError):
+            subgraph['unknown']
+
+    def test_maximum_only(self):
+        """Should return the same subgraphs when searching only for the maximum ones."""
+        for multidigraph1, multidigraph2 in ((self.multidigraph_6_1, self.multidigraph_6_2),
+                                             (self.multidigraph_triangular_extended, self.multidigraph_y_extended)):
+            stats = {}
+            _, expected = find_maximum_subgraphs(multidigraph1, multidigraph2)
+            _, result = find_maximum_subgraphs(multidigraph1, multidigraph2, maximum_only=True, stats=stats)
+            self.assertEqual(len(result), len(expected))
+            for subgraph in expected:
+                self.assertTrue(any(np.array_equal(subgraph['multi_di_subgraph'].adjacency_matrix,
+                                                   other['multi_di_subgraph'].adjacency_matrix) for other in result))
+            self.assertEqual(stats['maximum_score'], result[0]['multi_di_subgraph'].size)
+
+    def test_connected_only(self):
+        """Should return weakly connected subgraphs, no larger than the maximum subgraphs."""
+        _, maximum = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2)
+        for approximate in (True, False):  # the greedy c-cliques are random, the exact result is checked last
+            _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2,
+                                               approximate=approximate, connected=True)
+            for subgraph in result:
+                matrix = subgraph['multi_di_subgraph'].adjacency_matrix
+                vertices = set(np.flatnonzero(matrix.sum(axis=0) + matrix.sum(axis=1)))
+                reached = set([min(vertices)])
+                for _ in vertices:
+                    reached = reached | set(u for v in reached for u in vertices if matrix[u, v] or matrix[v, u])
+                self.assertEqual(reached, vertices)
+                self.assertLessEqual(subgraph.size, maximum[0].size)
+        self.assertEqual(result[0].size, (5, 4))
+
+    def test_modular_product_engine(self):
+        """Should return induced common subgraphs, the whole graph for the same graphs."""
+        _, result = find_maximum_induced_subgraphs(self.multidigraph_3_1, self.multidigraph_3_1)
+        self.assertTrue(any(np.array_equal(subgraph['multi_di_subgraph'].adjacency_matrix,
+                                           self.multidigraph_3_1.adjacency_matrix) for subgraph in result))
+
+        m1 = self.multidigraph_triangular_extended.adjacency_matrix
+        m2 = self.multidigraph_y_extended.adjacency_matrix
+        for approximate in (False, True):
+            stats = {}
+            _, result = find_maximum_induced_subgraphs(self.multidigraph_triangular_extended,
+                                                       self.multidigraph_y_extended, approximate=approximate,
+                                                       stats=stats)
+            for subgraph in result:
+                vertex_map = dict((g1_vertex, g2_vertex) for _, g1_vertex, g2_vertex in
+                                  subgraph['printable_vertex_map'])
+                g1_vertices = list(vertex_map)
+                g2_vertices = [vertex_map[vertex] for vertex in g1_vertices]
+                self.assertTrue(np.array_equal(m1[np.ix_(g1_vertices, g1_vertices)] > 0,
+                                               m2[np.ix_(g2_vertices, g2_vertices)] > 0))
+        self.assertEqual(result[0].size, (3, 4))
+        self.assertTrue(result[0].size <= stats['subgraph_size_upper_bound'])
+
+    def test_induced_engines_not_for_distances(self):
+        """Should raise ValueError for the engines of induced subgraphs used for the maximum subgraphs or distances."""
+        with self.assertRaises(ValueError):
+            find_maximum_subgraphs(self.multidigraph_3_1, self.multidigraph_3_2, engine='modular_product')
+        with self.assertRaises(ValueError):
+            approx_distance_l2(self.multidigraph_3_1, self.multidigraph_3_2, engine='mcsplit')
+        with self.assertRaises(ValueError):
+            approx_distance_l1(self.multidigraph_3_1, self.multidigraph_3_2, engine='modular_product')
+        with self.assertRaises(ValueError):
+            find_maximum_induced_subgraphs(self.multidigraph_3_1, self.multidigraph_3_2, engine='edge_product')
+
+    def test_mcsplit_engine(self):
+        """Should return the same subgraphs as the modular product engine."""
+        for multidigraph1, multidigraph2 in ((self.multidigraph_6_1, self.multidigraph_6_2),
+                                             (self.multidigraph_triangular_extended, self.multidigraph_y_extended),
+                                             (self.multidigraph_3_1, self.multidigraph_3_2)):
+            stats = {}
+            _, expected = find_maximum_induced_subgraphs(multidigraph1, multidigraph2)
+            _, result = find_maximum_induced_subgraphs(multidigraph1, multidigraph2, engine='mcsplit',
+                                                       stats=stats)
+            self.assertEqual(set(get_subgraph_key(subgraph['multisubgraph_edge_map']) for subgraph in result),
+                             set(get_subgraph_key(subgraph['multisubgraph_edge_map']) for subgraph in expected))
+            self.assertEqual(stats['maximum_score'], result[0].size)
+
+    def test_refine_label_classes(self):
+        """Should split label classes by the adjacency to the mapped vertices."""
+        di_graph1 = MultiDiGraph.get_graph_from_multigraph(self.multidigraph_6_1.adjacency_matrix)
+        di_graph2 = MultiDiGraph.get_graph_from_multigraph(self.multidigraph_6_2.adjacency_matrix)
+        result = refine_label_classes([(np.arange(6), np.arange(6))], get_adjacency_labels(di_graph1),
+                                      get_adjacency_labels(di_graph2), 1, 1)
+        self.assertEqual([(g1_class.tolist(), g2_class.tolist()) for g1_class, g2_class in result],
+                         [([4, 5], [4, 5]), ([2, 3], [2, 3]), ([0], [0])])
+
+    def test_greedy_expansion_engine(self):
+        """Should grow common subgraphs no larger than the maximum ones, the whole graph for the same graphs."""
+        _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_1, engine='greedy_expansion')
+        self.assertEqual(result[0].size, self.multidigraph_6_1.size)
+
+        stats = {}
+        _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2)
+        _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, engine='greedy_expansion',
+                                           stats=stats)
+        for subgraph in result:
+            self.assertLessEqual(subgraph.size, expected[0].size)
+            for g1_start, g1_end, g2_start, g2_end, count in subgraph.mapped_edges.tolist():
+                self.assertEqual(count, min(self.multidigraph_6_1.adjacency_matrix[g1_start, g1_end],
+                                            self.multidigraph_6_2.adjacency_matrix[g2_start, g2_end]))
+        self.assertGreater(stats['seeds'], 0)
+
+    def test_seed_edge_pairs(self):
+        """Should pair every seed edge with the edge of the most similar degrees and multiplicity."""
+        m1 = self.multidigraph_3_1.adjacency_matrix
+        self.assertEqual(get_seed_edge_pairs(m1, m1, 2), [((0, 1), (0, 1)), ((1, 0), (1, 0))])
+
+    def test_greedy_expansion_one_to_one(self):
+        """Should never map two g1 vertices to one g2 vertex, so the subgraph is within the upper bound."""
+        multidigraph1 = MultiDiGraph(np.array([
+            [0, 0, 0, 0, 0],
+            [0, 0, 3, 0, 0],
+            [0, 3, 0, 0, 0],
+            [0, 0, 0, 0, 3],
+            [0, 0, 2, 0, 2],
+        ]))
+        multidigraph2 = MultiDiGraph(np.array([[0, 0], [0, 3]]), remove_isolated_vertices=False)
+        # self-loops are only paired with self-loops (isolated vertex 0 of g1 is removed)
+        self.assertEqual(get_seed_edge_pairs(multidigraph1.adjacency_matrix, multidigraph2.adjacency_matrix, 8),
+                         [((3, 3), (1, 1))])
+        stats = {}
+        _, result = find_maximum_subgraphs(multidigraph1, multidigraph2, engine='greedy_expansion', stats=stats)
+        self.assertEqual(result[0].size, (1, 2))
+        self.assertLessEqual(result[0].size, stats['subgraph_size_upper_bound'])
+
+        score = VertexMapScorer(multidigraph1.adjacency_matrix, multidigraph2.adjacency_matrix)
+        self.assertIsNone(score(frozenset([1 * 2 + 1, 2 * 2 + 1])))
+
+    def test_multilevel_engine(self):
+        """Should find common subgraphs no larger than the maximum ones, the whole graph for the same graphs up to
+        the order of vertices."""
+        ring = np.roll(np.eye(24, dtype=int), 1, axis=1) + 2 * np.roll(np.eye(24, dtype=int), 5, axis=1)
+        permutation = np.random.default_rng(0).permutation(24)
+        stats = {}
+        _, result = find_maximum_subgraphs(MultiDiGraph(ring), MultiDiGraph(ring[np.ix_(permutation, permutation)]),
+                                           engine='multilevel', stats=stats)
+        self.assertEqual(result[0].size, (24, 72))
+        self.assertGreater(stats['levels'], 1)
+
+        stats = {}
+        _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2)
+        _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, engine='multilevel',
+                                           stats=stats)
+        for subgraph in result:
+            self.assertLessEqual(subgraph.size, expected[0].size)
+            for g1_start, g1_end, g2_start, g2_end, count in subgraph.mapped_edges.tolist():
+                self.assertEqual(count, min(self.multidigraph_6_1.adjacency_matrix[g1_start, g1_end],
+                                            self.multidigraph_6_2.adjacency_matrix[g2_start, g2_end]))
+        upper_bound = stats['subgraph_size_upper_bound']
+        self.assertTrue(expected[0].size[0] <= upper_bound[0] and expected[0].size[1] <= upper_bound[1])
+
+    def test_multilevel_small_graphs(self):
+        """Should find a common subgraph of graphs below the coarsest size whenever they have a common edge."""
+        for multidigraph1 in (self.multidigraph_6_1, self.multidigraph_6_2):
+            for multidigraph2 in (self.multidigraph_triangular, self.multidigraph_y,
+                                  self.multidigraph_triangular_extended, self.multidigraph_y_extended):
+                for g1, g2 in ((multidigraph1, multidigraph2), (multidigraph2, multidigraph1)):
+                    stats = {}
+                    _, expected = find_maximum_subgraphs(g1, g2)
+                    _, result = find_maximum_subgraphs(g1, g2, engine='multilevel', stats=stats)
+                    self.assertEqual(stats['levels'], 1)
+                    self.assertTrue(result)
+                    self.assertLessEqual(result[0].size, expected[0].size)
+
+    def test_coarsen(self):
+        """Should merge about half of the vertices, summing the multiplicities of their edges."""
+        m = self.multidigraph_6_1.adjacency_matrix
+        coarse_vertices = get_heavy_edge_coarse_vertices(m)
+        self.assertLessEqual(coarse_vertices.max() + 1, 3)
+        coarse_graph = coarsen(m, coarse_vertices)
+        self.assertEqual(coarse_graph.sum(), m.sum())
+        for start, end in np.argwhere(m).tolist():
+            self.assertGreaterEqual(coarse_graph[coarse_vertices[start], coarse_vertices[end]], m[start, end])
+
+    def test_unknown_engine(self):
+        """Should raise ValueError for unknown maximum subgraph engine."""
+        with self.assertRaises(ValueError):
+            find_maximum_subgraphs(self.multidigraph_3_1, self.multidigraph_3_2, engine='unknown')
+
+    def test_weighted(self):
+        """Should return the subgraphs with the most multiedges, the same as found among all maximal cliques."""
+        multidigraph1 = MultiDiGraph(np.array([
+            [0, 1, 0, 0],
+            [0, 0, 5, 0],
+            [0, 0, 0, 1],
+            [0, 0, 0, 0]
+        ]))
+        multidigraph2 = MultiDiGraph(np.array([
+            [0, 5, 0, 0],
+            [0, 0, 1, 0],
+            [0, 0, 0, 0],
+            [0, 0, 1, 0]
+        ]))
+        _, result = find_maximum_subgraphs(multidigraph1, multidigraph2)
+        self.assertEqual(result[0].size, (4, 2))
+        stats = {}
+        _, result = find_maximum_subgraphs(multidigraph1, multidigraph2, weighted=True, stats=stats)
+        self.assertEqual([subgraph.size for subgraph in result], [(3, 6)])
+        self.assertEqual(stats['maximum_score'], (6, 3))
+        _, warm_started = find_maximum_subgraphs(multidigraph1, multidigraph2, weighted=True, warm_start=True)
+        self.assertEqual(set(get_subgraph_key(subgraph['multisubgraph_edge_map']) for subgraph in warm_started),
+                         set(get_subgraph_key(subgraph['multisubgraph_edge_map']) for subgraph in result))
+
+    def test_orbits(self):
+        """Should put all vertices of a directed cycle in one orbit, every vertex of a directed path in its own."""
+        cycle = np.roll(np.eye(5, dtype=int), 1, axis=1)
+        self.assertEqual(get_orbits(cycle).tolist(), [0, 0, 0, 0, 0])
+        path = np.eye(4, k=1, dtype=int)
+        self.assertEqual(get_orbits(path).tolist(), [0, 1, 2, 3])
+        star = np.array([[0, 1, 1], [0, 0, 0], [0, 0, 0]])
+        self.assertEqual(get_orbits(star).tolist(), [0, 1, 1])
+
+    def test_symmetry_breaking(self):
+        """Should return maximum subgraphs of the same size, fewer of them for symmetric graphs."""
+        cycle = MultiDiGraph(np.roll(np.eye(5, dtype=int), 1, axis=1))
+        _, expected = find_maximum_subgraphs(cycle, cycle)
+        _, result = find_maximum_subgraphs(cycle, cycle, symmetry_breaking=True)
+        self.assertEqual(result[0].size, expected[0].size)
+        self.assertLess(len(result), len(expected))
+        expected_keys = set(get_subgraph_key(subgraph['multisubgraph_edge_map']) for subgraph in expected)
+        for subgraph in result:
+            self.assertIn(get_subgraph_key(subgraph['multisubgraph_edge_map']), expected_keys)
+
+        _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, maximum_only=True)
+        _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, maximum_only=True,
+                                           symmetry_breaking=True)
+        self.assertEqual(result[0].size, expected[0].size)
+
+    def test_components(self):
+        """Should join the subgraphs of assigned pairs of components, solving identical pairs once."""
+        cycle = np.roll(np.eye(3, dtype=int), 1, axis=1)
+        path = 2 * np.eye(3, k=1, dtype=int)
+        self.assertEqual([component.tolist() for component in get_weakly_connected_components(
+            np.block([[cycle, np.zeros((3, 3), dtype=int)], [np.zeros((3, 3), dtype=int), path]]))],
+            [[0, 1, 2], [3, 4, 5]])
+
+        multidigraph1 = MultiDiGraph(np.block([
+            [cycle, np.zeros((3, 6), dtype=int)],
+            [np.zeros((3, 3), dtype=int), path, np.zeros((3, 3), dtype=int)],
+            [np.zeros((3, 6), dtype=int), cycle]
+        ]))
+        multidigraph2 = MultiDiGraph(np.block([
+            [path, np.zeros((3, 3), dtype=int)],
+            [np.zeros((3, 3), dtype=int), cycle]
+        ]))
+        stats = {}
+        _, result = find_maximum_subgraphs(multidigraph1, multidigraph2, components=True, stats=stats)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].size, multidigraph2.size)
+        self.assertEqual(stats, {'component_pairs': 6, 'solved_component_pairs': 4})
+        _, expected = find_maximum_subgraphs(multidigraph1, multidigraph2, maximum_only=True)
+        self.assertEqual(result[0].size, expected[0].size)
+
+    def test_vertex_map(self):
+        """Should return the maximum subgraphs extending the vertex map, of maximum size if it is a maximum one."""
+        _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, maximum_only=True)
+        vertex_map = dict(list((g1_vertex, g2_vertex) for _, g1_vertex, g2_vertex in
+                               expected[0].printable_vertex_map)[:2])
+        for kwargs in ({}, {'maximum_only': True}, {'approximate': True}):
+            _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, vertex_map=vertex_map,
+                                               **kwargs)
+            if not kwargs:
+                self.assertEqual(result[0].size, expected[0].size)
+            for subgraph in result:
+                g1_images = dict((g1_vertex, g2_vertex) for _, g1_vertex, g2_vertex in subgraph.printable_vertex_map)
+                g2_preimages = dict((g2_vertex, g1_vertex) for g1_vertex, g2_vertex in g1_images.items())
+                for g1_vertex, g2_vertex in vertex_map.items():
+                    self.assertEqual(g1_images.get(g1_vertex, g2_vertex), g2_vertex)
+                    self.assertEqual(g2_preimages.get(g2_vertex, g1_vertex), g1_vertex)
+
+    def test_invalid_vertex_map(self):
+        """Should raise ValueError for vertex map not one to one or used with other engines."""
+        with self.assertRaises(ValueError):
+            find_maximum_subgraphs(self.multidigraph_3_1, self.multidigraph_3_2, vertex_map={0: 1, 1: 1})
+        with self.assertRaises(ValueError):
+            find_maximum_subgraphs(self.multidigraph_3_1, self.multidigraph_3_2, vertex_map={0: 1},
+                                   engine='greedy_expansion')
+
+    def test_labels(self):
+        """Should only map edges with the same labels of their vertices and themselves."""
+        matrix = np.array([
+            [0, 1, 0],
+            [0, 0, 1],
+            [1, 0, 0]
+        ])
+        _, result = find_maximum_subgraphs(MultiDiGraph(matrix), MultiDiGraph(matrix))
+        self.assertEqual(result[0].size, (3, 3))
+        multidigraph1 = MultiDiGraph(matrix, vertex_labels=np.array(['C', 'C', 'N']))
+        multidigraph2 = MultiDiGraph(matrix, vertex_labels=np.array(['C', 'N', 'N']))
+        for storage in ('sparse', 'bitset', 'implicit'):
+            _, result = find_maximum_subgraphs(multidigraph1, multidigraph2, storage=storage)
+            # 1 -> 2 (C -> N) is paired with 0 -> 1, 2 -> 0 (N -> C) with 2 -> 0
+            self.assertEqual(sorted(subgraph.mapped_edges[:, :4].tolist() for subgraph in result),
+                             [[[1, 2, 0, 1]], [[2, 0, 2, 0]]])
+        edge_labels = np.array([['-', 'a', '-'], ['-', '-', 'b'], ['a', '-', '-']])
+        _, result = find_maximum_subgraphs(MultiDiGraph(matrix, edge_labels=edge_labels),
+                                           MultiDiGraph(matrix, edge_labels=edge_labels))
+        self.assertEqual(result[0].size, (3, 3))
+        _, result = find_maximum_subgraphs(MultiDiGraph(matrix, edge_labels=edge_labels),
+                                           MultiDiGraph(matrix, edge_labels=np.full((3, 3), 'a')))
+        self.assertEqual(result[0].size, (3, 2))
+
+    def test_product_cache(self):
+        """Should return the same subgraphs with edge graph product loaded from the on-disk cache."""
+        for storage in ('sparse', 'bitset'):
+            _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, storage=storage)
+            with tempfile.TemporaryDirectory() as directory:
+                product_cache = ProductGraphCache(directory)
+                for hit in (False, True):
+                    stats = {}
+                    _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, stats=stats,
+                                                       storage=storage, product_cache=product_cache)
+                    self.assertEqual(stats['product_cache_hit'], hit)
+                    self.assertEqual(sorted(subgraph.mapped_edges.tolist() for subgraph in result),
+                                     sorted(subgraph.mapped_edges.tolist() for subgraph in expected))
+                self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_product_cache_eviction(self):
+        """Should keep only the most recently stored product over the size limit."""
+        with tempfile.TemporaryDirectory() as directory:
+            product_cache = ProductGraphCache(directory, max_bytes=1)
+            find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, product_cache=product_cache)
+            find_maximum_subgraphs(self.multidigraph_6_2, self.multidigraph_6_1, product_cache=product_cache)
+            key = product_cache.get_key(self.multidigraph_6_2, self.multidigraph_6_1, 'auto')
+            self.assertEqual(os.listdir(directory), [f'{key}.npz'])
+
+    def test_incremental_maximum_subgraphs(self):
+        """Should return maximum subgraphs after every edge update, also when an update isolates a vertex."""
+        def get_maximum_size(matrix1: np.array, matrix2: np.array) -> tuple:
+            # every g1 vertex is mapped to a g2 vertex (or an added isolated one), all common edges are kept
+            matrix2 = np.pad(matrix2, (0, max(0, len(matrix1) - len(matrix2))))
+            maximum_size = (0, 0)
+            for g2_vertices in permutations(range(len(matrix2)), len(matrix1)):
+                counts = np.minimum(matrix1, matrix2[np.ix_(g2_vertices, g2_vertices)])
+                maximum_size = max(maximum_size, (int(np.count_nonzero(counts.any(axis=0) | counts.any(axis=1))),
+                                                  int(counts.sum())))
+            return maximum_size
+
+        incremental = IncrementalMaximumSubgraphs(self.multidigraph_6_1, self.multidigraph_6_2)
+        # removing 4 -> 5 from g1 and g2 leaves their vertex 5 isolated
+        for graph_num, start, end, add in [(2, 3, 4, False), (1, 0, 1, True), (2, 4, 1, True),
+                                           (1, 2, 2, True), (2, 2, 2, True), (1, 0, 1, False),
+                                           (1, 0, 1, False), (2, 0, 3, True), (1, 4, 5, False),
+                                           (2, 4, 5, False)]:
+            if add:
+                incremental.add_edge(graph_num, start, end)
+            else:
+                incremental.remove_edge(graph_num, start, end)
+            matrix1, matrix2 = incremental.adjacency_matrices
+            stats = {}
+            result = incremental.find_maximum_subgraphs(stats)
+            self.assertEqual(result[0].size, get_maximum_size(matrix1, matrix2))
+            for subgraph in result:
+                self.assertEqual(subgraph.size, result[0].size)
+                for g1_start, g1_end, g2_start, g2_end, count in subgraph.mapped_edges.tolist():
+                    self.assertGreater(count, 0)
+                    self.assertEqual(count, min(matrix1[g1_start, g1_end], matrix2[g2_start, g2_end]))
+            self.assertLessEqual(stats['warm_start_bound'], result[0].size)
+
+            # graphs with the isolated vertices kept are compared the same way
+            _, expected = find_maximum_subgraphs(incremental.multi_di_graph1, incremental.multi_di_graph2,
+                                                 maximum_only=True)
+            self.assertEqual(expected[0].size, result[0].size)
+        self.assertFalse(incremental.adjacency_matrices[0][5].any() or incremental.adjacency_matrices[0][:, 5].any())
+        self.assertRaises(ValueError, incremental.remove_edge, 1, 0, 1)
+        self.assertRaises(ValueError, incremental.add_edge, 3, 0, 1)
+
+    def test_isolated_vertices_kept(self):
+        """Should index the edges of multigraphs with isolated vertices like their adjacency matrices."""
+        multidigraph1 = MultiDiGraph(np.array([[0, 0, 0], [1, 0, 0], [0, 0, 0]]), remove_isolated_vertices=False)
+        multidigraph2 = MultiDiGraph(np.array([[0, 0, 0], [0, 0, 1], [0, 0, 0]]), remove_isolated_vertices=False)
+        for options in ({}, {'storage': 'bitset'}, {'approximate': True}, {'maximum_only': True},
+                        {'weighted': True}, {'connected': True}):
+            with self.subTest(**options):
+                _, result = find_maximum_subgraphs(multidigraph1, multidigraph2, **options)
+                self.assertEqual([subgraph.mapped_edges.tolist() for subgraph in result], [[[1, 0, 1, 2, 1]]])
+
+    def test_implicit_storage(self):
+        """Should return the same subgraphs with edge graph product computed on demand."""
+        _, expected = find_maximum_subgraphs(self.multidigraph_triangular_extended, self.multidigraph_y_extended)
+        _, result = find_maximum_subgraphs(self.multidigraph_triangular_extended, self.multidigraph_y_extended,
+                                           storage='implicit', cache_size=8)
+        self.assertEqual(len(result), len(expected))
+        for subgraph in expected:
+            self.assertTrue(any(np.array_equal(subgraph['multi_di_subgraph'].adjacency_matrix,
+                                               other['multi_di_subgraph'].adjacency_matrix) for other in result))
+
+    def test_bitset_storage(self):
+        """Should return the same subgraphs with bit-packed edge graph product."""
+        _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, storage='sparse')
+        _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, storage='bitset')
+        self.assertEqual(len(result), len(expected))
+        for subgraph in expected:
+            self.assertTrue(any(np.array_equal(subgraph['multi_di_subgraph'].adjacency_matrix,
+                                               other['multi_di_subgraph'].adjacency_matrix) for other in result))
+
+    def test_memmap_storage(self):
+        """Should return the same subgraphs with edge graph product in a memory-mapped file."""
+        _, expected = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, storage='sparse')
+        _, result = find_maximum_subgraphs(self.multidigraph_6_1, self.multidigraph_6_2, storage='memmap',
+                                           block_size=5)
+        self.assertEqual(len(result), len(expected))
+        for subgraph in expected:
+            self.assertTrue(any(np.array_equal(subgraph['multi_di_subgraph'].adjacency_matrix,
+                                               other['multi_di_subgraph'].adjacency_matrix) for other in result))
+
+    def test_unknown_storage(self):
+        """Should raise ValueError for unknown edge graph product storage."""
+        with self.assertRaises(ValueError):
+            find_maximum_subgraphs(self.multidigraph_3_1, self.multidigraph_3_2, storage='unknown')
+
+
+class TestDistanceInterval(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multidigraph_1 = MultiDiGraph(np.array([
+            [0, 1, 1, 0, 2],
+            [0, 0, 1, 1, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 1, 0]
+        ]))
+
+        self.multidigraph_2 = MultiDiGraph(np.array([
+            [0, 1, 1, 0],
+            [0, 0, 1, 1],
+            [0, 0, 0, 0],
+            [0, 3, 0, 0]
+        ]))
+
+    def test_l1_interval_contains_distance(self):
+        """Should return the interval containing the exact L1 distance."""
+        stats = {}
+        approx_distance, _ = approx_distance_l1(self.multidigraph_1, self.multidigraph_2, stats=stats)
+        distance, _ = distance_l1(self.multidigraph_1, self.multidigraph_2)
+        lower_bound, upper_bound = stats['distance_interval']
+        self.assertEqual(upper_bound, approx_distance)
+        self.assertTrue(lower_bound <= distance <= upper_bound)
+        self.assertAlmostEqual(stats['gap'], upper_bound - lower_bound)
+
+    def test_l2_interval_contains_distance(self):
+        """Should return the interval containing the exact L2 distance."""
+        stats = {}
+        approx_distance, _ = approx_distance_l2(self.multidigraph_1, self.multidigraph_2, stats=stats)
+        distance, _ = distance_l2(self.multidigraph_1, self.multidigraph_2)
+        lower_bound, upper_bound = stats['distance_interval']
+        self.assertEqual(upper_bound, approx_distance)
+        self.assertTrue(lower_bound <= distance <= upper_bound)
+
+    def test_multilevel_distance(self):
+        """Should return the interval containing the exact distance with the multilevel engine."""
+        for distance_function, approx_distance_function in ((distance_l1, approx_distance_l1),
+                                                             (distance_l2, approx_distance_l2)):
+            stats = {}
+            approx_distance, _ = approx_distance_function(self.multidigraph_1, self.multidigraph_2, stats=stats,
+                                                          engine='multilevel')
+            distance, _ = distance_function(self.multidigraph_1, self.multidigraph_2)
+            lower_bound, upper_bound = stats['distance_interval']
+            self.assertEqual(upper_bound, approx_distance)
+            self.assertTrue(lower_bound <= distance <= upper_bound)
+
+            # graphs below the coarsest size, whose common subgraph is found
+            triangular = MultiDiGraph(np.array([[0, 1, 1], [1, 0, 1], [1, 1, 0]]))
+            approx_distance, _ = approx_distance_function(self.multidigraph_1, triangular, engine='multilevel')
+            distance, _ = distance_function(self.multidigraph_1, triangular)
+            self.assertLess(approx_distance, 1.0)
+            self.assertLessEqual(distance, approx_distance)
+
+    def test_connected_distance(self):
+        """Should not return smaller distance when only connected subgraphs are compared."""
+        for distance_function in (distance_l1, distance_l2):
+            distance, _ = distance_function(self.multidigraph_1, self.multidigraph_2)
+            connected_distance, _ = distance_function(self.multidigraph_1, self.multidigraph_2, connected=True)
+            self.assertGreaterEqual(connected_distance, distance)
+
+    def test_vertex_map_distance(self):
+        """Should not return smaller distance when the subgraphs have to extend a vertex map."""
+        for distance_function in (distance_l1, distance_l2):
+            distance, _ = distance_function(self.multidigraph_1, self.multidigraph_2)
+            anchored_distance, _ = distance_function(self.multidigraph_1, self.multidigraph_2, vertex_map={0: 1})
+            self.assertGreaterEqual(anchored_distance, distance)
+
 
 if __name__ == '__main__':
     unittest.main()